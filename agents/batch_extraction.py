@@ -0,0 +1,290 @@
+import glob
+import json
+import os
+import time
+
+from openai import OpenAI
+from profile_schema import decision_result, parse_decision
+from tracing import estimate_cost
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+COMPLETION_WINDOW = "24h"
+# The Batch API accepts at most 50,000 requests and 200 MB per input file
+MAX_BATCH_REQUESTS = 50000
+MAX_BATCH_BYTES = 190 * 1024 * 1024
+TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+# Batch requests are billed at half the synchronous price
+BATCH_PRICE_FACTOR = 0.5
+
+
+class ExtractionBatch:
+    """
+    Verify-and-extract prompts written for the OpenAI Batch API, and their results.
+
+    Requests go to numbered part files next to `path`, each within the API's
+    per-file limits, plus a manifest mapping every custom_id back to its
+    queue row. Both are synced to disk by add(), before the caller parks the
+    row, so a killed prepare run never leaves a parked row out of the
+    manifest. A state file records the uploaded file and batch ids as soon
+    as they exist, so an interrupted submit or wait resumes the same batches
+    instead of paying for them twice.
+    """
+
+    def __init__(self, path: str, model: str = "gpt-4o-mini", temperature: float = 0):
+        self.path = path
+        self.model = model
+        self.temperature = temperature
+        root, _ = os.path.splitext(path)
+        self.manifest_path = root + ".manifest.jsonl"
+        self.state_path = root + ".state.json"
+        self._root = root
+        self._part = None
+        self._part_requests = 0
+        self._part_bytes = 0
+        self._manifest = None
+        self._ids = None
+        self.added = 0
+        self.usage = {"prompt": 0, "completion": 0, "cost": 0.0}
+        self.outcomes = {"ok": 0, "invalid": 0, "failed": 0, "missing": 0}
+
+    def parts(self) -> list:
+        return sorted(glob.glob(glob.escape(self._root) + ".part[0-9][0-9][0-9].jsonl"))
+
+    def submitted(self) -> bool:
+        """Whether batches were submitted and their results not yet ingested"""
+        return os.path.exists(self.state_path)
+
+    def prepared(self) -> bool:
+        return os.path.exists(self.manifest_path)
+
+    @staticmethod
+    def _trim_partial_line(path: str):
+        """Drop a last line a killed run left unfinished"""
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return
+        with open(path, 'rb+') as f:
+            data = f.read()
+            if not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+
+    def _read_manifest(self) -> dict:
+        """custom_id -> meta of every request in the manifest"""
+        manifest = {}
+        if not os.path.exists(self.manifest_path):
+            return manifest
+        with open(self.manifest_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    meta = json.loads(line)
+                except json.JSONDecodeError:
+                    # A partial last line from a killed prepare run
+                    continue
+                manifest[meta.pop("custom_id")] = meta
+        return manifest
+
+    def manifest_keys(self) -> tuple:
+        """(rows, person keys) of the requests in the manifest"""
+        metas = self._read_manifest().values()
+        return {meta["row"] for meta in metas}, {meta.get("person_key") for meta in metas} - {None}
+
+    def _has_room(self, size: int) -> bool:
+        return self._part_requests < MAX_BATCH_REQUESTS and self._part_bytes + size <= MAX_BATCH_BYTES
+
+    def _open_part(self, size: int):
+        parts = self.parts()
+        if self._part is not None:
+            self._part.close()
+        elif parts:
+            # Continue the last part of an earlier, unsubmitted prepare run
+            self._trim_partial_line(parts[-1])
+            with open(parts[-1], 'rb') as f:
+                self._part_requests = sum(1 for _ in f)
+            self._part_bytes = os.path.getsize(parts[-1])
+            if self._has_room(size):
+                self._part = open(parts[-1], 'a', encoding='utf-8')
+                return
+        self._part_requests = self._part_bytes = 0
+        self._part = open(f"{self._root}.part{len(parts):03d}.jsonl", 'a', encoding='utf-8')
+
+    def add(self, custom_id: str, prompt: str, meta: dict):
+        """
+        Write one verify-and-extract request
+
+        Args:
+            custom_id (str): Id the result comes back under
+            prompt (str): Lookup prompt
+            meta (dict): Stored in the manifest and handed back with the result
+        """
+        if self._ids is None:
+            self._ids = set(self._read_manifest())
+        if custom_id in self._ids:
+            # Written by a run killed before it parked the row, which was claimed again
+            return
+        line = json.dumps({
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": BATCH_ENDPOINT,
+            "body": {
+                "model": self.model,
+                "temperature": self.temperature,
+                "messages": [{"role": "user", "content": prompt}],
+                "response_format": {"type": "json_object"},
+            },
+        }, ensure_ascii=False) + "\n"
+        size = len(line.encode("utf-8"))
+        if self._part is None or not self._has_room(size):
+            self._open_part(size)
+        if self._manifest is None:
+            self._trim_partial_line(self.manifest_path)
+            self._manifest = open(self.manifest_path, 'a', encoding='utf-8')
+        self._part.write(line)
+        self._part_requests += 1
+        self._part_bytes += size
+        self._manifest.write(json.dumps({"custom_id": custom_id, **meta}, ensure_ascii=False) + "\n")
+        # On disk before the caller defers the row
+        for f in (self._part, self._manifest):
+            f.flush()
+            os.fsync(f.fileno())
+        self._ids.add(custom_id)
+        self.added += 1
+
+    def close(self):
+        for f in (self._part, self._manifest):
+            if f is not None:
+                f.close()
+        self._part = self._manifest = None
+
+    def _load_state(self) -> dict:
+        if not os.path.exists(self.state_path):
+            return {"batches": []}
+        with open(self.state_path, 'r') as f:
+            return json.load(f)
+
+    def _save_state(self, state: dict):
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def submit(self, client: OpenAI = None) -> dict:
+        """Upload every part not submitted yet and start a batch for it"""
+        client = client or OpenAI()
+        state = self._load_state()
+        entries = {entry["input"]: entry for entry in state["batches"]}
+        for part in self.parts():
+            entry = entries.get(part)
+            if entry is None:
+                with open(part, 'rb') as f:
+                    uploaded = client.files.create(file=f, purpose="batch")
+                entry = {"input": part, "file_id": uploaded.id, "batch_id": None, "status": "uploaded"}
+                state["batches"].append(entry)
+                self._save_state(state)
+            elif entry["batch_id"]:
+                continue
+            # An upload without a batch is from a submit interrupted in between
+            batch = client.batches.create(input_file_id=entry["file_id"], endpoint=BATCH_ENDPOINT,
+                                          completion_window=COMPLETION_WINDOW)
+            entry.update({"batch_id": batch.id, "status": batch.status})
+            self._save_state(state)
+            print(f"Submitted {os.path.basename(part)} as batch {batch.id}")
+        return state
+
+    def wait(self, client: OpenAI = None, poll_interval: float = 60) -> dict:
+        """
+        Poll the submitted batches until each one finishes, then download
+        their output and error files next to the input parts
+        """
+        client = client or OpenAI()
+        state = self._load_state()
+        while True:
+            running = 0
+            for entry in state["batches"]:
+                if entry["status"] in TERMINAL_STATUSES:
+                    continue
+                batch = client.batches.retrieve(entry["batch_id"])
+                entry["status"] = batch.status
+                counts = batch.request_counts
+                if batch.status not in TERMINAL_STATUSES:
+                    running += 1
+                    if counts is not None:
+                        print(f"Batch {batch.id}: {batch.status}, {counts.completed + counts.failed}/{counts.total} done")
+                    continue
+                print(f"Batch {batch.id}: {batch.status}")
+                base, _ = os.path.splitext(entry["input"])
+                for key, file_id in (("output", batch.output_file_id), ("errors", batch.error_file_id)):
+                    if file_id:
+                        path = f"{base}.{key}.jsonl"
+                        with open(path, 'w', encoding='utf-8') as f:
+                            f.write(client.files.content(file_id).text)
+                        entry[key] = path
+                self._save_state(state)
+            if not running:
+                return state
+            time.sleep(poll_interval)
+
+    def _result(self, record: dict, meta: dict) -> dict:
+        """Turn one output line into a lookup result or an error result"""
+        response = record.get("response") or {}
+        if record.get("error") or response.get("status_code") != 200:
+            error = record.get("error") or response.get("body", {}).get("error") or {}
+            self.outcomes["failed"] += 1
+            return {"error": "Batch extraction failed", "details": error.get("message", str(error)),
+                    "transient": True}
+
+        body = response["body"]
+        usage = body.get("usage") or {}
+        prompt_tokens, completion_tokens = usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+        self.usage["prompt"] += prompt_tokens
+        self.usage["completion"] += completion_tokens
+        self.usage["cost"] += estimate_cost(body.get("model", self.model), prompt_tokens,
+                                            completion_tokens) * BATCH_PRICE_FACTOR
+        try:
+            decision = parse_decision(body["choices"][0]["message"]["content"])
+        except ValueError as e:
+            self.outcomes["invalid"] += 1
+            return {"error": "Batch extraction failed schema validation", "details": str(e)[:500],
+                    "transient": True}
+        self.outcomes["ok"] += 1
+        return decision_result(decision, meta["source_url"], meta.get("pre_verified", False), meta)
+
+    def results(self):
+        """
+        Yield (meta, result) for every prepared request
+
+        Results are validated profiles or no-matches, or transient error results for
+        requests that failed, did not validate, or never came back, so the
+        next regular run retries them online.
+        """
+        manifest = self._read_manifest()
+        for entry in self._load_state()["batches"]:
+            for key in ("output", "errors"):
+                if not entry.get(key):
+                    continue
+                with open(entry[key], 'r', encoding='utf-8') as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        record = json.loads(line)
+                        meta = manifest.pop(record["custom_id"], None)
+                        if meta is not None:
+                            yield meta, self._result(record, meta)
+        for meta in manifest.values():
+            self.outcomes["missing"] += 1
+            yield meta, {"error": "Batch extraction returned no result", "transient": True}
+
+    def clear(self):
+        """Remove the batch files once their results are ingested"""
+        self.close()
+        state = self._load_state()
+        paths = self.parts() + [self.manifest_path, self.state_path]
+        paths += [entry[key] for entry in state["batches"] for key in ("output", "errors") if entry.get(key)]
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def summary(self) -> str:
+        outcomes = ", ".join(f"{key}={count}" for key, count in self.outcomes.items())
+        return (
+            f"Batch extraction: {outcomes}; {self.usage['prompt']} prompt + {self.usage['completion']} "
+            f"completion tokens, about ${self.usage['cost']:.4f} at batch pricing"
+        )
@@ -0,0 +1,117 @@
+import csv
+import hashlib
+import json
+import os
+import tempfile
+
+# Rows between two byte offsets in the sidecar index
+INDEX_STRIDE = 1024
+# Bytes from the start of the file that identify it, so an edited file gets a new index
+FINGERPRINT_BYTES = 64 * 1024
+
+
+class CsvStream:
+    """
+    Read a CSV file as (row number, row dict) pairs without loading it.
+
+    Row numbers count data rows the way enumerate(csv.DictReader(f)) does,
+    blank lines excluded. A sidecar index next to the file keeps the byte
+    offset of every INDEX_STRIDE-th row, so reading from row n seeks to the
+    nearest indexed row and parses fewer than INDEX_STRIDE rows to reach n.
+    The index grows as rows are read; rows appended to the file keep it
+    valid, while any other change to the file's start throws it away.
+    """
+
+    def __init__(self, path: str, index_path: str = None, stride: int = INDEX_STRIDE):
+        self.path = path
+        self.index_path = index_path or path + ".idx.json"
+        self.stride = stride
+        self.offsets = []
+        self._fingerprint = None
+        self._load_index()
+
+    def _compute_fingerprint(self, length: int) -> str:
+        with open(self.path, 'rb') as f:
+            return hashlib.sha1(f.read(length)).hexdigest()
+
+    def _load_index(self):
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, 'r') as f:
+            index = json.load(f)
+        size = os.path.getsize(self.path)
+        length = index.get("fingerprint_bytes", 0)
+        if (index.get("stride") != self.stride or size < index.get("size", 0)
+                or self._compute_fingerprint(length) != index.get("fingerprint")):
+            print(f"{os.path.basename(self.path)} changed, rebuilding its row index")
+            return
+        self.offsets = index["offsets"]
+        self._fingerprint = (length, index["fingerprint"], index["size"])
+
+    def save_index(self):
+        length = min(FINGERPRINT_BYTES, os.path.getsize(self.path))
+        if self._fingerprint is None or self._fingerprint[0] < length:
+            self._fingerprint = (length, self._compute_fingerprint(length), os.path.getsize(self.path))
+        length, fingerprint, _ = self._fingerprint
+        index = {
+            "stride": self.stride,
+            "size": os.path.getsize(self.path),
+            "fingerprint_bytes": length,
+            "fingerprint": fingerprint,
+            "offsets": self.offsets,
+        }
+        # Shard processes can build the index at the same time, each writes its own temp file
+        with tempfile.NamedTemporaryFile('w', dir=os.path.dirname(os.path.abspath(self.index_path)),
+                                         prefix=os.path.basename(self.index_path) + ".",
+                                         suffix=".tmp", delete=False) as f:
+            json.dump(index, f)
+        os.replace(f.name, self.index_path)
+
+    def rows(self, start: int = 0):
+        """
+        Yield (row number, row dict) from row `start` on
+
+        Args:
+            start (int): First row number to yield
+        """
+        with open(self.path, 'rb') as f:
+            position = 0
+
+            def lines():
+                # Decoded lines for the csv reader, tracking the byte position as it pulls them
+                nonlocal position
+                for raw in iter(f.readline, b""):
+                    position += len(raw)
+                    yield raw.decode("utf-8-sig" if position == len(raw) else "utf-8")
+
+            reader = csv.reader(lines())
+            fieldnames = next(reader, None)
+            if fieldnames is None:
+                return
+
+            checkpoint = min(start // self.stride, len(self.offsets) - 1) if self.offsets else -1
+            if checkpoint > 0:
+                row_number = checkpoint * self.stride
+                f.seek(self.offsets[checkpoint])
+                position = self.offsets[checkpoint]
+            else:
+                row_number = 0
+            grew = False
+            try:
+                while True:
+                    offset = position
+                    values = next(reader, None)
+                    if values is None:
+                        break
+                    if not values:
+                        continue
+                    if row_number % self.stride == 0 and row_number // self.stride == len(self.offsets):
+                        self.offsets.append(offset)
+                        grew = True
+                    if row_number >= start:
+                        # Short rows get None like DictReader, extra values are dropped
+                        yield row_number, dict(zip(fieldnames, values + [None] * (len(fieldnames) - len(values))))
+                    row_number += 1
+            finally:
+                if grew:
+                    self.save_index()
@@ -0,0 +1,128 @@
+import re
+import unicodedata
+from collections import Counter
+
+LINKEDIN_RE = re.compile(r"linkedin\.com/in/([^/?#]+)", re.IGNORECASE)
+
+# Honorifics and suffixes that do not tell two people apart
+NAME_NOISE = {"dr", "mr", "mrs", "ms", "prof", "jr", "sr", "ii", "iii", "phd", "md"}
+
+
+def normalize_person_name(name: str) -> str:
+    """
+    Comparison key for a person's name
+
+    Case, accents, punctuation, honorifics and single-letter middle
+    initials are dropped, so "John A. Smith" and "john smith" match.
+    """
+    name = unicodedata.normalize("NFKD", name or "").encode("ascii", "ignore").decode()
+    tokens = [t for t in re.findall(r"[a-z0-9]+", name.lower()) if t not in NAME_NOISE]
+    if len(tokens) > 2:
+        tokens = [tokens[0]] + [t for t in tokens[1:-1] if len(t) > 1] + [tokens[-1]]
+    return " ".join(tokens)
+
+
+def linkedin_handle(url: str) -> str:
+    """The /in/<handle> part of a LinkedIn profile URL, or "" """
+    match = LINKEDIN_RE.search(url or "")
+    return match.group(1).strip().lower() if match else ""
+
+
+class Person:
+    """One resolved person and every input row that refers to them"""
+
+    def __init__(self, key: str, rows: list):
+        self.key = key
+        # (row index, row dict) pairs in input order
+        self.rows = rows
+
+    @property
+    def row_ids(self) -> list:
+        return [idx for idx, _ in self.rows]
+
+    @property
+    def name(self) -> str:
+        """The most common spelling of the name, earliest first on ties"""
+        spellings = [" ".join(row["Founder Name"].split()) for _, row in self.rows]
+        counts = Counter(spellings)
+        return max(spellings, key=lambda spelling: (counts[spelling], -spellings.index(spelling)))
+
+    @property
+    def names(self) -> list:
+        """Every distinct spelling of the name, in input order"""
+        return list(dict.fromkeys(" ".join(row["Founder Name"].split()) for _, row in self.rows))
+
+    def first_row_for(self, name: str) -> int:
+        return next(idx for idx, row in self.rows if " ".join(row["Founder Name"].split()) == name)
+
+    def _distinct(self, field: str) -> list:
+        return list(dict.fromkeys(row[field].strip() for _, row in self.rows if row.get(field, "").strip()))
+
+    def describe(self, describe_row) -> str:
+        """Merge the per-row descriptions, dropping repeats"""
+        descriptions = list(dict.fromkeys(describe_row(row) for _, row in self.rows))
+        return "; also ".join(descriptions)
+
+    def context(self) -> dict:
+        """Pre-verifier context covering every row of the person"""
+        companies = self._distinct("Company Founded")
+        return {
+            "title": " ".join(self._distinct("Title")),
+            "company": companies[0] if companies else "",
+            "companies": companies,
+            "description": " ".join(self._distinct("Description")),
+        }
+
+
+def match_keys(row: dict) -> tuple:
+    """(LinkedIn handle, normalized name) of an input row, either may be "" """
+    return linkedin_handle(row.get("LinkedIn Profile", "")), normalize_person_name(row["Founder Name"])
+
+
+def registered_keys(handle: str, name_key: str) -> list:
+    """Match keys a row is found under by later rows"""
+    keys = [f"in:{handle}"] if handle else []
+    if name_key:
+        keys.append(f"name:{name_key}")
+    return keys
+
+
+def resolve_row(idx: int, row: dict, people_for) -> tuple:
+    """
+    Resolve one input row against the people earlier rows resolved to
+
+    Rows sharing a LinkedIn handle are the same person. A row joins the
+    person with the same normalized name unless that would join two
+    different LinkedIn handles; a row without a handle whose name belongs
+    to people with different handles stays on its own, since there is no
+    telling which of them it belongs to. Earlier rows are never re-keyed,
+    so rows can be resolved one at a time as the input streams in.
+
+    Args:
+        idx (int): Row number
+        row (dict): Input row
+        people_for: fn(match key) -> list of (person key, handle) registered under it
+
+    Returns:
+        tuple: (person key, the person's handle, match keys to register for the row)
+    """
+    handle, name_key = match_keys(row)
+    keys = registered_keys(handle, name_key)
+
+    if handle:
+        known = people_for(f"in:{handle}")
+        if known:
+            return known[0][0], handle, keys
+    named = people_for(f"name:{name_key}") if name_key else []
+    handles = {person_handle for _, person_handle in named if person_handle}
+
+    # A row with a handle only reaches here when nobody has that handle yet
+    if named and (not handles if handle else len(handles) <= 1):
+        person_key, person_handle = named[0]
+        return person_key, person_handle or handle, keys
+    if handle:
+        # Keyed by handle when there is one, so later rows never re-key a person
+        return f"in:{handle}", handle, keys
+    if named or not name_key:
+        return f"name:{name_key}#{idx}", "", keys
+    return f"name:{name_key}", "", keys
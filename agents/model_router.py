@@ -0,0 +1,114 @@
+import os
+import random
+import threading
+
+from langchain_ollama import ChatOllama
+
+from section_selector import count_tokens
+from tracing import get_tracer
+
+# Escalation reasons, in the order they are checked
+ESCALATION_REASONS = ("local_error", "invalid", "low_confidence")
+
+
+class ModelRouter:
+    """
+    Local first tier for the verify-and-extract call.
+
+    Prompts up to max_prompt_tokens go to a model served by Ollama. Its
+    answer is kept unless the call failed, the answer did not pass schema
+    validation or it is less than min_confidence sure of its decision (its
+    confidence for a match, one minus it for a mismatch); those calls are
+    escalated to the remote model, whose answer is used instead. Longer
+    prompts go straight to the remote model. A share of the answers that
+    would be kept, audit_rate, is sent to the remote model as well, whose
+    answer then wins, to measure how often the two tiers agree.
+    """
+
+    def __init__(self, model: str = "llama3.1:8b", base_url: str = None, max_prompt_tokens: int = 3000,
+                 min_confidence: float = 0.8, audit_rate: float = 0.0, temperature: float = 0,
+                 completion_tokens: int = 1200):
+        self.model_name = model
+        self.max_prompt_tokens = max_prompt_tokens
+        self.min_confidence = min_confidence
+        self.audit_rate = audit_rate
+        # Ollama's own OLLAMA_HOST is used when no base_url is given
+        base_url = base_url or os.getenv("OLLAMA_HOST")
+        self.llm = ChatOllama(model=model, temperature=temperature, format="json",
+                              num_predict=completion_tokens, **({"base_url": base_url} if base_url else {}))
+        self.stats = {
+            "local": 0,
+            "kept": 0,
+            "remote_only": 0,
+            "audited": 0,
+            "compared": 0,
+            "agreed": 0,
+            **{reason: 0 for reason in ESCALATION_REASONS},
+        }
+        self._lock = threading.Lock()
+
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def routes(self, prompt: str) -> bool:
+        """Whether a prompt goes to the local model first"""
+        local = count_tokens(prompt) <= self.max_prompt_tokens
+        self._count("local" if local else "remote_only")
+        return local
+
+    def escalation(self, decision, failed: bool = False):
+        """
+        Why a local answer goes to the remote model as well
+
+        Args:
+            decision: The parsed LookupDecision, or None if it did not validate
+            failed (bool): The local call raised
+
+        Returns:
+            str | None: An ESCALATION_REASONS entry, "audited", or None to keep the answer
+        """
+        if failed:
+            reason = "local_error"
+        elif decision is None:
+            reason = "invalid"
+        elif (decision.confidence if decision.match else 1 - decision.confidence) < self.min_confidence:
+            reason = "low_confidence"
+        elif random.random() < self.audit_rate:
+            reason = "audited"
+        else:
+            reason = None
+        self._count(reason or "kept")
+        return reason
+
+    def compare(self, local, remote):
+        """Record whether both tiers reached the same match decision"""
+        if local is None or remote is None:
+            return
+        with self._lock:
+            self.stats["compared"] += 1
+            self.stats["agreed"] += local.match == remote.match
+
+    def summary(self) -> str:
+        """Report how much of the model work stayed local and how well it held up"""
+        with self._lock:
+            stats = dict(self.stats)
+        total = stats["local"] + stats["remote_only"]
+        escalated = sum(stats[reason] for reason in ESCALATION_REASONS)
+        local_rate = stats["kept"] / total * 100 if total else 0
+        escalation_rate = escalated / stats["local"] * 100 if stats["local"] else 0
+        agreement = stats["agreed"] / stats["compared"] * 100 if stats["compared"] else 0
+        reasons = ", ".join(f"{stats[reason]} {reason.replace('_', ' ')}" for reason in ESCALATION_REASONS)
+        stages = get_tracer().stage_stats()
+        latencies = "; ".join(
+            f"{tier} p50 {stages[stage]['p50_ms']:.0f} ms, p95 {stages[stage]['p95_ms']:.0f} ms"
+            for tier, stage in (("local", "local_verify_extract"), ("remote", "verify_extract"))
+            if stage in stages
+        )
+        return (
+            f"Model router ({self.model_name}): {stats['kept']} of {total} answers kept local ({local_rate:.0f}%), "
+            f"{stats['remote_only']} long prompts sent remote, {escalated} escalated "
+            f"({escalation_rate:.0f}% of local: {reasons}), {stats['audited']} audited; "
+            f"tiers agreed on {stats['agreed']} of {stats['compared']} compared ({agreement:.0f}%)"
+            + (f"; {latencies}" if latencies else "")
+        )
@@ -0,0 +1,146 @@
+import re
+import threading
+import unicodedata
+
+# Words that say the page is about someone in business or tech
+ROLE_KEYWORDS = {
+    "founder", "cofounder", "founded", "cofounded",
+    "ceo", "cto", "coo", "cfo", "chief", "president", "chairman", "executive",
+    "entrepreneur", "businessman", "businesswoman", "businessperson", "investor",
+    "engineer", "programmer", "developer", "scientist", "startup", "company",
+    "venture", "capitalist",
+}
+
+# Occupations that almost never describe a startup founder on their own
+OTHER_OCCUPATIONS = {
+    "footballer", "cricketer", "basketball", "baseball", "athlete", "boxer",
+    "wrestler", "politician", "senator", "actor", "actress", "singer",
+    "rapper", "musician", "painter", "poet", "novelist", "bishop", "priest",
+    "soldier", "general", "monarch", "king", "queen", "saint",
+}
+
+STOPWORDS = {
+    "a", "an", "and", "at", "by", "for", "from", "in", "is", "of", "on",
+    "or", "the", "to", "with", "inc", "llc", "ltd", "co", "corp", "company",
+}
+
+
+def _tokens(text: str) -> list:
+    text = unicodedata.normalize("NFKD", text or "").encode("ascii", "ignore").decode()
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+
+def _company_score(company: str, page_text: str, page_tokens: set) -> float:
+    company_tokens = [t for t in _tokens(company) if t not in STOPWORDS]
+    if not company_tokens:
+        return 0.0
+    if " ".join(company_tokens) in page_text:
+        return 1.0
+    return 0.5 * sum(t in page_tokens for t in company_tokens) / len(company_tokens)
+
+
+class PreVerifier:
+    """
+    Cheap local scorer that decides clear matches and clear mismatches
+    before the model is involved.
+
+    The score combines name coverage, company-name matching, role keywords
+    and description token overlap. Scores at or above accept_threshold are
+    matches, at or below reject_threshold are mismatches, and everything in
+    between is left to the LLM.
+    """
+
+    def __init__(self, accept_threshold: float = 0.75, reject_threshold: float = 0.3):
+        if reject_threshold >= accept_threshold:
+            raise ValueError("reject_threshold must be lower than accept_threshold")
+        self.accept_threshold = accept_threshold
+        self.reject_threshold = reject_threshold
+        self.stats = {"match": 0, "no_match": 0, "ambiguous": 0}
+        self._lock = threading.Lock()
+
+    def score(self, summary: str, name: str, title: str = "", company: str = "",
+              description: str = "") -> float:
+        """
+        Score how likely a Wikipedia summary describes the given founder
+
+        Args:
+            summary: Page title and lead section as tools.page_summary builds
+                them, for one page with any disambiguation already resolved
+            company: Company name, or a list of names for someone with several
+
+        Returns:
+            float: Score between 0 and 1
+        """
+        page = summary or ""
+        if not page.strip():
+            return 0.0
+
+        page_tokens = set(_tokens(page))
+        name_tokens = [t for t in _tokens(name) if len(t) > 1]
+        if not name_tokens:
+            return 0.0
+
+        # The surname has to appear, otherwise this is someone else
+        if name_tokens[-1] not in page_tokens:
+            return 0.0
+        name_score = sum(t in page_tokens for t in name_tokens) / len(name_tokens)
+
+        # A founder listed under several companies matches on the best one
+        companies = [company] if isinstance(company, str) else company
+        page_text = " ".join(_tokens(page))
+        company_score = max(
+            (_company_score(company_name, page_text, page_tokens) for company_name in companies),
+            default=0.0
+        )
+
+        role_hits = page_tokens & ROLE_KEYWORDS
+        role_score = min(len(role_hits), 3) / 3
+
+        context_tokens = {
+            t for t in _tokens(f"{title} {description}")
+            if t not in STOPWORDS and len(t) > 2
+        }
+        overlap_score = len(context_tokens & page_tokens) / len(context_tokens) if context_tokens else 0.0
+
+        score = 0.3 * name_score + 0.35 * company_score + 0.2 * role_score + 0.15 * overlap_score
+
+        # A page about an athlete or politician with no business vocabulary
+        if page_tokens & OTHER_OCCUPATIONS and not role_hits:
+            score -= 0.3
+
+        return max(0.0, min(1.0, score))
+
+    def decide(self, summary: str, name: str, title: str = "", company: str = "",
+               description: str = "") -> tuple:
+        """
+        Decide locally when the evidence is clear
+
+        Returns:
+            tuple: ("match" | "no_match" | "ambiguous", score)
+        """
+        score = self.score(summary, name, title, company, description)
+        if score >= self.accept_threshold:
+            decision = "match"
+        elif score <= self.reject_threshold:
+            decision = "no_match"
+        else:
+            decision = "ambiguous"
+        with self._lock:
+            self.stats[decision] += 1
+        return decision, score
+
+    def summary(self) -> str:
+        """
+        Report how many model calls were skipped
+
+        Only a local mismatch skips the model: a local match still needs the
+        verify-and-extract call for its profile, which then keeps it even if
+        the model is unsure.
+        """
+        total = sum(self.stats.values())
+        skipped = self.stats["no_match"]
+        rate = skipped / total * 100 if total else 0
+        return (
+            f"Pre-verifier: {skipped} of {total} model calls skipped ({rate:.0f}%, no_match) - "
+            f"{self.stats['match']} pre-verified (match), {self.stats['ambiguous']} left to the model"
+        )
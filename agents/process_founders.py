@@ -1,89 +1,594 @@
-import csv
+import argparse
+import asyncio
 import json
 import os
-from wikipedia_lookup_agent import lookup
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from batch_extraction import ExtractionBatch
+from response_cache import CACHE_MODES, configure_cache
+from result_journal import ResultJournal, compact, iter_latest, iter_records, seed_from_json
+from csv_stream import CsvStream
+from entity_resolution import Person, match_keys, registered_keys, resolve_row
+from model_router import ModelRouter
+from pre_verifier import PreVerifier
+from rate_limiter import limits_summary
+from section_selector import SectionSelector
+from sharding import merge_shards, parse_shard, run_workers, seed_shard_queue, shard_path
+from tools import NO_WIKI_URL, is_transient_error
+from wiki_client import MAX_TITLES, get_client, title_from_url, url_from_title
+from tracing import configure_tracer, get_tracer
+from wikipedia_lookup_agent import lookup, get_engine, configure_engine
+from work_queue import WorkQueue, AWAITING_BATCH, MATCHED, NO_MATCH, PERMANENT_ERROR
 
 # File paths
 INPUT_CSV = "/Users/aveekgoyal/ice_breaker/yc_founders.csv"
 OUTPUT_JSON = "/Users/aveekgoyal/ice_breaker/agents/founders_wiki_data.json"
+RESULTS_JOURNAL = "/Users/aveekgoyal/ice_breaker/agents/founders_wiki_data.jsonl"
+QUEUE_DB = "/Users/aveekgoyal/ice_breaker/processed_rows.sqlite"
+# Per-stage spans of every lookup, and a Prometheus text snapshot of their totals
+TRACE_FILE = "/Users/aveekgoyal/ice_breaker/agents/lookup_trace.jsonl"
+METRICS_FILE = "/Users/aveekgoyal/ice_breaker/agents/lookup_metrics.prom"
+# Extraction prompts written by --batch-prepare for the OpenAI Batch API
+BATCH_FILE = "/Users/aveekgoyal/ice_breaker/agents/extraction_batch.jsonl"
+# Tracker used before the work queue, imported into it once
 TRACKER_FILE = "/Users/aveekgoyal/ice_breaker/processed_rows.json"
 
-def load_tracker():
-    """Load the tracker file or create if doesn't exist"""
-    if os.path.exists(TRACKER_FILE):
+# Transient failures due for retry within this many seconds are waited for
+# instead of being left to the next run
+RETRY_WAIT_LIMIT = 300
+
+# (i, N) when running one shard of an N-way split, see use_shard()
+SHARD = None
+# The main work queue while running a shard, which the shard takes its rows from
+MAIN_QUEUE_DB = None
+
+# ExtractionBatch receiving deferred extractions during a --batch-prepare run
+BATCH = None
+
+def use_shard(shard):
+    """Point the work queue and results journal at this shard's own files"""
+    global SHARD, MAIN_QUEUE_DB, QUEUE_DB, RESULTS_JOURNAL, TRACE_FILE, METRICS_FILE
+    SHARD = shard
+    MAIN_QUEUE_DB = QUEUE_DB
+    QUEUE_DB = shard_path(QUEUE_DB, shard)
+    RESULTS_JOURNAL = shard_path(RESULTS_JOURNAL, shard)
+    TRACE_FILE = shard_path(TRACE_FILE, shard)
+    METRICS_FILE = shard_path(METRICS_FILE, shard)
+
+def row_keys(row):
+    handle, name_key = match_keys(row)
+    return handle, registered_keys(handle, name_key)
+
+def open_queue():
+    """
+    Open the work queue after adding any input rows it does not have yet
+
+    The input is streamed from the first row after the last queued one, using
+    its sidecar row index, and each new row is resolved to a person as it is
+    queued. A resume therefore neither re-reads nor holds the rows it has seen.
+    Shards take their new rows from the main queue.
+
+    Returns:
+        WorkQueue: This process's queue
+    """
+    queue = WorkQueue(MAIN_QUEUE_DB or QUEUE_DB)
+    queue.backfill_people(row_keys)
+    stream = CsvStream(INPUT_CSV)
+    added = queue.extend(stream.rows, lambda idx, row: resolve_row(idx, row, queue.people_for))
+    if added:
+        print(f"Queued {added} new rows")
+
+    if SHARD is None and os.path.exists(TRACKER_FILE):
         with open(TRACKER_FILE, 'r') as f:
-            return json.load(f)
-    return {"last_processed_row": 0, "processed_founders": []}
-
-def save_tracker(tracker_data):
-    """Save the current state to tracker file"""
-    with open(TRACKER_FILE, 'w') as f:
-        json.dump(tracker_data, f, indent=2)
-
-def load_wiki_data():
-    """Load existing wiki data or create empty dict"""
-    if os.path.exists(OUTPUT_JSON):
-        with open(OUTPUT_JSON, 'r') as f:
-            return json.load(f)
-    return {}
-
-def save_wiki_data(wiki_data):
-    """Save wiki data to JSON file"""
-    with open(OUTPUT_JSON, 'w') as f:
-        json.dump(wiki_data, f, indent=2)
+            tracker = json.load(f)
+        matched_names = {record["founder_name"] for record in iter_records(RESULTS_JOURNAL)}
+        queue.import_legacy_tracker(tracker, matched_names)
+    if SHARD is None:
+        return queue
+    queue.close()
+    copied = seed_shard_queue(MAIN_QUEUE_DB, QUEUE_DB, SHARD)
+    if copied:
+        print(f"Took {copied} new rows into shard {SHARD[0]}/{SHARD[1]}")
+    return WorkQueue(QUEUE_DB)
+
+def open_journal():
+    """Open the results journal, seeding it from an older JSON output once"""
+    if SHARD is None:
+        seed_from_json(RESULTS_JOURNAL, OUTPUT_JSON)
+    return ResultJournal(RESULTS_JOURNAL)
+
+def compact_wiki_data():
+    """Rebuild founders_wiki_data.json from the results journal"""
+    seed_from_json(RESULTS_JOURNAL, OUTPUT_JSON)
+    count = compact(RESULTS_JOURNAL, OUTPUT_JSON)
+    print(f"Compacted {count} founders into {OUTPUT_JSON}")
+
+def build_description(row):
+    """Build the enhanced description passed to the lookup agent"""
+    description = f"{row['Title']} at {row['Company Founded']}"
+    if row['Description']:  # Add description if it exists
+        description += f". {row['Description']}"
+    if row['Company Founded']:  # Add company info if it exists
+        description += f". Company: {row['Company Founded']}"
+    return description
+
+def lookup_args(person):
+    """Name, merged description and context for one lookup covering every row of a person"""
+    return {
+        "name": person.name,
+        "description": person.describe(build_description),
+        "context": person.context(),
+    }
+
+def person_for(item, queue):
+    """The person a claimed item belongs to, with every queued row of theirs"""
+    rows = queue.person_rows(item["person_key"]) if item["person_key"] else []
+    return Person(item["person_key"] or item["founder_name"], rows or [(item["row"], item["payload"])])
+
+def run_lookup(item, person):
+    """Look up one person, turning exceptions into error results"""
+    try:
+        with get_tracer().founder(person.name, item["attempts"]):
+            return lookup(**lookup_args(person))
+    except Exception as e:
+        return {"error": str(e), "transient": is_transient_error(e)}
+
+def commit_result(item, person, result, queue, journal):
+    """Store a lookup result for every row of a person and record the outcome in the queue"""
+    founder_name = person.name
+    # Only store if there's a match
+    if isinstance(result, dict) and not result.get("error"):
+        if result.get("deferred"):
+            BATCH.add(f"row-{item['row']}", result["prompt"],
+                      {"row": item["row"], "person_key": item["person_key"], "source_url": result["source_url"],
+                       "pre_verified": result["pre_verified"], "title": result["title"],
+                       "pageid": result["pageid"], "revid": result["revid"]})
+            queue.defer(item["row"])
+            print(f"… Queued {founder_name} for the batch")
+        elif result.get("match") is False:
+            print(f"✗ No Wikipedia match for {founder_name}: {result.get('reason', 'No reason provided')}")
+            queue.complete(item["row"], NO_MATCH, result.get("reason"))
+        else:
+            # Store the raw result only if it's a match, once per spelling of the name
+            for name in person.names:
+                journal.append(name, result, row=person.first_row_for(name))
+            queue.complete(item["row"], MATCHED)
+            print(f"✓ Stored Wikipedia data for {founder_name} ({len(person.rows)} rows)")
+    elif result.get("details") == NO_WIKI_URL:
+        # No English article is an outcome, not a failure
+        print(f"✗ No Wikipedia page for {founder_name}")
+        queue.complete(item["row"], NO_MATCH, NO_WIKI_URL)
+    else:
+        error = result.get("error", "Unknown error")
+        if result.get("details"):
+            error = f"{error}: {result['details']}"
+        state = queue.fail(item["row"], error, transient=result.get("transient", False))
+        retry_note = " (will retry)" if state != PERMANENT_ERROR else ""
+        print(f"✗ Error processing {founder_name}: {error}{retry_note}")
+
+def skip_if_resolved(item, queue):
+    """
+    Settle a row whose founder another row already resolved
+
+    Returns:
+        bool: True if the row needed no lookup
+    """
+    state = queue.resolved_state(item["person_key"], exclude_row=item["row"])
+    if state is None:
+        return False
+    print(f"Skipping {item['founder_name']} - already processed")
+    queue.complete(item["row"], state, "duplicate founder name")
+    return True
+
+def wait_for_retries(queue):
+    """
+    Sleep until the next transient retry if it is due soon
+
+    Returns:
+        bool: True if there may be claimable work after waiting
+    """
+    next_retry = queue.next_retry_at()
+    if next_retry is None:
+        return False
+    wait = next_retry - time.time()
+    if wait > RETRY_WAIT_LIMIT:
+        print(f"Transient failures will be retried in {wait:.0f}s, re-run to pick them up")
+        return False
+    print(f"Waiting {max(wait, 0):.0f}s for transient failures to become retryable")
+    time.sleep(max(wait, 0))
+    return True
 
 def process_founders():
-    # Load tracker and wiki data
-    tracker = load_tracker()
-    wiki_data = load_wiki_data()
-    last_processed_row = tracker["last_processed_row"]
-    processed_founders = set(tracker["processed_founders"])
-
-    # Read input CSV
-    with open(INPUT_CSV, 'r') as input_file:
-        reader = csv.DictReader(input_file)
-        rows = list(reader)
-
-    # Process rows starting from last processed row
-    for idx, row in enumerate(rows[last_processed_row:], start=last_processed_row):
-        founder_name = row["Founder Name"]
-        
+    # Open the work queue and the results journal
+    queue = open_queue()
+    journal = open_journal()
+
+    while True:
+        items = queue.claim(limit=1)
+        if not items:
+            if wait_for_retries(queue):
+                continue
+            break
+        item = items[0]
+
         # Skip if already processed
-        if founder_name in processed_founders:
-            print(f"Skipping {founder_name} - already processed")
+        if skip_if_resolved(item, queue):
+            continue
+
+        person = person_for(item, queue)
+        print(f"\nProcessing founder: {person.name}")
+
+        # Call Wikipedia lookup agent once for every row of the person
+        result = run_lookup(item, person)
+        commit_result(item, person, result, queue, journal)
+
+    journal.close()
+    queue.close()
+
+async def process_founders_async(concurrency: int):
+    """
+    Process founders with up to `concurrency` lookups in flight.
+
+    Items are claimed from the queue in row order and their results are
+    committed in that same order, so the journal reads as it would after a
+    sequential run.
+    """
+    queue = open_queue()
+    journal = open_journal()
+
+    # The blocking tool calls run in the default executor, size it to match
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=concurrency))
+
+    # Build the shared engine up front rather than inside the first task
+    engine = get_engine()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_async_lookup(item, person):
+        async with semaphore:
+            print(f"\nProcessing founder: {person.name}")
+            try:
+                with get_tracer().founder(person.name, item["attempts"]):
+                    return await engine.alookup(**lookup_args(person))
+            except Exception as e:
+                return {"error": str(e), "transient": is_transient_error(e)}
+
+    # Claimed but not yet committed items, oldest first. Bounding the window
+    # keeps memory flat while still letting later rows run ahead.
+    window = deque()
+    in_window = set()
+
+    async def commit_oldest():
+        item, task = window.popleft()
+        if task is None:
+            # Same person as an earlier row in the window, now committed
+            if not skip_if_resolved(item, queue):
+                queue.release(item["row"])
+            return
+        result = await task
+        in_window.discard(item["person_key"])
+        commit_result(item, person_for(item, queue), result, queue, journal)
+
+    while True:
+        items = queue.claim(limit=concurrency * 2 - len(window))
+        if not items and not window:
+            if wait_for_retries(queue):
+                continue
+            break
+
+        for item in items:
+            if skip_if_resolved(item, queue):
+                continue
+            if item["person_key"] in in_window:
+                window.append((item, None))
+            else:
+                in_window.add(item["person_key"])
+                person = person_for(item, queue)
+                window.append((item, asyncio.create_task(run_async_lookup(item, person))))
+
+        if window:
+            await commit_oldest()
+
+    journal.close()
+    queue.close()
+
+def release_unbatched():
+    """
+    Return rows parked for a batch back to pending if they never reached its manifest
+
+    Requests reach the manifest before their rows are parked, so only rows
+    parked for a batch whose files were lost or removed end up here. They
+    would otherwise never be claimed or ingested again.
+    """
+    rows, person_keys = ExtractionBatch(BATCH_FILE).manifest_keys()
+    queue = WorkQueue(QUEUE_DB)
+    released = queue.release_deferred(rows, person_keys)
+    queue.close()
+    if released:
+        print(f"Returned {released} rows missing from the batch manifest to the queue")
+
+def ingest_batch(poll_interval: float):
+    """Submit the prepared extraction batch, wait for it and store its results"""
+    batch = ExtractionBatch(BATCH_FILE)
+    if not batch.prepared():
+        print(f"No prepared batch at {BATCH_FILE}, run with --batch-prepare first")
+        return
+    batch.submit()
+    batch.wait(poll_interval=poll_interval)
+
+    queue = open_queue()
+    journal = open_journal()
+    for meta, result in batch.results():
+        item = queue.item(meta["row"])
+        # Rows settled since, e.g. by an earlier, interrupted ingest
+        if item is None or item["state"] != AWAITING_BATCH:
             continue
+        commit_result(item, person_for(item, queue), result, queue, journal)
+    journal.close()
+    queue.close()
+    print(batch.summary())
+    batch.clear()
 
-        print(f"\nProcessing founder: {founder_name}")
-        
-        # Call Wikipedia lookup agent with enhanced description
-        description = f"{row['Title']} at {row['Company Founded']}"
-        if row['Description']:  # Add description if it exists
-            description += f". {row['Description']}"
-        if row['Company Founded']:  # Add company info if it exists
-            description += f". Company: {row['Company Founded']}"
-        
-        result = lookup(
-            name=founder_name,
-            description=description
-        )
-
-        # Only store if there's a match
-        if isinstance(result, dict) and not result.get("error"):
-            if result.get("match") is False:
-                print(f"✗ No Wikipedia match for {founder_name}: {result.get('reason', 'No reason provided')}")
+def refresh_profiles(concurrency: int) -> dict:
+    """
+    Bring matched profiles up to date with their Wikipedia articles
+
+    Current revisions of every matched page are fetched in batched requests,
+    by page id where the profile has one so pages reached through a
+    disambiguation page or since moved are still found, and only profiles
+    whose page has a new revision are extracted again. Profiles stored before revisions were
+    tracked are stamped with the current revision without a model call.
+    A page that now fails to match keeps its old profile.
+
+    Returns:
+        dict: Profile counts by outcome
+    """
+    # name -> (row, page id or title, pageid, revid) of each founder's newest result
+    profiles = {}
+    for record in iter_records(RESULTS_JOURNAL):
+        result = record["result"]
+        page = result.get("pageid") or result.get("page_title") or title_from_url(result.get("source_url") or "")
+        profiles[record["founder_name"]] = (record.get("row"), page, result.get("pageid"), result.get("revid"))
+    pages = {}
+    for name, (_, page, _, _) in profiles.items():
+        pages.setdefault(page, []).append(name)
+
+    counts = {"unchanged": 0, "refreshed": 0, "stamped": 0, "unmatched": 0, "missing": 0, "failed": 0}
+    # Results without a source page cannot be checked
+    counts["missing"] += len(pages.pop("", []))
+    pageids = [page for page in pages if isinstance(page, int)]
+    titles = [page for page in pages if not isinstance(page, int)]
+    revisions = get_client().fetch_revisions(titles, pageids)
+    changed, stamp = [], {}
+    for page, names in pages.items():
+        current = revisions.get(page)
+        if current is None or current["disambiguation"]:
+            counts["missing"] += len(names)
+            label = f"Page {page}" if isinstance(page, int) else page
+            print(f"✗ {label} is gone or now a disambiguation page, keeping the profile of {', '.join(names)}")
+            continue
+        stale = []
+        for name in names:
+            _, _, pageid, revid = profiles[name]
+            if revid is None:
+                stamp[name] = current
+            elif (pageid, revid) == (current["pageid"], current["revid"]):
+                counts["unchanged"] += 1
             else:
-                # Store the raw result only if it's a match
-                wiki_data[founder_name] = result
-                save_wiki_data(wiki_data)
-                print(f"✓ Stored Wikipedia data for {founder_name}")
-        else:
-            print(f"✗ Error processing {founder_name}: {result.get('error', 'Unknown error')}")
-        
-        # Update tracker
-        processed_founders.add(founder_name)
-        tracker["processed_founders"] = list(processed_founders)
-        tracker["last_processed_row"] = idx + 1
-        save_tracker(tracker)
+                stale.append(name)
+        if stale:
+            changed.append((stale, current))
+    requests = -(-len(titles) // MAX_TITLES) + -(-len(pageids) // MAX_TITLES)
+    print(f"Checked {len(pages)} pages in {requests} revision requests, "
+          f"{len(changed)} changed since their profiles were extracted")
+
+    queue = open_queue()
+    journal = open_journal()
+    engine = get_engine()
+
+    def refresh_args(names):
+        row = profiles[names[0]][0]
+        item = queue.item(row) if row is not None else None
+        if item is None:
+            # Results seeded from an older JSON output have no input row
+            return {"name": names[0], "description": ""}
+        return lookup_args(person_for(item, queue))
+
+    def refresh(job):
+        _, current, args = job
+        try:
+            with get_tracer().founder(args["name"]):
+                return engine.refresh(wiki_url=url_from_title(current["title"]), revid=current["revid"], **args)
+        except Exception as e:
+            return {"error": str(e), "transient": is_transient_error(e)}
+
+    # Input rows are read here, the queue connection belongs to this thread
+    jobs = [(names, current, refresh_args(names)) for names, current in changed]
+    with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as executor:
+        for (names, current, _), result in zip(jobs, executor.map(refresh, jobs)):
+            if result.get("error"):
+                counts["failed"] += len(names)
+                print(f"✗ Error refreshing {names[0]}: {result['error']}")
+            elif result.get("match") is False:
+                counts["unmatched"] += len(names)
+                print(f"✗ {current['title']} no longer matches {names[0]}, keeping the old profile")
+            else:
+                for name in names:
+                    journal.append(name, result, row=profiles[name][0])
+                counts["refreshed"] += len(names)
+                print(f"✓ Refreshed {names[0]} from revision {current['revid']}")
+
+    for name, result in iter_latest(RESULTS_JOURNAL):
+        if name in stamp:
+            journal.append(name, {**result, "pageid": stamp[name]["pageid"], "revid": stamp[name]["revid"]},
+                           row=profiles[name][0])
+            counts["stamped"] += 1
+    journal.close()
+    queue.close()
+
+    print(f"Refresh: {counts['unchanged']} profiles unchanged and skipped, {counts['refreshed']} re-extracted, "
+          f"{counts['stamped']} stamped with their current revision, {counts['unmatched']} no longer matching, "
+          f"{counts['missing']} with a missing page, {counts['failed']} failed")
+    if counts["refreshed"] or counts["stamped"]:
+        print(f"Rebuild {os.path.basename(OUTPUT_JSON)} with --compact")
+    return counts
 
 if __name__ == "__main__":
-    process_founders()
+    parser = argparse.ArgumentParser(description="Enrich founders with Wikipedia data")
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="Number of founders to look up at once (default: 1, sequential)")
+    parser.add_argument("--cache-mode", choices=CACHE_MODES, default="read-write",
+                        help="How to use the on-disk response cache (default: read-write)")
+    parser.add_argument("--compact", action="store_true",
+                        help=f"Rebuild {os.path.basename(OUTPUT_JSON)} from the results journal and exit")
+    parser.add_argument("--status", action="store_true",
+                        help="Summarize the work queue (states, throughput, failures) and exit")
+    parser.add_argument("--accept-threshold", type=float, default=0.75,
+                        help="Pre-verifier score at or above which a page is a match without the LLM")
+    parser.add_argument("--reject-threshold", type=float, default=0.3,
+                        help="Pre-verifier score at or below which a page is a mismatch without the LLM")
+    parser.add_argument("--no-pre-verify", action="store_true",
+                        help="Leave every match decision to the model")
+    parser.add_argument("--token-budget", type=int, default=4000,
+                        help="Maximum article tokens sent to the extraction step, 0 sends the whole article")
+    parser.add_argument("--trace", default=TRACE_FILE,
+                        help="JSONL file receiving one record per pipeline stage of every lookup")
+    parser.add_argument("--metrics", default=METRICS_FILE,
+                        help="Prometheus text snapshot of per-stage totals, rewritten every 30s")
+    parser.add_argument("--verbose", action="store_true",
+                        help="Print the model's match decision and confidence for every page")
+    parser.add_argument("--shard", type=parse_shard, metavar="i/N",
+                        help="Process only shard i of N, with its own work queue and results journal")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Split the input into N shards, run each in its own process, then merge")
+    parser.add_argument("--merge", type=int, metavar="N",
+                        help="Merge the results of an N-way sharded run and exit")
+    parser.add_argument("--batch-prepare", action="store_true",
+                        help="Search and fetch pages only, writing the model prompts to a Batch API file")
+    parser.add_argument("--batch-submit", action="store_true",
+                        help="Submit the prepared batch, wait for it, ingest the results and exit")
+    parser.add_argument("--poll-interval", type=float, default=60,
+                        help="Seconds between batch status checks (default: 60)")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Re-extract only the matched profiles whose Wikipedia article changed since")
+    parser.add_argument("--local-model", metavar="MODEL",
+                        help="Try verify-and-extract on this Ollama model first, e.g. llama3.1:8b")
+    parser.add_argument("--local-max-tokens", type=int, default=3000,
+                        help="Longest prompt, in tokens, sent to the local model (default: 3000)")
+    parser.add_argument("--min-confidence", type=float, default=0.8,
+                        help="Local answers below this confidence are escalated to the remote model")
+    parser.add_argument("--audit-rate", type=float, default=0.0,
+                        help="Share of kept local answers also sent to the remote model to measure agreement")
+    args = parser.parse_args()
+
+    if (args.batch_prepare or args.batch_submit) and (args.shard or args.workers > 1):
+        parser.error("batch mode runs unsharded")
+    if args.refresh and (args.shard or args.workers > 1 or args.batch_prepare or args.batch_submit):
+        parser.error("--refresh runs unsharded and without the Batch API")
+    if args.local_model and args.batch_prepare:
+        parser.error("--local-model does not apply to batch mode, which defers every model call")
+
+    if args.batch_submit:
+        ingest_batch(args.poll_interval)
+        raise SystemExit(0)
+
+    if args.compact:
+        compact_wiki_data()
+        raise SystemExit(0)
+
+    if args.status:
+        if args.shard:
+            use_shard(args.shard)
+        queue = WorkQueue(QUEUE_DB)
+        print(queue.status())
+        raise SystemExit(0)
+
+    if args.merge:
+        merge_shards(args.merge, RESULTS_JOURNAL, QUEUE_DB, OUTPUT_JSON)
+        raise SystemExit(0)
+
+    if args.workers > 1:
+        seed_from_json(RESULTS_JOURNAL, OUTPUT_JSON)
+        # Import a legacy tracker into the main queue before shards copy it
+        open_queue().close()
+        forwarded = [
+            "--concurrency", str(args.concurrency),
+            "--cache-mode", args.cache_mode,
+            "--accept-threshold", str(args.accept_threshold),
+            "--reject-threshold", str(args.reject_threshold),
+            "--token-budget", str(args.token_budget),
+        ]
+        if args.local_model:
+            forwarded += [
+                "--local-model", args.local_model,
+                "--local-max-tokens", str(args.local_max_tokens),
+                "--min-confidence", str(args.min_confidence),
+                "--audit-rate", str(args.audit_rate),
+            ]
+        if args.no_pre_verify:
+            forwarded.append("--no-pre-verify")
+        if args.verbose:
+            forwarded.append("--verbose")
+        failed = run_workers(args.workers, os.path.abspath(__file__), forwarded)
+        if failed:
+            print(f"Not merging, {failed} shard(s) failed. Re-run to resume them, then merge with --merge {args.workers}")
+            raise SystemExit(1)
+        merge_shards(args.workers, RESULTS_JOURNAL, QUEUE_DB, OUTPUT_JSON)
+        raise SystemExit(0)
+
+    if args.shard:
+        use_shard(args.shard)
+        # Shards write their own trace and metrics unless given explicit paths
+        if args.trace == parser.get_default("trace"):
+            args.trace = TRACE_FILE
+        if args.metrics == parser.get_default("metrics"):
+            args.metrics = METRICS_FILE
+
+    tracer = configure_tracer(trace_path=args.trace, metrics_path=args.metrics)
+    cache = configure_cache(mode=args.cache_mode)
+    pre_verifier = None if args.no_pre_verify else PreVerifier(
+        accept_threshold=args.accept_threshold,
+        reject_threshold=args.reject_threshold
+    )
+    section_selector = SectionSelector(args.token_budget) if args.token_budget > 0 else None
+    router = ModelRouter(
+        model=args.local_model,
+        max_prompt_tokens=args.local_max_tokens,
+        min_confidence=args.min_confidence,
+        audit_rate=args.audit_rate
+    ) if args.local_model else None
+    engine = configure_engine(pre_verifier=pre_verifier, section_selector=section_selector,
+                              verbose=args.verbose, defer_extraction=args.batch_prepare, router=router)
+    if args.batch_prepare:
+        BATCH = ExtractionBatch(BATCH_FILE, model=engine.model_name, temperature=engine.llm.temperature)
+        if BATCH.submitted():
+            print("A submitted batch is waiting to be ingested, run --batch-submit first")
+            raise SystemExit(1)
+
+    if not args.shard and os.path.exists(QUEUE_DB):
+        release_unbatched()
+
+    try:
+        if args.refresh:
+            refresh_profiles(args.concurrency)
+        elif args.concurrency > 1:
+            asyncio.run(process_founders_async(args.concurrency))
+        else:
+            process_founders()
+    finally:
+        if BATCH is not None:
+            BATCH.close()
+
+    if BATCH is not None:
+        print(f"Wrote {BATCH.added} extraction requests next to {BATCH_FILE}, submit them with --batch-submit")
+    tracer.close()
+    print(tracer.summary())
+    print(limits_summary())
+    print(cache.summary())
+    if pre_verifier is not None:
+        print(pre_verifier.summary())
+    if section_selector is not None:
+        print(section_selector.summary())
+    if router is not None:
+        print(router.summary())
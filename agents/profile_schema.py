@@ -0,0 +1,109 @@
+import json
+from typing import List, Optional, Union
+
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+
+
+class _Schema(BaseModel):
+    # Models write years and counts as numbers about as often as strings
+    model_config = ConfigDict(coerce_numbers_to_str=True)
+
+
+class Education(_Schema):
+    degree: Optional[str] = ""
+    institution: Optional[str] = ""
+    field: Optional[str] = ""
+
+
+class Role(_Schema):
+    title: Optional[str] = ""
+    duration: Optional[str] = ""
+    description: Optional[str] = ""
+    responsibilities: List[str] = []
+    achievements: List[str] = []
+
+
+class Experience(_Schema):
+    company: Optional[str] = ""
+    roles: List[Role] = []
+
+
+class CurrentRole(_Schema):
+    title: Optional[str] = ""
+    company: Optional[str] = ""
+    description: Optional[str] = ""
+    duration: Optional[str] = ""
+    achievements: List[str] = []
+
+
+class Career(_Schema):
+    current_role: CurrentRole = Field(default_factory=CurrentRole)
+    experience: List[Experience] = []
+    total_years_experience: Optional[str] = ""
+
+
+class FounderProfile(_Schema):
+    """The career and education profile extracted from a matching page"""
+    short_description: str
+    # Founders with several degrees come back as a list
+    education: Union[Education, List[Education]] = Field(default_factory=Education)
+    career: Career
+
+
+class LookupDecision(_Schema):
+    """Whether a Wikipedia page is about the founder and, if it is, their profile"""
+    match: bool
+    confidence: float = Field(ge=0, le=1)
+    profile: Optional[FounderProfile] = None
+
+    @model_validator(mode="after")
+    def _profile_for_match(self):
+        if self.match and self.profile is None:
+            raise ValueError("profile is required when match is true")
+        return self
+
+
+def strip_fences(content: str) -> str:
+    """Drop a ```json fence around a model response"""
+    content = content.strip()
+    if content.startswith("```") and content.endswith("```"):
+        content = content.split("```")[1]
+        if content.startswith("json\n"):
+            content = content[5:]
+    return content
+
+
+def parse_decision(content: str) -> LookupDecision:
+    """
+    Parse and validate a verify-and-extract response
+
+    Raises:
+        ValueError: If the output is not JSON or does not match LookupDecision
+    """
+    return LookupDecision.model_validate(json.loads(strip_fences(content)))
+
+
+def decision_result(decision: LookupDecision, source_url: str, pre_verified: bool = False,
+                    page: dict = None) -> dict:
+    """
+    The lookup result for a decision: the profile for a match, else a no-match
+
+    Args:
+        pre_verified (bool): The pre-verifier already matched the page, so any
+            profile the model returned is kept even if it was unsure
+        page (dict): The page the profile was extracted from; its title, pageid
+            and revid are stored with the profile so a refresh can tell if it
+            changed, even when source_url led to a disambiguation page
+    """
+    if decision.profile is not None and (decision.match or pre_verified):
+        profile = decision.profile.model_dump()
+        profile["source_url"] = source_url
+        if page is not None and page.get("revid") is not None:
+            profile["page_title"] = page.get("title")
+            profile["pageid"] = page.get("pageid")
+            profile["revid"] = page["revid"]
+        return profile
+    return {
+        "match": False,
+        "reason": f"Wikipedia page does not match the person (confidence {decision.confidence:.2f})"
+    }
@@ -0,0 +1,261 @@
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+from tracing import record_retry
+
+# Sustainable defaults per provider. Override any of them with RATE_LIMITS, a
+# JSON object like {"openai": {"tokens_per_minute": 2000000}}.
+DEFAULT_LIMITS = {
+    "openai": {"requests_per_minute": 500, "tokens_per_minute": 200000, "max_concurrency": 16},
+    "tavily": {"requests_per_minute": 300, "max_concurrency": 8},
+    # Wikipedia asks API clients to keep to a modest, mostly serial request rate
+    "wikipedia": {"requests_per_minute": 1200, "max_concurrency": 4},
+    # A local Ollama model has no quota, only as many parallel requests as the host serves
+    "ollama": {"requests_per_minute": 6000, "max_concurrency": 4},
+}
+
+# Statuses that mean the provider wants us to slow down
+OVERLOAD_STATUSES = {429, 503, 529}
+
+
+def _status_of(error: Exception):
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status
+
+
+def retry_after(error: Exception):
+    """Seconds the provider asked us to wait, from Retry-After or retry-after-ms, or None"""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+class TokenBucket:
+    """Refills at `rate` per second up to `capacity`; not thread-safe on its own"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` is available, 0 if it is now"""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+    def take(self, amount: float):
+        self.tokens -= min(amount, self.capacity)
+
+    def give(self, amount: float):
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+    def drain(self):
+        self.tokens = min(self.tokens, 0.0)
+
+
+class ProviderLimiter:
+    """
+    Request and token buckets plus an adaptive concurrency limit for one provider.
+
+    Concurrency follows AIMD: every success raises the limit by 1/limit (about
+    one more slot per round of calls), while a 429 or overload response halves
+    it and pauses the provider for its Retry-After. Rate-limited calls are
+    retried here; other errors go back to the caller.
+    """
+
+    def __init__(self, name: str, requests_per_minute: float, tokens_per_minute: float = None,
+                 max_concurrency: int = 8, min_concurrency: int = 1, max_retries: int = 4,
+                 base_backoff: float = 1.0):
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute / 60, max(1.0, requests_per_minute / 60))
+        self.tokens = TokenBucket(tokens_per_minute / 60, tokens_per_minute / 6) if tokens_per_minute else None
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.limit = float(max(min_concurrency, max_concurrency // 2))
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.stats = {"calls": 0, "rate_limited": 0, "wait_seconds": 0.0, "min_limit": self.limit}
+        self._lock = threading.Lock()
+
+    def _try_acquire(self, requests: int, tokens: int) -> float:
+        """Take a slot and budget if available, else return how long to wait"""
+        with self._lock:
+            now = time.monotonic()
+            waits = [self.paused_until - now]
+            if self.in_flight >= int(self.limit):
+                waits.append(0.05)
+            waits.append(self.requests.wait_time(requests, now))
+            if self.tokens is not None:
+                waits.append(self.tokens.wait_time(tokens, now))
+            wait = max(waits)
+            if wait > 0:
+                return wait
+            self.in_flight += 1
+            self.requests.take(requests)
+            if self.tokens is not None:
+                self.tokens.take(tokens)
+            return 0.0
+
+    def acquire(self, requests: int = 1, tokens: int = 0):
+        waited = 0.0
+        while True:
+            wait = self._try_acquire(requests, tokens)
+            if wait <= 0:
+                break
+            time.sleep(min(wait, 1.0))
+            waited += min(wait, 1.0)
+        with self._lock:
+            self.stats["wait_seconds"] += waited
+
+    async def aacquire(self, requests: int = 1, tokens: int = 0):
+        waited = 0.0
+        while True:
+            wait = self._try_acquire(requests, tokens)
+            if wait <= 0:
+                break
+            await asyncio.sleep(min(wait, 1.0))
+            waited += min(wait, 1.0)
+        with self._lock:
+            self.stats["wait_seconds"] += waited
+
+    def release(self, error: Exception = None, tokens_charged: int = 0, tokens_used: int = None) -> float:
+        """
+        Return the slot and adjust the limit after a call
+
+        Returns:
+            float: Seconds to wait before retrying, or -1 if the call should not be retried
+        """
+        with self._lock:
+            self.in_flight -= 1
+            self.stats["calls"] += 1
+            if self.tokens is not None and tokens_used is not None:
+                # Settle the estimate against what the call actually used
+                if tokens_used < tokens_charged:
+                    self.tokens.give(tokens_charged - tokens_used)
+                else:
+                    self.tokens.take(tokens_used - tokens_charged)
+
+            if error is None:
+                self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+                return -1
+            if _status_of(error) not in OVERLOAD_STATUSES:
+                return -1
+
+            self.stats["rate_limited"] += 1
+            self.limit = max(self.min_concurrency, self.limit / 2)
+            self.stats["min_limit"] = min(self.stats["min_limit"], self.limit)
+            wait = retry_after(error)
+            if wait is None:
+                wait = self.base_backoff * random.uniform(1, 2)
+            # Everyone waits, not just this caller, so a 429 does not turn into a storm
+            self.paused_until = max(self.paused_until, time.monotonic() + wait)
+            self.requests.drain()
+            return wait
+
+    def call(self, fn, *args, requests: int = 1, tokens: int = 0, settle=None, **kwargs):
+        """
+        Run fn under this provider's limits, retrying when rate limited
+
+        Args:
+            requests (int): Requests the call makes
+            tokens (int): Estimated LLM tokens the call uses
+            settle: Optional fn(result) -> actual tokens used, to correct the estimate
+        """
+        for attempt in range(self.max_retries + 1):
+            self.acquire(requests, tokens)
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                wait = self.release(e, tokens)
+                if wait < 0 or attempt == self.max_retries:
+                    raise
+                record_retry()
+                continue
+            self.release(None, tokens, settle(result) if settle else None)
+            return result
+
+    async def acall(self, fn, *args, requests: int = 1, tokens: int = 0, settle=None, **kwargs):
+        """Async version of call(); fn returns an awaitable"""
+        for attempt in range(self.max_retries + 1):
+            await self.aacquire(requests, tokens)
+            try:
+                result = await fn(*args, **kwargs)
+            except Exception as e:
+                wait = self.release(e, tokens)
+                if wait < 0 or attempt == self.max_retries:
+                    raise
+                record_retry()
+                continue
+            self.release(None, tokens, settle(result) if settle else None)
+            return result
+
+    def summary(self) -> str:
+        return (
+            f"{self.name}: {self.stats['calls']} calls, {self.stats['rate_limited']} rate limited, "
+            f"{self.stats['wait_seconds']:.1f}s throttled, concurrency limit {self.limit:.1f} "
+            f"(low {self.stats['min_limit']:.1f}, max {self.max_concurrency})"
+        )
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def _build_limiters(limits: dict = None) -> dict:
+    overrides = json.loads(os.getenv("RATE_LIMITS", "{}"))
+    merged = {}
+    for provider in set(DEFAULT_LIMITS) | set(overrides) | set(limits or {}):
+        merged[provider] = {
+            **DEFAULT_LIMITS.get(provider, {"requests_per_minute": 600}),
+            **overrides.get(provider, {}),
+            **(limits or {}).get(provider, {}),
+        }
+    return {provider: ProviderLimiter(provider, **config) for provider, config in merged.items()}
+
+def configure_limits(limits: dict = None) -> dict:
+    """Rebuild the per-provider limiters from the defaults, RATE_LIMITS and `limits`"""
+    global _limiters
+    limiters = _build_limiters(limits)
+    with _limiters_lock:
+        _limiters = limiters
+    return limiters
+
+def get_limiter(provider: str) -> ProviderLimiter:
+    """The shared limiter for a provider, built with the default limits on first use"""
+    global _limiters
+    with _limiters_lock:
+        if not _limiters:
+            _limiters = _build_limiters()
+        return _limiters[provider]
+
+def limits_summary() -> str:
+    """One line per provider: calls, 429s, time spent throttled and the concurrency limit"""
+    return "Rate limits:\n" + "\n".join(f"  {limiter.summary()}" for limiter in _limiters.values())
@@ -0,0 +1,238 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+from urllib.parse import unquote
+
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+
+CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "responses.sqlite")
+
+# read-write: serve hits and store misses
+# read-only:  serve hits, never write (safe for shared/frozen caches)
+# refresh:    ignore existing entries and overwrite them with fresh responses
+# off:        bypass the cache entirely
+CACHE_MODES = ("read-write", "read-only", "refresh", "off")
+
+# Seconds an entry stays valid per source, None means it never expires
+DEFAULT_TTLS = {
+    "tavily": 7 * 24 * 3600,
+    "wikipedia_page": 7 * 24 * 3600,
+    "llm": None,
+}
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace and case so equivalent queries share an entry"""
+    return " ".join(text.split()).casefold()
+
+
+def normalize_title(url_or_title: str) -> str:
+    """Reduce a Wikipedia URL or title to its canonical page title"""
+    title = url_or_title.split("/wiki/")[-1].split("#")[0]
+    title = unquote(title).replace("_", " ").strip()
+    return title[:1].upper() + title[1:]
+
+
+class ResponseCache:
+    """
+    Content-addressed SQLite cache for external responses.
+
+    Entries are keyed by a hash of the source and the normalized request, have
+    a per-source TTL and are evicted least-recently-used once the stored
+    values exceed max_bytes. The stored size is kept in the database and
+    updated in the same transaction as each write, so processes sharing one
+    cache file all evict against the same total.
+    """
+
+    def __init__(self, path: str = CACHE_FILE, mode: str = "read-write",
+                 ttls: Optional[dict] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode {mode!r}, expected one of {CACHE_MODES}")
+        self.path = path
+        self.mode = mode
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.max_bytes = max_bytes
+        self.stats = {}
+        self._lock = threading.Lock()
+        self._conn = None
+        if mode != "off":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    source TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )"""
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS totals (id INTEGER PRIMARY KEY CHECK (id = 0), bytes INTEGER NOT NULL)"
+            )
+            # Caches from before the totals table start from their current size
+            self._conn.execute(
+                "INSERT OR IGNORE INTO totals (id, bytes) SELECT 0, COALESCE(SUM(size), 0) FROM entries"
+            )
+            self._conn.commit()
+
+    @property
+    def _total_bytes(self) -> int:
+        """Size of the stored values, across every process using the cache file"""
+        return self._conn.execute("SELECT bytes FROM totals WHERE id = 0").fetchone()[0]
+
+    @staticmethod
+    def make_key(source: str, request: Any) -> str:
+        """Hash a source and a JSON-serializable request into a cache key"""
+        payload = json.dumps([source, request], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _count(self, source: str, field: str):
+        counters = self.stats.setdefault(source, {"hits": 0, "misses": 0, "writes": 0, "evictions": 0})
+        counters[field] += 1
+
+    def get(self, source: str, request: Any) -> Optional[str]:
+        """Return the cached value for a request, or None on a miss"""
+        if self.mode in ("off", "refresh"):
+            return None
+        key = self.make_key(source, request)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            ttl = self.ttls.get(source)
+            if row is None or (ttl is not None and now - row[1] > ttl):
+                self._count(source, "misses")
+                return None
+            if self.mode == "read-write":
+                self._conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+                self._conn.commit()
+            self._count(source, "hits")
+            return row[0]
+
+    def set(self, source: str, request: Any, value: str):
+        """Store a value for a request, evicting old entries if over budget"""
+        if self.mode in ("off", "read-only"):
+            return
+        key = self.make_key(source, request)
+        size = len(value.encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            # Hold the write lock from reading the old size to the commit
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                old = self._conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, source, value, size, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, source, value, size, now, now)
+                )
+                self._conn.execute("UPDATE totals SET bytes = bytes + ? WHERE id = 0",
+                                   (size - (old[0] if old else 0),))
+                self._count(source, "writes")
+                self._evict()
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits max_bytes"""
+        total = self._total_bytes
+        while total > self.max_bytes:
+            victims = self._conn.execute(
+                "SELECT key, source, size FROM entries ORDER BY accessed_at LIMIT 64"
+            ).fetchall()
+            if not victims:
+                break
+            for key, source, size in victims:
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._conn.execute("UPDATE totals SET bytes = bytes - ? WHERE id = 0", (size,))
+                total -= size
+                self._count(source, "evictions")
+                if total <= self.max_bytes:
+                    break
+
+    def get_json(self, source: str, request: Any) -> Optional[Any]:
+        value = self.get(source, request)
+        return json.loads(value) if value is not None else None
+
+    def set_json(self, source: str, request: Any, value: Any):
+        self.set(source, request, json.dumps(value, ensure_ascii=False))
+
+    def summary(self) -> str:
+        """Human readable hit/miss counters per source"""
+        if self.mode == "off":
+            return "Response cache: off"
+        lines = [f"Response cache ({self.mode}, {self._total_bytes / 1024 / 1024:.1f} MB):"]
+        for source, counters in sorted(self.stats.items()):
+            lookups = counters["hits"] + counters["misses"]
+            rate = counters["hits"] / lookups * 100 if lookups else 0
+            lines.append(
+                f"  {source}: {counters['hits']} hits, {counters['misses']} misses ({rate:.0f}% hit rate), "
+                f"{counters['writes']} writes, {counters['evictions']} evictions"
+            )
+        return "\n".join(lines)
+
+
+class LLMResponseCache(BaseCache):
+    """
+    LangChain cache adapter so every chat model call, repair calls included,
+    is served from the ResponseCache. LangChain's llm_string already encodes
+    the model name, temperature and response format.
+    """
+
+    def __init__(self, cache: ResponseCache):
+        self.cache = cache
+
+    def lookup(self, prompt: str, llm_string: str):
+        value = self.cache.get("llm", {"prompt": hashlib.sha256(prompt.encode("utf-8")).hexdigest(),
+                                       "llm": llm_string})
+        if value is None:
+            return None
+        generations = loads(value)
+        for generation in generations:
+            # A cache hit spends no tokens, so it must not report the original call's usage
+            message = getattr(generation, "message", None)
+            if message is not None and getattr(message, "usage_metadata", None):
+                message.usage_metadata = None
+        return generations
+
+    def update(self, prompt: str, llm_string: str, return_val):
+        self.cache.set("llm", {"prompt": hashlib.sha256(prompt.encode("utf-8")).hexdigest(),
+                               "llm": llm_string}, dumps(return_val))
+
+    def clear(self, **kwargs):
+        with self.cache._lock:
+            self.cache._conn.execute("DELETE FROM entries WHERE source = 'llm'")
+            self.cache._conn.execute("UPDATE totals SET bytes = (SELECT COALESCE(SUM(size), 0) FROM entries)")
+            self.cache._conn.commit()
+
+
+_cache = None
+
+def configure_cache(mode: str = "read-write", path: str = CACHE_FILE, **kwargs) -> ResponseCache:
+    """Create the process-wide cache and route LangChain model calls through it"""
+    from langchain_core.globals import set_llm_cache
+
+    global _cache
+    _cache = ResponseCache(path=path, mode=mode, **kwargs)
+    set_llm_cache(LLMResponseCache(_cache) if mode != "off" else None)
+    return _cache
+
+def get_cache() -> ResponseCache:
+    """Return the process-wide cache, configuring the default on first use"""
+    if _cache is None:
+        configure_cache()
+    return _cache
@@ -0,0 +1,115 @@
+import json
+import os
+
+
+class ResultJournal:
+    """
+    Append-only JSONL log of lookup results.
+
+    Each matched founder is written as one line and fsync'd before the tracker
+    moves on, so a crash can at worst leave a partial last line, which is
+    dropped on the next open. The JSON file consumers expect is produced by
+    compact().
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._repair_tail()
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def _repair_tail(self):
+        """Truncate a partially written last record left by a crash"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb+') as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            if size == 0:
+                return
+            f.seek(size - 1)
+            if f.read(1) == b"\n":
+                return
+            # Walk back to the end of the last complete line
+            pos = size - 1
+            while pos > 0:
+                step = min(4096, pos)
+                f.seek(pos - step)
+                chunk = f.read(step)
+                newline = chunk.rfind(b"\n")
+                if newline != -1:
+                    pos = pos - step + newline + 1
+                    break
+                pos -= step
+            f.truncate(pos)
+
+    def append(self, founder_name: str, result: dict, row: int = None):
+        """Durably append one founder's result"""
+        record = {"founder_name": founder_name, "row": row, "result": result}
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def iter_records(path: str):
+    """Yield journal records in write order, skipping an unreadable tail"""
+    if not os.path.exists(path):
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                # Only the last line can be partial, anything after it is gone
+                break
+
+
+def iter_latest(path: str):
+    """
+    Yield (founder_name, result) once per founder, keeping the newest record.
+
+    Uses two streaming passes, so memory only grows with the number of
+    distinct founders, not with the size of the results.
+    """
+    latest = {}
+    for line_no, record in enumerate(iter_records(path)):
+        latest[record["founder_name"]] = line_no
+    for line_no, record in enumerate(iter_records(path)):
+        if latest.get(record["founder_name"]) == line_no:
+            yield record["founder_name"], record["result"]
+
+
+def compact(journal_path: str, output_json: str) -> int:
+    """
+    Write the journal out in the founders_wiki_data.json shape
+
+    Returns:
+        int: Number of founders written
+    """
+    wiki_data = dict(iter_latest(journal_path))
+    tmp_file = output_json + ".tmp"
+    with open(tmp_file, 'w') as f:
+        json.dump(wiki_data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, output_json)
+    return len(wiki_data)
+
+
+def seed_from_json(journal_path: str, output_json: str):
+    """Start a journal from an existing founders_wiki_data.json"""
+    if os.path.exists(journal_path) or not os.path.exists(output_json):
+        return
+    with open(output_json, 'r') as f:
+        wiki_data = json.load(f)
+    with ResultJournal(journal_path) as journal:
+        for founder_name, result in wiki_data.items():
+            journal.append(founder_name, result)
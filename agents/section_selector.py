@@ -0,0 +1,152 @@
+import threading
+
+from wiki_client import HEADING_RE
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("o200k_base")
+except Exception:  # tiktoken missing or its encoding files unavailable offline
+    _encoding = None
+
+# Section title keywords and how much they matter to the extraction schema
+SECTION_WEIGHTS = {
+    "career": 5, "business": 5, "founding": 5, "founder": 5, "entrepreneur": 5,
+    "professional": 4, "work": 3, "company": 4, "companies": 4, "ventures": 4,
+    "education": 5, "early life": 4, "life and education": 5, "background": 3,
+    "biography": 3, "investments": 2, "awards": 2, "honors": 2, "recognition": 2,
+}
+
+# Sections the career/education schema never uses
+SKIPPED_SECTIONS = {
+    "references", "see also", "external links", "notes", "further reading",
+    "bibliography", "sources", "citations", "footnotes", "filmography",
+    "discography", "gallery",
+}
+
+LOW_VALUE_SECTIONS = {"personal life", "philanthropy", "political views", "controversies", "legacy", "in popular culture"}
+
+
+def count_tokens(text: str) -> int:
+    """Token count with tiktoken when available, otherwise ~4 chars per token"""
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+def split_sections(content: str) -> list:
+    """
+    Split a plain-text extract into (title, heading, body) sections
+
+    The lead section comes first with the title "Introduction" and no heading.
+    Subsections are kept as their own entries.
+    """
+    sections = []
+    matches = list(HEADING_RE.finditer(content))
+    lead_end = matches[0].start() if matches else len(content)
+    sections.append(("Introduction", "", content[:lead_end].strip()))
+    for idx, match in enumerate(matches):
+        end = matches[idx + 1].start() if idx + 1 < len(matches) else len(content)
+        sections.append((match.group(2), match.group(0), content[match.end():end].strip()))
+    return sections
+
+
+class SectionSelector:
+    """
+    Pack the most schema-relevant article sections into a token budget.
+
+    The lead is always kept. Other sections are ranked by how their title
+    relates to the career/education schema and by mentions of the founder's
+    companies, then added best first until the budget is spent and finally
+    emitted in article order.
+    """
+
+    def __init__(self, token_budget: int = 4000):
+        self.token_budget = token_budget
+        self.tokens_before = 0
+        self.tokens_after = 0
+        self._lock = threading.Lock()
+
+    def _record(self, before: int, after: int):
+        with self._lock:
+            self.tokens_before += before
+            self.tokens_after += after
+
+    def _score(self, title: str, body: str, companies: list) -> float:
+        lowered = title.lower()
+        if lowered in LOW_VALUE_SECTIONS:
+            score = 0.5
+        else:
+            score = max((weight for key, weight in SECTION_WEIGHTS.items() if key in lowered), default=1)
+        body_lower = body.lower()
+        score += sum(2 for company in companies if company and company in body_lower)
+        return score
+
+    def select(self, full_content: dict, companies: list = None, name: str = "") -> dict:
+        """
+        Trim fetched Wikipedia content to the token budget
+
+        Args:
+            full_content (dict): Output of get_wiki_content_from_url
+            companies (list): Company names from the input row
+            name (str): Founder name, only used for logging
+
+        Returns:
+            dict: full_content with "content" and "sections" reduced
+        """
+        content = full_content["content"]
+        before = count_tokens(content)
+        if before <= self.token_budget:
+            self._record(before, before)
+            return full_content
+
+        companies = [c.lower().strip() for c in (companies or []) if c and c.strip()]
+        sections = [
+            section for section in split_sections(content)
+            if section[0].lower() not in SKIPPED_SECTIONS and section[2]
+        ]
+
+        lead = sections[0] if sections and sections[0][0] == "Introduction" else None
+        ranked = sorted(
+            (idx for idx, section in enumerate(sections) if section is not lead),
+            key=lambda idx: -self._score(sections[idx][0], sections[idx][2], companies)
+        )
+
+        kept = set()
+        used = 0
+        if lead is not None:
+            kept.add(0)
+            used = count_tokens(lead[2])
+        for idx in ranked:
+            title, heading, body = sections[idx]
+            cost = count_tokens(f"{heading}\n{body}")
+            if used + cost <= self.token_budget:
+                kept.add(idx)
+                used += cost
+
+        parts = []
+        for idx in sorted(kept):
+            title, heading, body = sections[idx]
+            parts.append(f"{heading}\n{body}" if heading else body)
+        trimmed = "\n\n".join(parts)
+
+        # A lead longer than the whole budget still has to be cut down
+        if count_tokens(trimmed) > self.token_budget:
+            trimmed = trimmed[:self.token_budget * 4]
+
+        after = count_tokens(trimmed)
+        self._record(before, after)
+        print(f"Section selector: {name} {before} -> {after} tokens ({before - after} saved)")
+
+        return {
+            **full_content,
+            "content": trimmed,
+            "sections": [sections[idx][0] for idx in sorted(kept) if sections[idx][1]],
+        }
+
+    def summary(self) -> str:
+        saved = self.tokens_before - self.tokens_after
+        rate = saved / self.tokens_before * 100 if self.tokens_before else 0
+        return (
+            f"Section selector: {self.tokens_after} of {self.tokens_before} article tokens sent "
+            f"({saved} saved, {rate:.0f}%)"
+        )
@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import subprocess
+import sys
+
+from result_journal import compact, iter_records
+from work_queue import WorkQueue
+
+
+def parse_shard(spec: str) -> tuple:
+    """Parse an "i/N" shard spec into (i, N)"""
+    match = re.fullmatch(r"(\d+)/(\d+)", spec.strip())
+    if not match or not 0 <= int(match.group(1)) < int(match.group(2)):
+        raise ValueError(f"Invalid shard {spec!r}, expected i/N with 0 <= i < N")
+    return int(match.group(1)), int(match.group(2))
+
+
+def shard_of(person_key: str, num_shards: int) -> int:
+    """
+    Stable shard for a person
+
+    Partitioning by person rather than by row keeps every row of one founder
+    in the same shard, so per-shard dedup behaves like a single run.
+    """
+    digest = hashlib.sha1(" ".join(person_key.split()).encode("utf-8")).hexdigest()
+    return int(digest, 16) % num_shards
+
+
+def shard_path(path: str, shard: tuple) -> str:
+    """Per-shard variant of a work queue or result file path"""
+    base, ext = os.path.splitext(path)
+    return f"{base}.shard-{shard[0]}-of-{shard[1]}{ext}"
+
+
+def run_workers(num_workers: int, script: str, forwarded_args: list) -> int:
+    """
+    Run every shard of an N-way split in its own process and wait for them
+
+    Returns:
+        int: Number of shards that failed
+    """
+    processes = [
+        subprocess.Popen([sys.executable, script, "--shard", f"{i}/{num_workers}", *forwarded_args])
+        for i in range(num_workers)
+    ]
+    failed = 0
+    for i, process in enumerate(processes):
+        if process.wait() != 0:
+            print(f"✗ Shard {i}/{num_workers} exited with code {process.returncode}")
+            failed += 1
+    return failed
+
+
+def seed_shard_queue(main_queue: str, shard_queue: str, shard: tuple):
+    """
+    Copy the shard's rows the shard queue does not have yet from the main work queue
+
+    Rows already in the shard queue keep their state, so a shard picks up
+    rows appended to the input without losing its own progress.
+
+    Returns:
+        int: Number of rows copied
+    """
+    if not os.path.exists(main_queue):
+        return 0
+    # Both queues need the current schema for the row copy
+    WorkQueue(main_queue).close()
+    WorkQueue(shard_queue).close()
+    conn = sqlite3.connect(shard_queue)
+    conn.create_function("shard_of", 2, shard_of)
+    conn.execute("ATTACH DATABASE ? AS main_queue", (main_queue,))
+    copied = conn.execute(
+        "INSERT OR IGNORE INTO items SELECT * FROM main_queue.items "
+        "WHERE shard_of(COALESCE(person_key, founder_name), ?) = ?",
+        (shard[1], shard[0])
+    ).rowcount
+    conn.execute("INSERT OR IGNORE INTO meta SELECT * FROM main_queue.meta")
+    conn.commit()
+    conn.close()
+    return copied
+
+
+def merge_shards(num_shards: int, journal_path: str, queue_path: str, output_json: str):
+    """
+    Fold every shard's journal and work queue into the main ones
+
+    Shard records are appended to the main journal ordered by input row,
+    so the merged output is the same whatever order the shards finished in.
+    Each shard owns its rows outright, so their queue items replace the
+    main queue's copies. Merged shard files are removed, so merging twice
+    is harmless.
+    """
+    shards = [(i, num_shards) for i in range(num_shards)]
+
+    records = []
+    for shard in shards:
+        for record in iter_records(shard_path(journal_path, shard)):
+            records.append((record.get("row") or 0, shard[0], len(records), record))
+    records.sort(key=lambda item: item[:3])
+
+    tmp_journal = journal_path + ".tmp"
+    with open(tmp_journal, 'w', encoding='utf-8') as out:
+        for record in iter_records(journal_path):
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        for *_, record in records:
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        out.flush()
+        os.fsync(out.fileno())
+    os.replace(tmp_journal, journal_path)
+
+    WorkQueue(queue_path).close()
+    conn = sqlite3.connect(queue_path)
+    for shard in shards:
+        path = shard_path(queue_path, shard)
+        if os.path.exists(path):
+            conn.execute("ATTACH DATABASE ? AS shard_queue", (path,))
+            conn.execute("INSERT OR REPLACE INTO items SELECT * FROM shard_queue.items")
+            conn.commit()
+            conn.execute("DETACH DATABASE shard_queue")
+    conn.close()
+
+    count = compact(journal_path, output_json)
+
+    for shard in shards:
+        for path in (shard_path(journal_path, shard), shard_path(queue_path, shard)):
+            for leftover in (path, path + "-wal", path + "-shm"):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+    print(f"Merged {len(records)} results from {num_shards} shards, {count} founders in {output_json}")
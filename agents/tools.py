@@ -1,9 +1,46 @@
-from langchain_community.tools import WikipediaQueryRun
-from langchain_community.utilities import WikipediaAPIWrapper
-import wikipedia
-import requests
-from bs4 import BeautifulSoup
+import asyncio
+import os
+from langchain_community.utilities import tavily_search
 from langchain_community.utilities.tavily_search import TavilySearchAPIWrapper
+from rate_limiter import get_limiter
+from response_cache import get_cache, normalize_text, normalize_title
+from wiki_client import get_client, lead_section, title_from_url
+
+# Clients are created on first use and shared, so repeated lookups reuse the
+# same pooled HTTP connections instead of opening new ones per call.
+_tavily = None
+
+def _get_tavily() -> TavilySearchAPIWrapper:
+    global _tavily
+    if _tavily is None:
+        # TAVILY_API_URL points searches at another endpoint, e.g. the offline benchmark
+        if os.getenv("TAVILY_API_URL"):
+            tavily_search.TAVILY_API_URL = os.getenv("TAVILY_API_URL")
+        _tavily = TavilySearchAPIWrapper()
+    return _tavily
+
+# Search error for a query Tavily answered without any Wikipedia result
+NO_WIKI_URL = "No English Wikipedia URL found"
+
+TRANSIENT_ERROR_NAMES = {
+    "Timeout", "ReadTimeout", "ConnectTimeout", "ConnectionError", "ChunkedEncodingError",
+    "RateLimitError", "APITimeoutError", "APIConnectionError", "InternalServerError",
+    "ServiceUnavailableError", "TimeoutError", "ConnectionResetError",
+}
+TRANSIENT_ERROR_MARKERS = ("timed out", "timeout", "rate limit", "429", "502", "503", "504", "temporarily")
+
+def is_transient_error(error: Exception) -> bool:
+    """
+    Whether a failed call is worth retrying later: timeouts, connection
+    problems, rate limiting and 5xx responses from any of the providers
+    """
+    if any(cls.__name__ in TRANSIENT_ERROR_NAMES for cls in type(error).__mro__):
+        return True
+    status = getattr(getattr(error, "response", None), "status_code", None) or getattr(error, "status_code", None)
+    if status == 429 or (isinstance(status, int) and status >= 500):
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in TRANSIENT_ERROR_MARKERS)
 
 def search_wiki_url(query: str) -> dict:
     """
@@ -15,10 +52,15 @@ def search_wiki_url(query: str) -> dict:
     Returns:
         dict: Wikipedia URL if found
     """
+    cache = get_cache()
+    cached = cache.get_json("tavily", normalize_text(query))
+    if cached is not None:
+        return cached
+
     try:
-        search = TavilySearchAPIWrapper()
+        search = _get_tavily()
         # Add 'wikipedia' to query to prioritize Wikipedia results
-        results = search.results(f"{query} wikipedia")
+        results = get_limiter("tavily").call(search.results, f"{query} wikipedia")
         
         # Look for English Wikipedia URL in results
         wiki_url = None
@@ -28,42 +70,27 @@ def search_wiki_url(query: str) -> dict:
                 wiki_url = url
                 break
                 
-        if wiki_url:
-            return {"url": wiki_url}
-        return {"error": "No English Wikipedia URL found"}
+        result = {"url": wiki_url} if wiki_url else {"error": NO_WIKI_URL}
+        # "No URL" is a real answer from Tavily, only exceptions are left uncached
+        cache.set_json("tavily", normalize_text(query), result)
+        return result
         
     except Exception as e:
-        return {"error": str(e)}
+        return {"error": str(e), "transient": is_transient_error(e)}
 
-def verify_wiki_page(url: str) -> dict:
-    """
-    Verify Wikipedia page content
-    
-    Args:
-        url (str): Wikipedia page URL
-        
-    Returns:
-        dict: Wikipedia page summary if verified
-    """
-    try:
-        # Extract title from URL and get page
-        title = url.split("/wiki/")[-1].replace("_", " ")
-        wiki = WikipediaQueryRun(api_wrapper=WikipediaAPIWrapper())
-        summary = wiki.run(title)
-        
-        return {
-            "url": url,
-            "summary": summary
-        }
-    except Exception as e:
-        return {"error": str(e)}
+def page_summary(page: dict) -> str:
+    """The page title and lead section of a fetched page, as the pre-verifier reads them"""
+    return f"Page: {page['title']}\nSummary: {lead_section(page['content'])}"
 
-def get_wiki_content_from_url(url: str) -> dict:
+def get_wiki_content_from_url(url: str, hint: str = "", revid: int = None) -> dict:
     """
     Get detailed Wikipedia content from a URL
     
     Args:
         url (str): URL of the Wikipedia page
+        hint (str): Description used to resolve disambiguation pages
+        revid (int): Revision the content must be from; a cached copy of
+            another revision is fetched again
         
     Returns:
         dict: Full page content and metadata
@@ -72,38 +99,42 @@ def get_wiki_content_from_url(url: str) -> dict:
         # Make sure we're using English Wikipedia
         if not 'en.wikipedia.org' in url:
             url = url.replace('wikipedia.org', 'en.wikipedia.org')
-            
-        # Get the page directly using the URL
-        response = requests.get(url)
-        if response.status_code != 200:
-            return {"error": "Failed to fetch Wikipedia page"}
-            
-        # Use Wikipedia API with the title
-        title = url.split("/wiki/")[-1].replace("_", " ")
-        # Set up Wikipedia with rate limiting
-        wikipedia.set_rate_limiting(True)
-        
-        # For disambiguation pages, we want the (businessman) version
-        if "Brian Armstrong" in title:
-            title = "Brian Armstrong (businessman)"
-            
-        page = wikipedia.page(title, auto_suggest=False)
-        
-        # Get content and sections
-        content = page.content
-        sections = page.sections
-        
-        if not content:
+
+        cache = get_cache()
+        # The hint picks the entry of a disambiguation page, so it is part of the key
+        key = {"title": normalize_title(url), "hint": normalize_text(hint)}
+        cached = cache.get_json("wikipedia_page", key)
+        if cached is not None and (revid is None or cached.get("revid") == revid):
+            return {**cached, "url": url}
+
+        # Extract, sections and revision come back in one API request
+        page = get_client().fetch_page(title_from_url(url), hint=hint)
+        if "error" in page:
+            return {"error": page["error"]}
+
+        if not page["content"]:
             return {"error": "No content found in Wikipedia page"}
-            
-        return {
-            "content": content,
-            "url": url,
-            "sections": sections
+
+        result = {
+            "content": page["content"],
+            "sections": page["sections"],
+            "title": page["title"],
+            "pageid": page["pageid"],
+            "revid": page["revid"],
         }
-    except wikipedia.exceptions.DisambiguationError as e:
-        return {"error": f"Disambiguation page found. Please be more specific: {str(e)}"}
-    except wikipedia.exceptions.PageError as e:
-        return {"error": f"Page not found: {str(e)}"}
+        cache.set_json("wikipedia_page", key, result)
+        return {**result, "url": url}
     except Exception as e:
-        return {"error": f"Error fetching Wikipedia content: {str(e)}"}
\ No newline at end of file
+        return {"error": f"Error fetching Wikipedia content: {str(e)}", "transient": is_transient_error(e)}
+
+
+# Async variants. The underlying clients are blocking, so each call runs in
+# the default thread pool and the event loop is free to drive other founders.
+
+async def asearch_wiki_url(query: str) -> dict:
+    """Async version of search_wiki_url"""
+    return await asyncio.to_thread(search_wiki_url, query)
+
+async def aget_wiki_content_from_url(url: str, hint: str = "", revid: int = None) -> dict:
+    """Async version of get_wiki_content_from_url"""
+    return await asyncio.to_thread(get_wiki_content_from_url, url, hint, revid)
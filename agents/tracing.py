@@ -0,0 +1,320 @@
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+# USD per million (prompt, completion) tokens
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+}
+
+# Pipeline stages in the order a lookup runs them
+STAGES = ("search", "pre_verify", "content", "local_verify_extract", "verify_extract", "repair")
+
+HISTOGRAM_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Founder and attempt of the lookup running in this task or thread
+_founder = contextvars.ContextVar("trace_founder", default=(None, None))
+# Innermost span open in this task or thread, for counting retries made under it
+_current_span = contextvars.ContextVar("trace_span", default=None)
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """Cost in USD, 0 for models without a known price"""
+    prices = MODEL_PRICES.get(model)
+    if prices is None:
+        # Dated snapshots like gpt-4o-mini-2024-07-18 share the base model's price
+        prices = next((price for name, price in sorted(MODEL_PRICES.items(), key=lambda item: -len(item[0]))
+                       if model.startswith(name)), (0.0, 0.0))
+    return (prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1_000_000
+
+
+class Span:
+    """One timed stage of one lookup"""
+
+    def __init__(self, stage: str, model: str = ""):
+        self.stage = stage
+        self.model = model
+        self.outcome = "ok"
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.llm_calls = 0
+        self.cached_llm_calls = 0
+        # Calls retried by a rate limiter while the span was open
+        self.retries = 0
+        self.attributes = {}
+        self.callbacks = [_SpanCallback(self)]
+
+    @property
+    def cost(self) -> float:
+        return estimate_cost(self.model, self.prompt_tokens, self.completion_tokens)
+
+
+def record_retry():
+    """Count a rate-limited call that is about to be retried on the open span, if any"""
+    span = _current_span.get()
+    if span is not None:
+        span.retries += 1
+
+
+class _SpanCallback(BaseCallbackHandler):
+    """Count the model calls and tokens made while a span is open"""
+
+    def __init__(self, span: Span):
+        self.span = span
+
+    def on_llm_end(self, response, **kwargs):
+        self.span.llm_calls += 1
+        usage = (response.llm_output or {}).get("token_usage")
+        if not usage:
+            # Ollama reports usage on the message rather than in llm_output
+            metadata = next((getattr(generation.message, "usage_metadata", None)
+                             for generations in response.generations for generation in generations
+                             if hasattr(generation, "message")), None)
+            if metadata:
+                usage = {"prompt_tokens": metadata.get("input_tokens", 0),
+                         "completion_tokens": metadata.get("output_tokens", 0)}
+        if not usage:
+            # Answers served from the response cache carry no usage
+            self.span.cached_llm_calls += 1
+            return
+        self.span.prompt_tokens += usage.get("prompt_tokens", 0)
+        self.span.completion_tokens += usage.get("completion_tokens", 0)
+
+
+class _StageStats:
+    def __init__(self):
+        self.durations = []
+        self.outcomes = defaultdict(int)
+        self.buckets = [0] * len(HISTOGRAM_BUCKETS)
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.llm_calls = 0
+        self.cached_llm_calls = 0
+        self.retries = 0
+        self.cost = 0.0
+
+
+def _percentile(ordered: list, pct: float) -> float:
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))] if ordered else 0.0
+
+
+class Tracer:
+    """
+    Record a span per pipeline stage of every lookup.
+
+    Each finished span is appended to a JSONL trace file when one is set
+    and folded into per-stage totals, which can be rendered as a summary
+    table or a Prometheus text snapshot. Retries are lookups of a founder
+    on a work-queue attempt after the first.
+    """
+
+    def __init__(self, trace_path: str = None, metrics_path: str = None, snapshot_interval: float = 30):
+        self.trace_path = trace_path
+        self.metrics_path = metrics_path
+        self.snapshot_interval = snapshot_interval
+        self.stages = defaultdict(_StageStats)
+        self._lock = threading.Lock()
+        self._snapshot_lock = threading.Lock()
+        self._trace = open(trace_path, 'a', encoding='utf-8') if trace_path else None
+        self._last_snapshot = time.monotonic()
+
+    def close(self):
+        if self.metrics_path:
+            self.write_snapshot()
+        with self._lock:
+            if self._trace is not None:
+                self._trace.close()
+                self._trace = None
+
+    @contextmanager
+    def founder(self, founder: str, attempt: int = 1):
+        """Attribute the spans opened inside this block to a founder and queue attempt"""
+        token = _founder.set((founder, attempt))
+        try:
+            yield
+        finally:
+            _founder.reset(token)
+
+    @contextmanager
+    def span(self, stage: str, model: str = ""):
+        """Time a stage; set outcome, attributes or pass span.callbacks to model calls"""
+        span = Span(stage, model)
+        token = _current_span.set(span)
+        started = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.outcome = "exception"
+            span.attributes["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            self._finish(span, time.perf_counter() - started)
+
+    def _finish(self, span: Span, seconds: float):
+        founder, attempt = _founder.get()
+        cost = span.cost
+        record = {
+            "ts": round(time.time(), 3),
+            "founder": founder,
+            "attempt": attempt,
+            "stage": span.stage,
+            "duration_ms": round(seconds * 1000, 1),
+            "outcome": span.outcome,
+        }
+        if span.llm_calls:
+            record.update({
+                "model": span.model,
+                "llm_calls": span.llm_calls,
+                "cached_llm_calls": span.cached_llm_calls,
+                "prompt_tokens": span.prompt_tokens,
+                "completion_tokens": span.completion_tokens,
+                "cost_usd": round(cost, 6),
+            })
+        if span.retries:
+            record["retries"] = span.retries
+        record.update(span.attributes)
+
+        with self._lock:
+            stats = self.stages[span.stage]
+            stats.durations.append(seconds)
+            stats.outcomes[span.outcome] += 1
+            for idx, bound in enumerate(HISTOGRAM_BUCKETS):
+                if seconds <= bound:
+                    stats.buckets[idx] += 1
+            stats.prompt_tokens += span.prompt_tokens
+            stats.completion_tokens += span.completion_tokens
+            stats.llm_calls += span.llm_calls
+            stats.cached_llm_calls += span.cached_llm_calls
+            stats.cost += cost
+            stats.retries += span.retries
+            if attempt and attempt > 1:
+                stats.retries += 1
+            if self._trace is not None:
+                self._trace.write(json.dumps(record, ensure_ascii=False) + "\n")
+                self._trace.flush()
+            snapshot_due = (self.metrics_path and
+                            time.monotonic() - self._last_snapshot >= self.snapshot_interval)
+            if snapshot_due:
+                self._last_snapshot = time.monotonic()
+        if snapshot_due:
+            self.write_snapshot()
+
+    def stage_stats(self) -> dict:
+        """Per-stage calls, latency percentiles, tokens, cost and outcomes"""
+        with self._lock:
+            result = {}
+            for stage in sorted(self.stages, key=lambda name: STAGES.index(name) if name in STAGES else len(STAGES)):
+                stats = self.stages[stage]
+                ordered = sorted(stats.durations)
+                result[stage] = {
+                    "calls": len(ordered),
+                    "total_s": sum(ordered),
+                    "p50_ms": _percentile(ordered, 50) * 1000,
+                    "p95_ms": _percentile(ordered, 95) * 1000,
+                    "retries": stats.retries,
+                    "llm_calls": stats.llm_calls,
+                    "cached_llm_calls": stats.cached_llm_calls,
+                    "prompt_tokens": stats.prompt_tokens,
+                    "completion_tokens": stats.completion_tokens,
+                    "cost_usd": stats.cost,
+                    "outcomes": dict(stats.outcomes),
+                }
+            return result
+
+    def prometheus_text(self) -> str:
+        """Current totals in the Prometheus text exposition format"""
+        with self._lock:
+            stages = {stage: stats for stage, stats in self.stages.items()}
+            lines = [
+                "# HELP lookup_stage_duration_seconds Wall time of each lookup stage",
+                "# TYPE lookup_stage_duration_seconds histogram",
+            ]
+            for stage, stats in stages.items():
+                for bound, count in zip(HISTOGRAM_BUCKETS, stats.buckets):
+                    lines.append(f'lookup_stage_duration_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+                lines.append(f'lookup_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {len(stats.durations)}')
+                lines.append(f'lookup_stage_duration_seconds_sum{{stage="{stage}"}} {sum(stats.durations)}')
+                lines.append(f'lookup_stage_duration_seconds_count{{stage="{stage}"}} {len(stats.durations)}')
+
+            lines += ["# HELP lookup_stage_outcomes_total Finished stages by outcome",
+                      "# TYPE lookup_stage_outcomes_total counter"]
+            for stage, stats in stages.items():
+                for outcome, count in stats.outcomes.items():
+                    lines.append(f'lookup_stage_outcomes_total{{stage="{stage}",outcome="{outcome}"}} {count}')
+
+            lines += ["# HELP lookup_stage_retries_total Rate-limited calls retried within a stage, plus stages run on a retried work-queue attempt",
+                      "# TYPE lookup_stage_retries_total counter"]
+            lines += [f'lookup_stage_retries_total{{stage="{stage}"}} {stats.retries}' for stage, stats in stages.items()]
+
+            lines += ["# HELP lookup_llm_calls_total Model calls, cached ones included",
+                      "# TYPE lookup_llm_calls_total counter"]
+            lines += [f'lookup_llm_calls_total{{stage="{stage}",cached="{cached}"}} {count}'
+                      for stage, stats in stages.items() if stats.llm_calls
+                      for cached, count in (("false", stats.llm_calls - stats.cached_llm_calls),
+                                            ("true", stats.cached_llm_calls))]
+
+            lines += ["# HELP lookup_tokens_total Prompt and completion tokens billed",
+                      "# TYPE lookup_tokens_total counter"]
+            lines += [f'lookup_tokens_total{{stage="{stage}",kind="{kind}"}} {count}'
+                      for stage, stats in stages.items() if stats.llm_calls
+                      for kind, count in (("prompt", stats.prompt_tokens), ("completion", stats.completion_tokens))]
+
+            lines += ["# HELP lookup_cost_usd_total Estimated model cost in USD",
+                      "# TYPE lookup_cost_usd_total counter"]
+            lines += [f'lookup_cost_usd_total{{stage="{stage}"}} {stats.cost:.6f}'
+                      for stage, stats in stages.items() if stats.llm_calls]
+        return "\n".join(lines) + "\n"
+
+    def write_snapshot(self, path: str = None):
+        path = path or self.metrics_path
+        tmp_path = path + ".tmp"
+        with self._snapshot_lock:
+            with open(tmp_path, 'w') as f:
+                f.write(self.prometheus_text())
+            os.replace(tmp_path, path)
+
+    def summary(self) -> str:
+        """Table of where the run spent its time and money"""
+        stats = self.stage_stats()
+        if not stats:
+            return "Tracing: no stages recorded"
+        total_time = sum(stage["total_s"] for stage in stats.values()) or 1
+        lines = [
+            f"{'stage':<14}{'calls':>8}{'p50 ms':>9}{'p95 ms':>9}{'time %':>8}{'retries':>9}"
+            f"{'tokens in':>11}{'tokens out':>11}{'cost $':>10}  outcomes",
+        ]
+        for stage, values in stats.items():
+            outcomes = ", ".join(f"{key}={count}" for key, count in sorted(values["outcomes"].items()))
+            lines.append(
+                f"{stage:<14}{values['calls']:>8}{values['p50_ms']:>9.0f}{values['p95_ms']:>9.0f}"
+                f"{values['total_s'] / total_time * 100:>7.0f}%{values['retries']:>9}"
+                f"{values['prompt_tokens']:>11}{values['completion_tokens']:>11}{values['cost_usd']:>10.4f}  {outcomes}"
+            )
+        total_cost = sum(values["cost_usd"] for values in stats.values())
+        lines.append(f"Estimated model cost: ${total_cost:.4f}")
+        return "\n".join(lines)
+
+
+_tracer = None
+
+def configure_tracer(trace_path: str = None, metrics_path: str = None, **kwargs) -> Tracer:
+    """Create the process-wide tracer"""
+    global _tracer
+    _tracer = Tracer(trace_path=trace_path, metrics_path=metrics_path, **kwargs)
+    return _tracer
+
+def get_tracer() -> Tracer:
+    """Return the process-wide tracer, an in-memory one if none was configured"""
+    if _tracer is None:
+        configure_tracer()
+    return _tracer
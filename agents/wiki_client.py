@@ -0,0 +1,199 @@
+import os
+import re
+import threading
+from urllib.parse import quote, unquote
+
+import requests
+
+from rate_limiter import get_limiter
+
+API_URL = os.getenv("WIKI_API_URL", "https://en.wikipedia.org/w/api.php")
+USER_AGENT = "founders-insights/1.0 (https://github.com/AveekGoyal/founders-insights)"
+
+# MediaWiki limits: 50 titles per query, and a full-article extract for only one.
+MAX_TITLES = 50
+
+# Qualifiers that point at the founder among several people with one name
+DISAMBIGUATION_HINTS = (
+    "businessman", "businesswoman", "businessperson", "entrepreneur",
+    "executive", "investor", "engineer", "programmer", "computer scientist",
+    "technologist", "founder",
+)
+
+HEADING_RE = re.compile(r"^(={2,})\s*(.+?)\s*\1\s*$", re.MULTILINE)
+
+
+def title_from_url(url: str) -> str:
+    """Extract the page title from a Wikipedia URL"""
+    return unquote(url.split("/wiki/")[-1].split("#")[0]).replace("_", " ")
+
+
+def url_from_title(title: str) -> str:
+    return "https://en.wikipedia.org/wiki/" + quote(title.replace(" ", "_"), safe="()',:/")
+
+
+def parse_sections(content: str) -> list:
+    """Section titles from a plain-text extract with == Heading == markers"""
+    return [match.group(2) for match in HEADING_RE.finditer(content)]
+
+
+def lead_section(content: str) -> str:
+    """The text of a plain-text extract before its first section heading"""
+    match = HEADING_RE.search(content)
+    return (content[:match.start()] if match else content).strip()
+
+
+class WikiClient:
+    """
+    Thin MediaWiki Action API client on a pooled requests.Session.
+
+    One action=query request returns the extract, revision id, page id and
+    disambiguation flag, following redirects on the server side. Revision
+    lookups are batched across titles. Requests are paced by the
+    shared "wikipedia" rate limiter.
+    """
+
+    def __init__(self, api_url: str = API_URL, session: requests.Session = None, timeout: float = 30):
+        self.api_url = api_url
+        self.session = session or requests.Session()
+        self.session.headers.setdefault("User-Agent", USER_AGENT)
+        self.timeout = timeout
+
+    def _get(self, params: dict) -> dict:
+        response = self.session.get(self.api_url, params=params, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def _query(self, **params) -> dict:
+        """Run one action=query request and return its "query" block"""
+        params = {"action": "query", "format": "json", "formatversion": 2, "redirects": 1, **params}
+        # Keep to Wikipedia's etiquette of not hammering the API
+        data = get_limiter("wikipedia").call(self._get, params)
+        if "error" in data:
+            raise RuntimeError(data["error"].get("info", "MediaWiki API error"))
+        return data.get("query", {})
+
+    @staticmethod
+    def _resolve_titles(query: dict, titles: list) -> dict:
+        """Map each requested title to the title the API answered with"""
+        hops = {}
+        for step in query.get("normalized", []) + query.get("redirects", []):
+            hops[step["from"]] = step["to"]
+        resolved = {}
+        for title in titles:
+            current = title
+            seen = set()
+            while current in hops and current not in seen:
+                seen.add(current)
+                current = hops[current]
+            resolved[title] = current
+        return resolved
+
+    @staticmethod
+    def _page_info(page: dict) -> dict:
+        return {
+            "title": page["title"],
+            "pageid": page.get("pageid"),
+            "revid": page.get("lastrevid"),
+            "disambiguation": "disambiguation" in page.get("pageprops", {}),
+        }
+
+    @staticmethod
+    def _pick_candidate(title: str, links: list, hint: str = "") -> str:
+        """Choose the most founder-like entry on a disambiguation page"""
+        hint_words = set(re.findall(r"[a-z]+", hint.lower()))
+        best, best_score = None, 0
+        for link in links:
+            candidate = link["title"]
+            if not candidate.lower().startswith(title.lower() + " ("):
+                continue
+            qualifier = candidate[len(title):].strip(" ()").lower()
+            score = 2 * sum(word in qualifier for word in DISAMBIGUATION_HINTS)
+            score += len(set(re.findall(r"[a-z]+", qualifier)) & hint_words)
+            if score > best_score:
+                best, best_score = candidate, score
+        return best
+
+    def _links(self, title: str) -> list:
+        """Article links of one page, fetched only for disambiguation pages"""
+        query = self._query(titles=title, prop="links", plnamespace=0, pllimit="max")
+        pages = query.get("pages", [])
+        return pages[0].get("links", []) if pages else []
+
+    def fetch_page(self, title: str, hint: str = "") -> dict:
+        """
+        Fetch one page's extract and metadata in a single request
+
+        Disambiguation pages are resolved to the most founder-like entry,
+        which costs a request for their links and one for the chosen entry.
+
+        Args:
+            title (str): Page title
+            hint (str): Description used to choose between disambiguation entries
+
+        Returns:
+            dict: title, pageid, revid, content, sections and url, or an error
+        """
+        query = self._query(titles=title, prop="extracts|info|pageprops", explaintext=1,
+                            exsectionformat="wiki", ppprop="disambiguation")
+        pages = query.get("pages", [])
+        if not pages or pages[0].get("missing") or pages[0].get("invalid"):
+            return {"error": f"Page not found: {title}"}
+        page = pages[0]
+        info = self._page_info(page)
+
+        if info["disambiguation"]:
+            candidate = self._pick_candidate(info["title"], self._links(info["title"]), hint)
+            if candidate is None:
+                return {"error": f"Disambiguation page found. Please be more specific: {info['title']}"}
+            resolved = self.fetch_page(candidate)
+            if not resolved.get("error") and resolved.get("disambiguation"):
+                return {"error": f"Disambiguation page found. Please be more specific: {candidate}"}
+            return resolved
+
+        content = page.get("extract", "")
+        return {
+            **info,
+            "content": content,
+            "sections": parse_sections(content),
+            "url": url_from_title(info["title"]),
+        }
+
+    def fetch_revisions(self, titles: list = (), pageids: list = ()) -> dict:
+        """
+        Fetch the current page id and revision id for many pages, 50 per request
+
+        Args:
+            titles (list): Page titles, redirects followed
+            pageids (list): Page ids, which stay with a page when it is moved
+
+        Returns:
+            dict: Requested title or page id -> {"title", "pageid", "revid", "disambiguation"}
+        """
+        results = {}
+        for start in range(0, len(titles), MAX_TITLES):
+            batch = titles[start:start + MAX_TITLES]
+            query = self._query(titles="|".join(batch), prop="info|pageprops", ppprop="disambiguation")
+            pages = {page["title"]: page for page in query.get("pages", []) if not page.get("missing")}
+            for requested, resolved in self._resolve_titles(query, batch).items():
+                if resolved in pages:
+                    results[requested] = self._page_info(pages[resolved])
+        for start in range(0, len(pageids), MAX_TITLES):
+            batch = pageids[start:start + MAX_TITLES]
+            query = self._query(pageids="|".join(map(str, batch)), prop="info|pageprops", ppprop="disambiguation")
+            for page in query.get("pages", []):
+                if not page.get("missing") and page.get("pageid") in batch:
+                    results[page["pageid"]] = self._page_info(page)
+        return results
+
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client() -> WikiClient:
+    """Return the shared WikiClient"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = WikiClient()
+    return _client
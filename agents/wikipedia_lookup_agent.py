@@ -1,91 +1,34 @@
 import os
 import json
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import PromptTemplate
-from langchain_core.tools import Tool
-from langchain.agents import create_react_agent, AgentExecutor
-from langchain import hub
-from tools import search_wiki_url, verify_wiki_page, get_wiki_content_from_url
+from model_router import ModelRouter
+from pre_verifier import PreVerifier
+from profile_schema import LookupDecision, decision_result, parse_decision
+from response_cache import get_cache
+from rate_limiter import get_limiter
+from section_selector import SectionSelector, count_tokens
+from tracing import get_tracer
+from tools import (
+    NO_WIKI_URL,
+    page_summary,
+    search_wiki_url,
+    get_wiki_content_from_url,
+    asearch_wiki_url,
+    aget_wiki_content_from_url,
+)
 
 load_dotenv()
 
-def lookup(name: str, description: str = "") -> dict:
-    llm = ChatOpenAI(model_name="gpt-4o-mini", temperature=0)
-    
-    # First search for Wikipedia URL using Tavily
-    search_result = search_wiki_url(name)
-    if "error" in search_result:
-        return {"error": "Could not find Wikipedia URL", "details": search_result["error"]}
-    
-    wiki_url = search_result["url"]
-    
-    # Create tools for the agent to verify the page
-    tools_for_agent = [
-        Tool(
-            name="Verify Wikipedia",
-            description="Verify if a Wikipedia page matches the person we're looking for",
-            func=lambda x: verify_wiki_page(x)
-        )
-    ]
-
-    # Create the agent with a specific prompt for verification
-    verify_template = """
-    Given a person's name, description, and Wikipedia URL, verify if this is the correct person.
-    
-    Person's Name: {name}
-    Description: {description}
-    Wikipedia URL: {url}
-    
-    Steps:
-    1. Get the Wikipedia page summary
-    2. Compare it with the provided description
-    3. Verify if key details match (role, company, achievements)
-    4. You MUST end your response with one of these two exact phrases:
-       - "Final Answer: Yes it definitely matches"
-       - "Final Answer: No it does not match"
-    
-    Your final answer must be exactly one of these two options, with no additional explanation or caveats.
-    If you are not 100% certain, answer "No it does not match".
-    """
-
-    prompt_template = PromptTemplate(
-        template=verify_template,
-        input_variables=["name", "description", "url"]
-    )
-
-    # Create and run the agent
-    prompt = hub.pull("hwchase17/react")
-    agent = create_react_agent(llm=llm, tools=tools_for_agent, prompt=prompt)
-    agent_executor = AgentExecutor(agent=agent, tools=tools_for_agent, verbose=True)
-    
-    # First verify the Wikipedia page
-    verify_result = agent_executor.invoke(
-        {
-            "input": prompt_template.format(
-                name=name,
-                description=description,
-                url=wiki_url
-            )
-        }
-    )
-    
-    # If verification failed with error
-    if "error" in verify_result.get("output", "").lower():
-        return {"error": "Could not verify Wikipedia page", "details": verify_result["output"]}
-    
-    # Simply check if the exact phrases we want are in the output
-    output = verify_result.get("output", "")
-    
-    if output.strip() == "Yes it definitely matches":
-        # Proceed with content fetching and JSON generation
-        full_content = get_wiki_content_from_url(wiki_url)
-        if "error" in full_content:
-            return {"error": "Could not fetch Wikipedia content", "details": full_content["error"]}
+LOOKUP_TEMPLATE = """
+        Given a person's name, description, and the Wikipedia content at a URL, verify if this is
+        the correct person and, if it is, extract and organize their career information.
         
-        # Process the content with GPT-4
-        template = """
-        Given the following Wikipedia content about {name}, extract and organize their career information.
+        Person's Name: {name}
+        Description: {description}
+        Wikipedia URL: {url}
         
         Wikipedia Content:
         {wiki_content}
@@ -93,84 +36,463 @@ def lookup(name: str, description: str = "") -> dict:
         Sections available:
         {sections}
         
-        Format the response as a JSON object with the following structure:
+        Compare the content with the provided description and check that key details match
+        (role, company, achievements). Set "match" to false unless you are certain this is the
+        same person, and give your confidence that it is from 0 to 1.
+        
+        Format the response as a JSON object with the following structure, with "profile" set
+        to null when "match" is false:
         {{
-            "short_description": "A brief one-line description focusing on current role and main achievement",
-            "education": {{
-                "degree": "Degree name (if available)",
-                "institution": "Institution name",
-                "field": "Field of study"
-            }},
-            "career": {{
-                "current_role": {{
-                    "title": "Current position (most recent)",
-                    "company": "Current company",
-                    "description": "Detailed description of current responsibilities",
-                    "duration": "Specific time period (e.g., 2020 - Present)",
-                    "achievements": [
-                        "List current role achievements",
-                        "Include ongoing projects"
-                    ]
+            "match": true,
+            "confidence": 0.95,
+            "profile": {{
+                "short_description": "A brief one-line description focusing on current role and main achievement",
+                "education": {{
+                    "degree": "Degree name (if available)",
+                    "institution": "Institution name",
+                    "field": "Field of study"
                 }},
-                "experience": [
-                    {{
-                        "company": "Company name",
-                        "roles": [
-                            {{
-                                "title": "Specific role title",
-                                "duration": "Exact time period",
-                                "description": "Detailed role description",
-                                "responsibilities": [
-                                    "Key responsibility 1",
-                                    "Key responsibility 2"
-                                ],
-                                "achievements": [
-                                    "Specific achievement 1",
-                                    "Project or initiative led",
-                                    "Major milestone reached"
-                                ]
-                            }}
+                "career": {{
+                    "current_role": {{
+                        "title": "Current position (most recent)",
+                        "company": "Current company",
+                        "description": "Detailed description of current responsibilities",
+                        "duration": "Specific time period (e.g., 2020 - Present)",
+                        "achievements": [
+                            "List current role achievements",
+                            "Include ongoing projects"
                         ]
-                    }}
-                ],
-                "total_years_experience": "Calculate total years based on earliest position"
+                    }},
+                    "experience": [
+                        {{
+                            "company": "Company name",
+                            "roles": [
+                                {{
+                                    "title": "Specific role title",
+                                    "duration": "Exact time period",
+                                    "description": "Detailed role description",
+                                    "responsibilities": [
+                                        "Key responsibility 1",
+                                        "Key responsibility 2"
+                                    ],
+                                    "achievements": [
+                                        "Specific achievement 1",
+                                        "Project or initiative led",
+                                        "Major milestone reached"
+                                    ]
+                                }}
+                            ]
+                        }}
+                    ],
+                    "total_years_experience": "Calculate total years based on earliest position"
+                }}
             }}
         }}
         """
 
-        prompt_template = PromptTemplate(
-            template=template,
-            input_variables=["name", "wiki_content", "sections"]
+REPAIR_TEMPLATE = """
+        Your JSON response did not pass validation.
+        
+        Validation errors:
+        {errors}
+        
+        Your response:
+        {output}
+        
+        Return only the corrected JSON object. It must follow this JSON schema:
+        {schema}
+        """
+
+
+# Completion tokens charged to the OpenAI budget before a call, settled
+# afterwards against the reported usage
+COMPLETION_TOKENS = 1200
+# Repair calls an invalid response gets before the lookup gives up on it
+MAX_REPAIRS = 1
+
+
+def _parse_response(content: str):
+    """
+    Returns:
+        tuple: (LookupDecision, None), or (None, validation error text)
+    """
+    try:
+        return parse_decision(content), None
+    except ValueError as e:
+        return None, str(e)
+
+
+def _used_tokens(message) -> int:
+    """Total tokens a chat model response reports, 0 if it reports none"""
+    usage = getattr(message, "usage_metadata", None) or {}
+    return usage.get("total_tokens", 0)
+
+
+def _search_outcome(search_result: dict) -> str:
+    if "error" not in search_result:
+        return "ok"
+    return "no_url" if search_result["error"] == NO_WIKI_URL else "error"
+
+
+def _decision_outcome(decision) -> str:
+    """Trace outcome for a parsed response"""
+    if decision is None:
+        return "invalid"
+    return "match" if decision.match else "no_match"
+
+
+class LookupEngine:
+    """
+    Long-lived lookup pipeline.
+
+    The LLM client and prompts are built once and reused for every founder,
+    so the OpenAI client keeps its pooled HTTP connections warm. Verification
+    and extraction are a single JSON-mode call whose answer is validated
+    against LookupDecision; an invalid answer gets a short repair call with
+    the validation errors instead of a rerun of the whole lookup. With a
+    ModelRouter, the call goes to a local model first and only escalates to
+    the remote one when the router does not trust the local answer.
+    """
+
+    def __init__(self, model_name: str = "gpt-4o-mini", temperature: float = 0,
+                 pre_verifier: PreVerifier = None, section_selector: SectionSelector = None,
+                 verbose: bool = False, defer_extraction: bool = False, router: ModelRouter = None):
+        # Makes sure model calls go through the response cache
+        self.cache = get_cache()
+        self.model_name = model_name
+        # 429s are handled by the shared rate limiter rather than the SDK's own retries
+        self.llm = ChatOpenAI(model_name=model_name, temperature=temperature, max_retries=0)
+        # JSON mode guarantees an object; LookupDecision checks its shape
+        self.json_llm = self.llm.bind(response_format={"type": "json_object"})
+        self.lookup_prompt = PromptTemplate(
+            template=LOOKUP_TEMPLATE,
+            input_variables=["name", "description", "url", "wiki_content", "sections"]
+        )
+        self.repair_prompt = PromptTemplate(
+            template=REPAIR_TEMPLATE,
+            input_variables=["errors", "output", "schema"]
         )
+        self.schema = json.dumps(LookupDecision.model_json_schema())
+        self.pre_verifier = pre_verifier
+        self.section_selector = section_selector
+        self.verbose = verbose
+        # Stop before the model call and hand its prompt back for a Batch API run
+        self.defer_extraction = defer_extraction
+        # Local model tried before the remote one, see ModelRouter
+        self.router = router
 
-        result = llm.invoke(
-            prompt_template.format(
-                name=name,
-                wiki_content=full_content["content"],
-                sections=json.dumps(full_content["sections"], indent=2)
+    def _pre_verify(self, name: str, description: str, context: dict, page: dict):
+        """
+        Decide clear cases locally from the fetched page's lead section
+
+        Returns:
+            dict | None: A no-match result, {} for a local match, or None to
+            leave the decision to the model
+        """
+        context = context or {}
+        with get_tracer().span("pre_verify") as span:
+            decision, score = self.pre_verifier.decide(
+                page_summary(page),
+                name,
+                title=context.get("title", ""),
+                company=context.get("companies") or context.get("company", ""),
+                description=context.get("description", description)
             )
+            span.outcome = decision
+            span.attributes["score"] = round(score, 3)
+        if decision == "match":
+            print(f"Pre-verifier matched {name} (score {score:.2f})")
+            return {}
+        if decision == "no_match":
+            return {
+                "match": False,
+                "reason": f"Wikipedia page does not match the person (pre-verifier score {score:.2f})"
+            }
+        return None
+
+    def _lookup_input(self, name: str, description: str, wiki_url: str, full_content: dict,
+                      context: dict = None) -> str:
+        """Format the verify-and-extract prompt for the fetched Wikipedia content"""
+        if self.section_selector is not None:
+            context = context or {}
+            companies = context.get("companies") or [context.get("company", "")]
+            full_content = self.section_selector.select(full_content, companies=companies, name=name)
+        return self.lookup_prompt.format(
+            name=name,
+            description=description,
+            url=wiki_url,
+            wiki_content=full_content["content"],
+            sections=json.dumps(full_content["sections"], indent=2)
         )
-        
-        # Clean and parse the response
-        content = result.content
-        if content.startswith("```") and content.endswith("```"):
-            content = content.split("```")[1]
-            if content.startswith("json\n"):
-                content = content[5:]
-        
-        parsed_result = json.loads(content)
-        parsed_result["source_url"] = wiki_url
-        return parsed_result
-    elif output.strip() == "No it does not match":
-        return {
-            "match": False,
-            "reason": "Wikipedia page does not definitively match the person"
-        }
-    else:
-        return {
-            "match": False,
-            "reason": "No final answer provided in verification"
-        }
+
+    def _repair_input(self, output: str, errors: str) -> str:
+        """Format a repair request carrying only the invalid answer and what was wrong with it"""
+        return self.repair_prompt.format(errors=errors, output=output, schema=self.schema)
+
+    @staticmethod
+    def _budget(prompt: str) -> dict:
+        return {"tokens": count_tokens(prompt) + COMPLETION_TOKENS, "settle": _used_tokens}
+
+    def _deferred(self, prompt: str, wiki_url: str, pre_verified: bool, page: dict) -> dict:
+        """Result of a lookup whose model call runs later in a batch"""
+        return {"deferred": True, "prompt": prompt, "source_url": wiki_url, "pre_verified": pre_verified,
+                "title": page.get("title"), "pageid": page.get("pageid"), "revid": page.get("revid")}
+
+    def _result(self, name: str, decision, errors: str, wiki_url: str, pre_verified: bool, page: dict) -> dict:
+        if decision is None:
+            return {"error": "Lookup response failed validation", "details": errors[:500]}
+        if self.verbose:
+            print(f"Model decision for {name}: match={decision.match}, confidence {decision.confidence:.2f}")
+        return decision_result(decision, wiki_url, pre_verified, page)
+
+    def _decide(self, prompt: str):
+        """
+        Verify and extract in one call, on the local tier first when a router is set
+
+        Returns:
+            tuple: (LookupDecision or None, validation errors of the last answer)
+        """
+        if self.router is None or not self.router.routes(prompt):
+            return self._remote_decide(prompt)
+        with get_tracer().span("local_verify_extract", self.router.model_name) as span:
+            try:
+                message = get_limiter("ollama").call(self.router.llm.invoke, prompt,
+                                                     config={"callbacks": span.callbacks})
+                local, errors = _parse_response(message.content)
+                failed = False
+            except Exception as e:
+                local, errors, failed = None, str(e), True
+            reason = self.router.escalation(local, failed)
+            span.outcome = "error" if failed else _decision_outcome(local)
+            if reason:
+                span.attributes["escalated"] = reason
+        if reason is None:
+            return local, errors
+        decision, errors = self._remote_decide(prompt)
+        self.router.compare(local, decision)
+        return decision, errors
+
+    async def _adecide(self, prompt: str):
+        """Async version of _decide()"""
+        if self.router is None or not self.router.routes(prompt):
+            return await self._aremote_decide(prompt)
+        with get_tracer().span("local_verify_extract", self.router.model_name) as span:
+            try:
+                message = await get_limiter("ollama").acall(self.router.llm.ainvoke, prompt,
+                                                            config={"callbacks": span.callbacks})
+                local, errors = _parse_response(message.content)
+                failed = False
+            except Exception as e:
+                local, errors, failed = None, str(e), True
+            reason = self.router.escalation(local, failed)
+            span.outcome = "error" if failed else _decision_outcome(local)
+            if reason:
+                span.attributes["escalated"] = reason
+        if reason is None:
+            return local, errors
+        decision, errors = await self._aremote_decide(prompt)
+        self.router.compare(local, decision)
+        return decision, errors
+
+    def _remote_decide(self, prompt: str):
+        """Verify and extract with the remote model, repairing an invalid answer"""
+        tracer = get_tracer()
+        with tracer.span("verify_extract", self.model_name) as span:
+            message = get_limiter("openai").call(
+                self.json_llm.invoke, prompt,
+                config={"callbacks": span.callbacks},
+                **self._budget(prompt)
+            )
+            decision, errors = _parse_response(message.content)
+            span.outcome = _decision_outcome(decision)
+
+        for _ in range(MAX_REPAIRS):
+            if decision is not None:
+                break
+            with tracer.span("repair", self.model_name) as span:
+                prompt = self._repair_input(message.content, errors)
+                message = get_limiter("openai").call(
+                    self.json_llm.invoke, prompt,
+                    config={"callbacks": span.callbacks},
+                    **self._budget(prompt)
+                )
+                decision, errors = _parse_response(message.content)
+                span.outcome = _decision_outcome(decision)
+        return decision, errors
+
+    async def _aremote_decide(self, prompt: str):
+        """Async version of _remote_decide()"""
+        tracer = get_tracer()
+        with tracer.span("verify_extract", self.model_name) as span:
+            message = await get_limiter("openai").acall(
+                self.json_llm.ainvoke, prompt,
+                config={"callbacks": span.callbacks},
+                **self._budget(prompt)
+            )
+            decision, errors = _parse_response(message.content)
+            span.outcome = _decision_outcome(decision)
+
+        for _ in range(MAX_REPAIRS):
+            if decision is not None:
+                break
+            with tracer.span("repair", self.model_name) as span:
+                prompt = self._repair_input(message.content, errors)
+                message = await get_limiter("openai").acall(
+                    self.json_llm.ainvoke, prompt,
+                    config={"callbacks": span.callbacks},
+                    **self._budget(prompt)
+                )
+                decision, errors = _parse_response(message.content)
+                span.outcome = _decision_outcome(decision)
+        return decision, errors
+
+    def lookup(self, name: str, description: str = "", context: dict = None) -> dict:
+        """
+        Args:
+            name (str): Founder name
+            description (str): Free-text description used for verification
+            context (dict): Optional "title", "company" (or a "companies" list) and "description"
+                fields from the input row, used by the pre-verifier
+
+        Returns:
+            dict: The profile, a no-match or error result, or with defer_extraction
+            a {"deferred", "prompt", "source_url", "pre_verified"} result
+        """
+        tracer = get_tracer()
+        # First search for Wikipedia URL using Tavily
+        with tracer.span("search") as span:
+            search_result = search_wiki_url(name)
+            span.outcome = _search_outcome(search_result)
+        if "error" in search_result:
+            return {"error": "Could not find Wikipedia URL", "details": search_result["error"],
+                    "transient": search_result.get("transient", False)}
+
+        wiki_url = search_result["url"]
+
+        # One fetch serves both the pre-verifier, from the lead section, and extraction
+        with tracer.span("content") as span:
+            full_content = get_wiki_content_from_url(wiki_url, description)
+            span.outcome = "error" if "error" in full_content else "ok"
+        if "error" in full_content:
+            return {"error": "Could not fetch Wikipedia content", "details": full_content["error"],
+                    "transient": full_content.get("transient", False)}
+
+        pre_verified = False
+        if self.pre_verifier is not None:
+            outcome = self._pre_verify(name, description, context, full_content)
+            if outcome:
+                return outcome
+            pre_verified = outcome is not None
+
+        prompt = self._lookup_input(name, description, wiki_url, full_content, context)
+        if self.defer_extraction:
+            return self._deferred(prompt, wiki_url, pre_verified, full_content)
+
+        # One call verifies the page and extracts the profile
+        decision, errors = self._decide(prompt)
+        return self._result(name, decision, errors, wiki_url, pre_verified, full_content)
+
+    def refresh(self, name: str, description: str, wiki_url: str, revid: int, context: dict = None) -> dict:
+        """
+        Extract a profile again from a page that was matched before and has since changed
+
+        Search and pre-verification are skipped, and the page is trusted as
+        matched the way a pre-verified page is.
+
+        Args:
+            wiki_url (str): The matched page
+            revid (int): The page's current revision, fetched instead of any cached copy
+
+        Returns:
+            dict: The new profile, a no-match or an error result
+        """
+        with get_tracer().span("content") as span:
+            full_content = get_wiki_content_from_url(wiki_url, description, revid=revid)
+            span.outcome = "error" if "error" in full_content else "ok"
+        if "error" in full_content:
+            return {"error": "Could not fetch Wikipedia content", "details": full_content["error"],
+                    "transient": full_content.get("transient", False)}
+        prompt = self._lookup_input(name, description, wiki_url, full_content, context)
+        decision, errors = self._decide(prompt)
+        return self._result(name, decision, errors, wiki_url, True, full_content)
+
+    async def alookup(self, name: str, description: str = "", context: dict = None) -> dict:
+        """
+        Async version of lookup()
+
+        Every network stage is awaited, so many founders can be in flight at
+        once while each one still runs search -> fetch -> verify and extract.
+        """
+        tracer = get_tracer()
+        with tracer.span("search") as span:
+            search_result = await asearch_wiki_url(name)
+            span.outcome = _search_outcome(search_result)
+        if "error" in search_result:
+            return {"error": "Could not find Wikipedia URL", "details": search_result["error"],
+                    "transient": search_result.get("transient", False)}
+
+        wiki_url = search_result["url"]
+
+        with tracer.span("content") as span:
+            full_content = await aget_wiki_content_from_url(wiki_url, description)
+            span.outcome = "error" if "error" in full_content else "ok"
+        if "error" in full_content:
+            return {"error": "Could not fetch Wikipedia content", "details": full_content["error"],
+                    "transient": full_content.get("transient", False)}
+
+        pre_verified = False
+        if self.pre_verifier is not None:
+            outcome = self._pre_verify(name, description, context, full_content)
+            if outcome:
+                return outcome
+            pre_verified = outcome is not None
+
+        prompt = self._lookup_input(name, description, wiki_url, full_content, context)
+        if self.defer_extraction:
+            return self._deferred(prompt, wiki_url, pre_verified, full_content)
+
+        decision, errors = await self._adecide(prompt)
+        return self._result(name, decision, errors, wiki_url, pre_verified, full_content)
+
+    def lookup_many(self, people: list, max_workers: int = 8) -> list:
+        """
+        Look up several people with the same engine
+
+        Args:
+            people (list): (name, description) or (name, description, context) tuples
+            max_workers (int): Number of lookups to run at once
+
+        Returns:
+            list: One result per person, in input order
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(lambda person: self.lookup(*person), people))
+
+
+_default_engine = None
+
+def configure_engine(**kwargs) -> LookupEngine:
+    """Build the process-wide LookupEngine with non-default settings"""
+    global _default_engine
+    kwargs.setdefault("pre_verifier", PreVerifier())
+    kwargs.setdefault("section_selector", SectionSelector())
+    _default_engine = LookupEngine(**kwargs)
+    return _default_engine
+
+def get_engine() -> LookupEngine:
+    """Return the process-wide LookupEngine, building it on first use"""
+    if _default_engine is None:
+        configure_engine()
+    return _default_engine
+
+
+def lookup(name: str, description: str = "", context: dict = None) -> dict:
+    return get_engine().lookup(name, description, context)
+
+
+async def alookup(name: str, description: str = "", context: dict = None) -> dict:
+    """Async version of lookup()"""
+    return await get_engine().alookup(name, description, context)
 
 if __name__ == "__main__":
     name = "Brian Armstrong"
@@ -0,0 +1,391 @@
+import json
+import os
+import random
+import socket
+import sqlite3
+import time
+import uuid
+from itertools import islice
+
+PENDING = "pending"
+IN_FLIGHT = "in_flight"
+MATCHED = "matched"
+NO_MATCH = "no_match"
+TRANSIENT_ERROR = "transient_error"
+PERMANENT_ERROR = "permanent_error"
+# Page fetched, with the model call waiting on a Batch API run
+AWAITING_BATCH = "awaiting_batch"
+
+STATES = (PENDING, IN_FLIGHT, MATCHED, NO_MATCH, TRANSIENT_ERROR, PERMANENT_ERROR, AWAITING_BATCH)
+DONE_STATES = (MATCHED, NO_MATCH, PERMANENT_ERROR)
+
+
+class WorkQueue:
+    """
+    Durable SQLite queue with one item per input row.
+
+    Items are claimed with a lease; a lease that expires (the worker died)
+    makes the item claimable again. Transient failures are retried with
+    exponential backoff until max_attempts, then become permanent errors.
+    Every state change is a single-row update, so bookkeeping cost does not
+    grow with the number of processed founders.
+    """
+
+    def __init__(self, path: str, lease_seconds: float = 600, max_attempts: int = 5,
+                 base_backoff: float = 30, max_backoff: float = 3600):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.conn = sqlite3.connect(path, isolation_level=None, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS items (
+                row INTEGER PRIMARY KEY,
+                founder_name TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                state TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                lease_owner TEXT,
+                lease_expires REAL,
+                next_attempt_at REAL NOT NULL DEFAULT 0,
+                last_error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                finished_at REAL,
+                person_key TEXT
+            );
+            CREATE INDEX IF NOT EXISTS items_claim ON items (state, next_attempt_at, row);
+            CREATE INDEX IF NOT EXISTS items_finished ON items (finished_at);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            -- Resolved people, and the LinkedIn and name keys new rows are matched on
+            CREATE TABLE IF NOT EXISTS people (person_key TEXT PRIMARY KEY, handle TEXT NOT NULL DEFAULT '');
+            CREATE TABLE IF NOT EXISTS match_keys (
+                match_key TEXT NOT NULL,
+                person_key TEXT NOT NULL,
+                PRIMARY KEY (match_key, person_key)
+            );
+            """
+        )
+        columns = [info[1] for info in self.conn.execute("PRAGMA table_info(items)")]
+        if "person_key" not in columns:
+            self.conn.execute("ALTER TABLE items ADD COLUMN person_key TEXT")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS items_person ON items (person_key, state)")
+
+    def close(self):
+        self.conn.close()
+
+    def get_meta(self, key: str, default=None):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_meta(self, key: str, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    def extend(self, rows_from, resolve, batch_size: int = 1000) -> int:
+        """
+        Queue the input rows after the highest queued row, resolving each to a person
+
+        Rows are read and committed batch_size at a time, so memory stays flat
+        however many rows are new. When another process queued rows in the
+        meantime, reading restarts after them.
+
+        Args:
+            rows_from: fn(first row) -> iterator of (row, payload) from that row on
+            resolve: fn(row, payload) -> (person key, handle, match keys); it may
+                call people_for(), which sees the rows already queued in this batch
+
+        Returns:
+            int: Number of new items
+        """
+        added = 0
+        rows, expected = None, None
+        try:
+            while True:
+                self.conn.execute("BEGIN IMMEDIATE")
+                try:
+                    first = self.max_row() + 1
+                    if first != expected:
+                        if rows is not None:
+                            rows.close()
+                        rows = rows_from(first)
+                    batch = list(islice(rows, batch_size))
+                    now = time.time()
+                    for row, payload in batch:
+                        person_key, handle, match_keys = resolve(row, payload)
+                        self.register_person(person_key, handle, match_keys)
+                        self.conn.execute(
+                            "INSERT INTO items (row, founder_name, payload, person_key, created_at, updated_at) "
+                            "VALUES (?, ?, ?, ?, ?, ?)",
+                            (row, payload["Founder Name"], json.dumps(payload, ensure_ascii=False), person_key,
+                             now, now)
+                        )
+                    self.conn.execute("COMMIT")
+                except Exception:
+                    self.conn.execute("ROLLBACK")
+                    raise
+                if not batch:
+                    return added
+                added += len(batch)
+                expected = batch[-1][0] + 1
+        finally:
+            if rows is not None:
+                rows.close()
+
+    def max_row(self) -> int:
+        """Highest queued row number, -1 for an empty queue"""
+        found = self.conn.execute("SELECT MAX(row) FROM items").fetchone()[0]
+        return -1 if found is None else found
+
+    def people_for(self, match_key: str) -> list:
+        """(person key, LinkedIn handle) of every person registered under a match key"""
+        return self.conn.execute(
+            "SELECT people.person_key, people.handle FROM match_keys JOIN people USING (person_key) "
+            "WHERE match_key = ? ORDER BY people.rowid",
+            (match_key,)
+        ).fetchall()
+
+    def register_person(self, person_key: str, handle: str, match_keys: list):
+        """Record a person's handle, once it has one, and the match keys that lead to it"""
+        self.conn.execute(
+            "INSERT INTO people (person_key, handle) VALUES (?, ?) "
+            "ON CONFLICT (person_key) DO UPDATE SET handle = excluded.handle WHERE handle = ''",
+            (person_key, handle)
+        )
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO match_keys (match_key, person_key) VALUES (?, ?)",
+            [(match_key, person_key) for match_key in match_keys]
+        )
+
+    def backfill_people(self, keys_of):
+        """
+        Register the people of a queue filled before people were tracked
+
+        Args:
+            keys_of: fn(payload) -> (LinkedIn handle, match keys) of a row
+        """
+        if self.conn.execute("SELECT 1 FROM people LIMIT 1").fetchone():
+            return
+        self.conn.execute("BEGIN")
+        for person_key, payload in self.conn.execute(
+            "SELECT person_key, payload FROM items WHERE person_key IS NOT NULL ORDER BY row"
+        ):
+            handle, match_keys = keys_of(json.loads(payload))
+            self.register_person(person_key, handle, match_keys)
+        self.conn.execute("COMMIT")
+
+    def person_rows(self, person_key: str) -> list:
+        """(row, payload) of every row of a person, in row order"""
+        return [
+            (row, json.loads(payload))
+            for row, payload in self.conn.execute(
+                "SELECT row, payload FROM items WHERE person_key = ? ORDER BY row", (person_key,)
+            )
+        ]
+
+    def claim(self, limit: int = 1) -> list:
+        """
+        Lease up to `limit` items in row order
+
+        Claimable items are pending ones, transient errors whose backoff has
+        elapsed, and in-flight items whose lease expired under another owner.
+
+        Returns:
+            list: dicts with row, founder_name, person_key, payload and attempts
+        """
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = self.conn.execute(
+                """
+                SELECT row, founder_name, person_key, payload, attempts FROM items
+                WHERE (state IN ('pending', 'transient_error') AND next_attempt_at <= :now)
+                   OR (state = 'in_flight' AND lease_expires < :now AND lease_owner != :owner)
+                ORDER BY row LIMIT :limit
+                """,
+                {"now": now, "owner": self.owner, "limit": limit}
+            ).fetchall()
+            self.conn.executemany(
+                "UPDATE items SET state = 'in_flight', lease_owner = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated_at = ? WHERE row = ?",
+                [(self.owner, now + self.lease_seconds, now, row[0]) for row in rows]
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return [
+            {"row": row, "founder_name": name, "person_key": person_key,
+             "payload": json.loads(payload), "attempts": attempts + 1}
+            for row, name, person_key, payload, attempts in rows
+        ]
+
+    # Other unfinished rows of the same person, except ones another worker holds
+    SIBLINGS = (
+        "(row = :row OR (person_key = (SELECT person_key FROM items WHERE row = :row) "
+        "AND state NOT IN ('matched', 'no_match', 'permanent_error') "
+        "AND (lease_owner IS NULL OR lease_owner = :owner)))"
+    )
+
+    def complete(self, row: int, state: str, error: str = None):
+        """Record a final outcome for an item and every other row of its person"""
+        if state not in DONE_STATES:
+            raise ValueError(f"{state!r} is not a final state")
+        now = time.time()
+        self.conn.execute(
+            "UPDATE items SET state = :state, last_error = :error, lease_owner = NULL, lease_expires = NULL, "
+            f"updated_at = :now, finished_at = :now WHERE {self.SIBLINGS}",
+            {"state": state, "error": error, "now": now, "row": row, "owner": self.owner}
+        )
+
+    def fail(self, row: int, error: str, transient: bool) -> str:
+        """
+        Record a failed attempt, scheduling a retry for transient errors.
+        Other rows of the same person wait for the same retry.
+
+        Returns:
+            str: The state the item ended up in
+        """
+        attempts = self.conn.execute("SELECT attempts FROM items WHERE row = ?", (row,)).fetchone()[0]
+        if not transient or attempts >= self.max_attempts:
+            self.complete(row, PERMANENT_ERROR, error)
+            return PERMANENT_ERROR
+        # Exponential backoff with jitter so retries of one outage spread out
+        delay = min(self.max_backoff, self.base_backoff * 2 ** (attempts - 1)) * random.uniform(0.5, 1.0)
+        now = time.time()
+        self.conn.execute(
+            "UPDATE items SET state = 'transient_error', last_error = :error, next_attempt_at = :retry_at, "
+            f"lease_owner = NULL, lease_expires = NULL, updated_at = :now WHERE {self.SIBLINGS}",
+            {"error": error, "retry_at": now + delay, "now": now, "row": row, "owner": self.owner}
+        )
+        return TRANSIENT_ERROR
+
+    def release(self, row: int):
+        """Hand an in-flight item back without counting the attempt"""
+        self.conn.execute(
+            "UPDATE items SET state = 'pending', attempts = MAX(attempts - 1, 0), lease_owner = NULL, "
+            "lease_expires = NULL, updated_at = ? WHERE row = ? AND state = 'in_flight'",
+            (time.time(), row)
+        )
+
+    def defer(self, row: int):
+        """Park an item and the other rows of its person until their batch results are ingested"""
+        self.conn.execute(
+            "UPDATE items SET state = 'awaiting_batch', lease_owner = NULL, lease_expires = NULL, "
+            f"updated_at = :now WHERE {self.SIBLINGS}",
+            {"now": time.time(), "row": row, "owner": self.owner}
+        )
+
+    def release_deferred(self, rows: set, person_keys: set) -> int:
+        """
+        Return parked items that are not in the batch, by row or person, to pending
+
+        Returns:
+            int: Number of items released
+        """
+        parked = self.conn.execute("SELECT row, person_key FROM items WHERE state = 'awaiting_batch'").fetchall()
+        now = time.time()
+        stranded = [(now, row) for row, person_key in parked if row not in rows and person_key not in person_keys]
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.executemany(
+                "UPDATE items SET state = 'pending', updated_at = ? WHERE row = ? AND state = 'awaiting_batch'",
+                stranded
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return len(stranded)
+
+    def item(self, row: int):
+        """An item in the shape claim() returns, plus its state, or None"""
+        found = self.conn.execute(
+            "SELECT row, founder_name, person_key, payload, attempts, state FROM items WHERE row = ?", (row,)
+        ).fetchone()
+        if found is None:
+            return None
+        row, name, person_key, payload, attempts, state = found
+        return {"row": row, "founder_name": name, "person_key": person_key,
+                "payload": json.loads(payload), "attempts": attempts, "state": state}
+
+    def resolved_state(self, person_key: str, exclude_row: int = None):
+        """Final matched/no-match state of another row for the same person, if any"""
+        found = self.conn.execute(
+            "SELECT state FROM items WHERE person_key = ? AND state IN ('matched', 'no_match') "
+            "AND row != ? LIMIT 1",
+            (person_key, -1 if exclude_row is None else exclude_row)
+        ).fetchone()
+        return found[0] if found else None
+
+    def next_retry_at(self):
+        """When the earliest waiting transient error becomes claimable, or None"""
+        found = self.conn.execute(
+            "SELECT MIN(next_attempt_at) FROM items WHERE state = 'transient_error'"
+        ).fetchone()
+        return found[0]
+
+    def import_legacy_tracker(self, tracker: dict, matched_names: set):
+        """
+        Carry over a processed_rows.json tracker. It did not record outcomes,
+        so founders with a stored result become matched and the rest no-match.
+        finished_at stays NULL so imported rows don't count toward throughput.
+        """
+        if self.get_meta("legacy_imported"):
+            return
+        now = time.time()
+        self.conn.execute("BEGIN")
+        self.conn.executemany(
+            "UPDATE items SET state = ?, updated_at = ? WHERE founder_name = ?",
+            [
+                (MATCHED if name in matched_names else NO_MATCH, now, name)
+                for name in tracker.get("processed_founders", [])
+            ]
+        )
+        self.set_meta("legacy_imported", True)
+        self.conn.execute("COMMIT")
+
+    def counts(self) -> dict:
+        counts = dict.fromkeys(STATES, 0)
+        counts.update(self.conn.execute("SELECT state, COUNT(*) FROM items GROUP BY state").fetchall())
+        return counts
+
+    def status(self, window_seconds: float = 3600) -> str:
+        """Summary of queue states, recent throughput and failures"""
+        counts = self.counts()
+        total = sum(counts.values())
+        now = time.time()
+        lines = [f"Queue {self.path}: {total} items"]
+        for state in STATES:
+            lines.append(f"  {state:<16} {counts[state]}")
+
+        recent = self.conn.execute(
+            "SELECT COUNT(*) FROM items WHERE finished_at >= ?", (now - window_seconds,)
+        ).fetchone()[0]
+        first, last, finished = self.conn.execute(
+            "SELECT MIN(finished_at), MAX(finished_at), COUNT(finished_at) FROM items"
+        ).fetchone()
+        lines.append(f"Throughput: {recent / (window_seconds / 60):.1f} founders/min over the last "
+                     f"{window_seconds / 60:.0f} min")
+        if finished and last > first:
+            lines.append(f"            {finished / ((last - first) / 60):.1f} founders/min overall")
+
+        retried = self.conn.execute("SELECT COUNT(*) FROM items WHERE attempts > 1").fetchone()[0]
+        lines.append(f"Retried items: {retried}")
+        next_retry = self.next_retry_at()
+        if next_retry:
+            lines.append(f"Next retry in {max(0, next_retry - now):.0f}s")
+
+        errors = self.conn.execute(
+            "SELECT state, last_error, COUNT(*) FROM items WHERE state IN ('transient_error', 'permanent_error') "
+            "GROUP BY state, last_error ORDER BY COUNT(*) DESC LIMIT 10"
+        ).fetchall()
+        if errors:
+            lines.append("Top errors:")
+            for state, error, count in errors:
+                lines.append(f"  {count:>5}  {state}: {(error or '')[:100]}")
+        return "\n".join(lines)
@@ -0,0 +1,613 @@
+import csv
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, urlparse
+
+FIRST_NAMES = [
+    "Alex", "Priya", "Marcus", "Elena", "Kenji", "Fatima", "Lucas", "Hannah", "Omar", "Sofia",
+    "Daniel", "Aisha", "Noah", "Mei", "Gabriel", "Ingrid", "Ravi", "Chloe", "Mateo", "Yuki",
+]
+SYLLABLES = ["bar", "cor", "dan", "fel", "gor", "hal", "jin", "kes", "lom", "mar",
+             "nor", "pel", "quin", "ros", "sal", "tor", "vin", "wes", "yar", "zel"]
+COMPANY_WORDS = ["Bright", "Loop", "Stack", "Harbor", "Pilot", "Nova", "Grid", "Relay", "Forge", "Atlas",
+                 "Quill", "Ember", "Cobalt", "Vector", "Summit", "Lumen"]
+TITLES = ["Founder/CEO", "Founder/CTO", "Co-Founder", "Founder/COO", "Co-Founder/President"]
+
+# How often each kind of founder shows up, in percent
+KINDS = [
+    ("no_page", 30),         # search finds no Wikipedia article
+    ("match", 45),           # clear match, decided by the pre-verifier
+    ("other_person", 10),    # an athlete with the same name
+    ("ambiguous", 10),       # thin summary, left to the model
+    ("disambiguation", 5),   # name is a disambiguation page
+]
+
+SECTION_BODY = (
+    "{name} worked on {topic} at {company}, where the team grew the product from an early "
+    "prototype to a business serving thousands of customers. "
+)
+ARTICLE_SECTIONS = ["Early life and education", "Career", "Founding of {company}", "Investments",
+                    "Personal life", "Awards and recognition", "See also", "References"]
+
+
+def _unit(*parts) -> float:
+    """Deterministic value in [0, 1) for a tuple of parts"""
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+    return int(digest[:12], 16) / float(1 << 48)
+
+
+class SyntheticFounders:
+    """
+    Deterministic synthetic founders and the service responses about them.
+
+    Row i is always the same person, and a share of rows repeat an earlier
+    founder under another company with the same LinkedIn profile, so entity
+    resolution has something to merge.
+    """
+
+    def __init__(self, count: int, seed: int = 0, duplicate_rate: float = 0.03, article_sections: int = 8):
+        self.count = count
+        self.seed = seed
+        self.duplicate_rate = duplicate_rate
+        self.article_sections = article_sections
+        self._by_name = None
+        self._companies = None
+        # Share of articles edited since the first run, see edit()
+        self.edit_rate = 0.0
+
+    def edit(self, rate: float):
+        """Give a share of the articles a new revision with changed content"""
+        self.edit_rate = rate
+
+    def edited(self, person: int) -> bool:
+        return _unit(self.seed, "edit", person) < self.edit_rate
+
+    def person_of(self, i: int) -> int:
+        """Index of the person row i refers to"""
+        if i > 0 and _unit(self.seed, "dup", i) < self.duplicate_rate:
+            return int(_unit(self.seed, "dup-of", i) * i)
+        return i
+
+    def name(self, person: int) -> str:
+        first = FIRST_NAMES[person % len(FIRST_NAMES)]
+        n, last = person // len(FIRST_NAMES), ""
+        while True:
+            last += SYLLABLES[n % len(SYLLABLES)]
+            n //= len(SYLLABLES)
+            if n == 0:
+                break
+        return f"{first} {last.capitalize()}"
+
+    def company(self, i: int) -> str:
+        a = COMPANY_WORDS[int(_unit(self.seed, "co1", i) * len(COMPANY_WORDS))]
+        b = COMPANY_WORDS[int(_unit(self.seed, "co2", i) * len(COMPANY_WORDS))]
+        return f"{a}{b.lower()} {i % 97}"
+
+    def kind(self, person: int) -> str:
+        roll = _unit(self.seed, "kind", person) * 100
+        for kind, share in KINDS:
+            if roll < share:
+                return kind
+            roll -= share
+        return KINDS[-1][0]
+
+    def row(self, i: int) -> dict:
+        person = self.person_of(i)
+        name = self.name(person)
+        handle = name.lower().replace(" ", "-") + f"-{person}"
+        return {
+            "Founder Name": name,
+            "Title": "",
+            "Company Founded": self.company(i),
+            "Description": TITLES[i % len(TITLES)],
+            "LinkedIn Profile": f"https://www.linkedin.com/in/{handle}",
+            "Twitter Profile": "",
+        }
+
+    def write_csv(self, path: str):
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=list(self.row(0)))
+            writer.writeheader()
+            for i in range(self.count):
+                writer.writerow(self.row(i))
+
+    def _index(self):
+        if self._by_name is None:
+            by_name, companies = {}, defaultdict(list)
+            for i in range(self.count):
+                person = self.person_of(i)
+                by_name.setdefault(self.name(person), person)
+                companies[person].append(self.company(i))
+            self._by_name, self._companies = by_name, companies
+
+    def find(self, name: str):
+        """Person index for a founder name, or None"""
+        self._index()
+        return self._by_name.get(" ".join(name.split()))
+
+    def companies(self, person: int) -> list:
+        """Every company a person appears under, in row order"""
+        self._index()
+        return self._companies[person]
+
+    # Responses
+
+    def search_results(self, query: str) -> list:
+        name = re.sub(r"\s+wikipedia$", "", query.strip(), flags=re.IGNORECASE)
+        person = self.find(name)
+        slug = quote(name.replace(" ", "_"))
+        results = [
+            {"title": f"{name} - LinkedIn", "url": f"https://www.linkedin.com/in/{slug}",
+             "content": f"{name} profile", "score": 0.9},
+            {"title": f"{name} - Crunchbase", "url": f"https://www.crunchbase.com/person/{slug}",
+             "content": f"{name} person profile", "score": 0.8},
+        ]
+        if person is not None and self.kind(person) != "no_page":
+            results.insert(0, {"title": f"{name} - Wikipedia", "url": f"https://en.wikipedia.org/wiki/{slug}",
+                               "content": f"{name} is an entrepreneur.", "score": 0.95})
+        return results
+
+    def title_of(self, pageid: int) -> str:
+        """Title of the page with a page id from page()"""
+        person, qualified = divmod(pageid - 1000, 2)
+        if not 0 <= person < self.count:
+            return ""
+        return self.name(person) + (" (businessman)" if qualified else "")
+
+    def page(self, title: str, intro_only: bool) -> dict:
+        """formatversion=2 page object for a title"""
+        qualified = re.fullmatch(r"(.+) \(businessman\)", title)
+        person = self.find(qualified.group(1) if qualified else title)
+        if person is None:
+            return {"title": title, "missing": True}
+        kind = self.kind(person)
+        if kind == "no_page" or (qualified and kind != "disambiguation"):
+            return {"title": title, "missing": True}
+
+        edited = self.edited(person)
+        page = {"pageid": 1000 + person * 2 + bool(qualified), "ns": 0, "title": title,
+                "lastrevid": 500000 + person * 7 + bool(qualified) + edited * 3}
+        name = self.name(person)
+        if kind == "disambiguation" and not qualified:
+            page["pageprops"] = {"disambiguation": ""}
+            page["extract"] = f"{name} may refer to:\n{name} (businessman)\n{name} (footballer)"
+            page["links"] = [{"ns": 0, "title": f"{name} (businessman)"}, {"ns": 0, "title": f"{name} (footballer)"}]
+            return page
+
+        company = self.companies(person)[0]
+        if kind == "other_person":
+            lead = f"{name} is a professional footballer who plays as a midfielder for a club in the national league."
+        elif kind == "ambiguous":
+            lead = f"{name} is an American engineer."
+        else:
+            lead = (f"{name} is an American entrepreneur and technology executive. {name.split()[0]} is the "
+                    f"founder and CEO of {company}, a venture-backed startup company.")
+        if edited:
+            lead += f" In 2024 {company} raised a Series B."
+        if intro_only:
+            page["extract"] = lead
+            return page
+
+        parts = [lead]
+        for section in ARTICLE_SECTIONS[:self.article_sections]:
+            heading = section.format(company=company)
+            body = "" if heading in ("See also", "References") else \
+                SECTION_BODY.format(name=name, topic=heading.lower(), company=company) * 6
+            parts.append(f"\n\n== {heading} ==\n{body}")
+        page["extract"] = "".join(parts)
+        return page
+
+    def profile(self, name: str) -> dict:
+        person = self.find(name)
+        company = self.companies(person)[0] if person is not None else "Unknown"
+        return {
+            "short_description": f"Founder and CEO of {company}",
+            "education": {"degree": "BS", "institution": "State University", "field": "Computer Science"},
+            "career": {
+                "current_role": {"title": "CEO", "company": company, "description": "Leads the company",
+                                 "duration": "2019 - Present", "achievements": ["Raised a Series A"]},
+                "experience": [
+                    {"company": "Previous Corp", "roles": [
+                        {"title": "Software Engineer", "duration": "2014 - 2019", "description": "Built systems",
+                         "responsibilities": ["Backend services"], "achievements": ["Shipped v2"]}
+                    ]}
+                ],
+                "total_years_experience": "10",
+            },
+        }
+
+    def verify_answer(self, name: str) -> bool:
+        """Whether the fake LLM accepts the page found for a name"""
+        person = self.find(name)
+        if person is None:
+            return False
+        kind = self.kind(person)
+        return kind == "match" or (kind == "ambiguous" and _unit(self.seed, "verify", person) < 0.5)
+
+    def local_answer(self, name: str) -> tuple:
+        """
+        (match, confidence) from the fake local model: as sure as the remote
+        one on clear cases, a coin toss at 0.6 on ambiguous ones
+        """
+        person = self.find(name)
+        if person is None or self.kind(person) != "ambiguous":
+            match = self.verify_answer(name)
+            return match, 0.9 if match else 0.1
+        match = _unit(self.seed, "local", person) < 0.5
+        return match, 0.6 if match else 0.4
+
+
+class ServiceStats:
+    """Per-stage request counts, latencies, injected failures and token usage"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.latencies = defaultdict(list)
+            self.failures = defaultdict(int)
+            self.tokens = {"prompt": 0, "completion": 0}
+
+    def record(self, stage: str, seconds: float):
+        with self._lock:
+            self.latencies[stage].append(seconds)
+
+    def fail(self, stage: str, status: int):
+        with self._lock:
+            self.failures[f"{stage} {status}"] += 1
+
+    def add_tokens(self, prompt: int, completion: int):
+        with self._lock:
+            self.tokens["prompt"] += prompt
+            self.tokens["completion"] += completion
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "latencies": {stage: list(values) for stage, values in self.latencies.items()},
+                "failures": dict(self.failures),
+                "tokens": dict(self.tokens),
+            }
+
+
+class FakeServices:
+    """
+    One local HTTP server standing in for Tavily, the MediaWiki API, the
+    OpenAI chat completions, files and batches APIs and Ollama's chat API.
+
+    Every request sleeps for its service's latency (jittered +-50%) and then
+    fails with a 500 at error_rate or a 429 at rate_limit_rate. Latency and
+    failures are recorded per stage as seen by the server. A share of
+    verify-and-extract answers, invalid_rate, fail schema validation until
+    repaired, and as many local model answers are invalid. A batch completes
+    on the first status check after its "batch" latency; its requests fail
+    at the same rates, as error lines rather than HTTP errors.
+    """
+
+    def __init__(self, founders: SyntheticFounders, latency_ms: dict = None,
+                 error_rate: float = 0.0, rate_limit_rate: float = 0.0, invalid_rate: float = 0.0,
+                 seed: int = 0):
+        self.founders = founders
+        # Build the name index now rather than in the first request's thread
+        founders.find("")
+        self.latency_ms = {"tavily": 300, "wiki": 80, "openai": 800, "batch": 5000, "ollama": 400, **(latency_ms or {})}
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.invalid_rate = invalid_rate
+        self.stats = ServiceStats()
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self._files = {}
+        self._batches = {}
+        self._batch_lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def env(self) -> dict:
+        """Environment that points the pipeline's clients at this server"""
+        return {
+            "TAVILY_API_URL": f"{self.base_url}/tavily",
+            "TAVILY_API_KEY": "tvly-benchmark",
+            "WIKI_API_URL": f"{self.base_url}/wiki/w/api.php",
+            # High enough that the fakes' injected 429s, not our own limits, drive throttling
+            "RATE_LIMITS": json.dumps({
+                "openai": {"requests_per_minute": 600000, "tokens_per_minute": 10 ** 10, "max_concurrency": 256},
+                "tavily": {"requests_per_minute": 600000, "max_concurrency": 256},
+                "wikipedia": {"requests_per_minute": 600000, "max_concurrency": 256},
+                "ollama": {"requests_per_minute": 600000, "max_concurrency": 256},
+            }),
+            "OLLAMA_HOST": f"{self.base_url}/ollama",
+            "OPENAI_BASE_URL": f"{self.base_url}/openai/v1",
+            "OPENAI_API_BASE": f"{self.base_url}/openai/v1",
+            "OPENAI_API_KEY": "sk-benchmark",
+        }
+
+    def start(self):
+        services = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                services._handle(self, "GET")
+
+            def do_POST(self):
+                services._handle(self, "POST")
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def _roll(self) -> float:
+        with self._random_lock:
+            return self._random.random()
+
+    def _handle(self, request, method: str):
+        started = time.perf_counter()
+        url = urlparse(request.path)
+        body = b""
+        if method == "POST":
+            body = request.rfile.read(int(request.headers.get("Content-Length") or 0))
+
+        if url.path.startswith("/tavily"):
+            service = "tavily"
+        elif url.path.startswith("/wiki"):
+            service = "wiki"
+        elif url.path.startswith("/openai"):
+            service = "openai"
+        elif url.path.startswith("/ollama"):
+            service = "ollama"
+        else:
+            return self._send(request, 404, {"error": "unknown service"})
+
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        if service == "openai" and re.search(r"/v1/(files|batches)", url.path):
+            stage, handler = self._batch_route(method, url.path, request.headers.get("Content-Type", ""), body)
+        else:
+            stage, handler = self._route(service, url.path, params, body)
+        time.sleep(self.latency_ms[service] / 1000 * (0.5 + self._roll()))
+
+        roll = self._roll()
+        if roll < self.error_rate:
+            self.stats.fail(stage, 500)
+            status, payload, headers = 500, {"error": {"message": "injected server error"}}, {}
+        elif roll < self.error_rate + self.rate_limit_rate:
+            self.stats.fail(stage, 429)
+            status, payload, headers = 429, {"error": {"message": "injected rate limit"}}, {"Retry-After": "1"}
+        else:
+            status, payload, headers = 200, handler(), {}
+        self._send(request, status, payload, headers)
+        self.stats.record(stage, time.perf_counter() - started)
+
+    def _route(self, service: str, path: str, params: dict, body: bytes):
+        """(stage name, response builder) for a request"""
+        if service == "tavily":
+            query = json.loads(body or b"{}").get("query", "")
+            return "tavily.search", lambda: {"query": query, "results": self.founders.search_results(query)}
+
+        if service == "wiki":
+            props = params.get("prop", "")
+            if props == "links":
+                stage = "wiki.links"
+            elif "extracts" not in props:
+                stage = "wiki.info"
+            elif "|" in params.get("titles", "") or "exintro" in params:
+                stage = "wiki.summary"
+            else:
+                stage = "wiki.page"
+            return stage, lambda: self._wiki_query(params)
+
+        request = json.loads(body or b"{}")
+        prompt = "\n".join(str(message.get("content", "")) for message in request.get("messages", []))
+        if service == "ollama":
+            return "ollama.verify_extract", lambda: self._ollama_chat(request, prompt)
+        if "did not pass validation" in prompt:
+            return "openai.repair", lambda: self._completion(request, prompt, self._repair(prompt))
+        return "openai.verify_extract", lambda: self._completion(request, prompt, self._decision(prompt))
+
+    def _batch_route(self, method: str, path: str, content_type: str, body: bytes):
+        """(stage name, response builder) for the files and batches endpoints"""
+        if method == "POST" and path.endswith("/files"):
+            return "openai.files.upload", lambda: self._upload(content_type, body)
+        match = re.search(r"/files/([^/]+)/content$", path)
+        if match:
+            return "openai.files.content", lambda: self._files[match.group(1)]["data"]
+        if method == "POST" and path.endswith("/batches"):
+            return "openai.batches.create", lambda: self._create_batch(json.loads(body or b"{}"))
+        batch_id = path.rstrip("/").rsplit("/", 1)[-1]
+        return "openai.batches.retrieve", lambda: self._retrieve_batch(batch_id)
+
+    def _store_file(self, data: bytes, filename: str, purpose: str) -> dict:
+        with self._batch_lock:
+            file_id = f"file-bench{len(self._files)}"
+            info = {"id": file_id, "object": "file", "bytes": len(data), "created_at": int(time.time()),
+                    "filename": filename, "purpose": purpose, "status": "processed"}
+            self._files[file_id] = {"info": info, "data": data}
+        return info
+
+    def _upload(self, content_type: str, body: bytes) -> dict:
+        message = BytesParser(policy=HTTP).parsebytes(
+            f"Content-Type: {content_type}\r\n\r\n".encode("utf-8") + body)
+        fields = {part.get_param("name", header="content-disposition"): part for part in message.iter_parts()}
+        upload = fields["file"]
+        purpose = fields["purpose"].get_payload(decode=True).decode("utf-8") if "purpose" in fields else "batch"
+        return self._store_file(upload.get_payload(decode=True), upload.get_filename() or "upload.jsonl", purpose)
+
+    def _create_batch(self, request: dict) -> dict:
+        now = int(time.time())
+        with self._batch_lock:
+            batch = {
+                "id": f"batch_bench{len(self._batches)}",
+                "object": "batch",
+                "endpoint": request.get("endpoint", "/v1/chat/completions"),
+                "input_file_id": request["input_file_id"],
+                "completion_window": request.get("completion_window", "24h"),
+                "status": "in_progress",
+                "output_file_id": None,
+                "error_file_id": None,
+                "created_at": now,
+                "in_progress_at": now,
+                "completed_at": None,
+                "request_counts": {"total": 0, "completed": 0, "failed": 0},
+                "metadata": request.get("metadata"),
+            }
+            self._batches[batch["id"]] = {"batch": batch,
+                                          "due": time.monotonic() + self.latency_ms["batch"] / 1000}
+        return batch
+
+    def _retrieve_batch(self, batch_id: str) -> dict:
+        with self._batch_lock:
+            entry = self._batches[batch_id]
+            due = entry["batch"]["status"] == "in_progress" and time.monotonic() >= entry["due"]
+            if due:
+                entry["batch"]["status"] = "finalizing"
+        if due:
+            self._run_batch(entry["batch"])
+        return entry["batch"]
+
+    def _run_batch(self, batch: dict):
+        """Answer every request of a batch, splitting them into output and error files"""
+        outputs, errors = [], []
+        for idx, line in enumerate(self._files[batch["input_file_id"]]["data"].decode("utf-8").splitlines()):
+            if not line.strip():
+                continue
+            started = time.perf_counter()
+            request = json.loads(line)
+            record = {"id": f"batch_req_{idx}", "custom_id": request["custom_id"], "response": None, "error": None}
+            if self._roll() < self.error_rate + self.rate_limit_rate:
+                self.stats.fail("openai.batch_request", 500)
+                record["error"] = {"code": "server_error", "message": "injected batch request failure"}
+                errors.append(record)
+                continue
+            body = request["body"]
+            prompt = "\n".join(str(message.get("content", "")) for message in body.get("messages", []))
+            record["response"] = {"status_code": 200, "request_id": f"req_bench{idx}",
+                                  "body": self._completion(body, prompt, self._decision(prompt))}
+            outputs.append(record)
+            self.stats.record("openai.batch_request", time.perf_counter() - started)
+
+        def store(records, suffix):
+            if not records:
+                return None
+            data = "".join(json.dumps(record) + "\n" for record in records).encode("utf-8")
+            return self._store_file(data, f"{batch['id']}_{suffix}.jsonl", "batch_output")["id"]
+
+        output_file_id, error_file_id = store(outputs, "output"), store(errors, "error")
+        with self._batch_lock:
+            batch.update({
+                "status": "completed",
+                "output_file_id": output_file_id,
+                "error_file_id": error_file_id,
+                "completed_at": int(time.time()),
+                "request_counts": {"total": len(outputs) + len(errors), "completed": len(outputs),
+                                   "failed": len(errors)},
+            })
+
+    def _wiki_query(self, params: dict) -> dict:
+        intro_only = "exintro" in params or "extracts" not in params.get("prop", "")
+        pages = []
+        titles = params.get("titles", "").split("|")
+        if "pageids" in params:
+            titles = [self.founders.title_of(int(pageid)) for pageid in params["pageids"].split("|")]
+        for title in titles:
+            page = self.founders.page(title, intro_only)
+            if "extracts" not in params.get("prop", ""):
+                page.pop("extract", None)
+            if "links" not in params.get("prop", ""):
+                page.pop("links", None)
+            pages.append(page)
+        return {"batchcomplete": True, "query": {"pages": pages}}
+
+    def _decision(self, prompt: str) -> str:
+        name = re.search(r"Person's Name: (.+)", prompt)
+        name = name.group(1).strip() if name else ""
+        match = self.founders.verify_answer(name)
+        decision = {"match": match, "confidence": 0.9 if match else 0.2,
+                    "profile": self.founders.profile(name) if match else None}
+        if self._roll() < self.invalid_rate:
+            # A confidence the schema rejects, for the repair call to fix
+            decision["confidence"] = "high" if match else "low"
+        return json.dumps(decision, indent=2)
+
+    def _local_decision(self, prompt: str) -> str:
+        name = re.search(r"Person's Name: (.+)", prompt)
+        name = name.group(1).strip() if name else ""
+        match, confidence = self.founders.local_answer(name)
+        if self._roll() < self.invalid_rate:
+            # Small models drop required fields more often than they mistype them
+            return json.dumps({"match": match, "confidence": confidence})
+        return json.dumps({"match": match, "confidence": confidence,
+                           "profile": self.founders.profile(name) if match else None}, indent=2)
+
+    def _ollama_chat(self, request: dict, prompt: str) -> bytes:
+        # The whole answer as the one and final line of an NDJSON stream
+        content = self._local_decision(prompt)
+        line = {
+            "model": request.get("model", "llama3.1:8b"),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "message": {"role": "assistant", "content": content},
+            "done": True,
+            "done_reason": "stop",
+            "prompt_eval_count": len(prompt) // 4 + 1,
+            "eval_count": len(content) // 4 + 1,
+        }
+        return json.dumps(line).encode("utf-8") + b"\n"
+
+    def _repair(self, prompt: str) -> str:
+        output = re.search(r"Your response:\s*(\{.*\})\s*Return only", prompt, re.S)
+        decision = json.loads(output.group(1)) if output else {"match": False, "profile": None}
+        decision["confidence"] = 0.9 if decision.get("match") else 0.2
+        return json.dumps(decision, indent=2)
+
+    def _completion(self, request: dict, prompt: str, content: str) -> dict:
+        # Roughly four characters per token, like the section selector's fallback
+        prompt_tokens, completion_tokens = len(prompt) // 4 + 1, len(content) // 4 + 1
+        self.stats.add_tokens(prompt_tokens, completion_tokens)
+        return {
+            "id": f"chatcmpl-bench{int(time.time() * 1000)}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "gpt-4o-mini"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                         "logprobs": None, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        }
+
+    @staticmethod
+    def _send(request, status: int, payload, headers: dict = None):
+        # File contents go out as they were stored, everything else as JSON
+        raw = isinstance(payload, bytes)
+        data = payload if raw else json.dumps(payload).encode("utf-8")
+        request.send_response(status)
+        request.send_header("Content-Type", "application/octet-stream" if raw else "application/json")
+        request.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            request.send_header(key, value)
+        request.end_headers()
+        request.wfile.write(data)
@@ -0,0 +1,135 @@
+# Runs the enrichment pipeline once over a benchmark dataset. run_benchmark.py
+# starts it in its own process with every client pointed at the fake services,
+# so the peak RSS it reports is the pipeline's alone.
+import argparse
+import asyncio
+import csv
+import json
+import os
+import resource
+import sys
+import time
+
+AGENTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "agents")
+sys.path.insert(0, AGENTS_DIR)
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def classify(result: dict) -> str:
+    if result.get("error"):
+        return "error"
+    return "no_match" if result.get("match") is False else "matched"
+
+
+def use_work_dir(args):
+    """Point process_founders' files into the run's work directory"""
+    import process_founders
+
+    process_founders.INPUT_CSV = args.input
+    process_founders.OUTPUT_JSON = os.path.join(args.work_dir, "founders_wiki_data.json")
+    process_founders.RESULTS_JOURNAL = os.path.join(args.work_dir, "founders_wiki_data.jsonl")
+    process_founders.QUEUE_DB = os.path.join(args.work_dir, "processed_rows.sqlite")
+    process_founders.TRACKER_FILE = os.path.join(args.work_dir, "no_legacy_tracker.json")
+    process_founders.BATCH_FILE = os.path.join(args.work_dir, "extraction_batch.jsonl")
+    return process_founders
+
+
+def run_process(args) -> dict:
+    """
+    Run process_founders end to end: work queue, journal, entity resolution.
+    In batch mode the run only verifies, then the extractions go through the
+    fake Batch API and are ingested.
+    """
+    from batch_extraction import ExtractionBatch
+    from wikipedia_lookup_agent import get_engine
+    from work_queue import WorkQueue
+
+    process_founders = use_work_dir(args)
+    if args.mode == "batch":
+        process_founders.BATCH = ExtractionBatch(process_founders.BATCH_FILE, model=get_engine().model_name)
+
+    started = time.perf_counter()
+    if args.concurrency > 1:
+        asyncio.run(process_founders.process_founders_async(args.concurrency))
+    else:
+        process_founders.process_founders()
+    if args.mode == "batch":
+        process_founders.BATCH.close()
+        process_founders.ingest_batch(poll_interval=0.5)
+    elapsed = time.perf_counter() - started
+
+    queue = WorkQueue(process_founders.QUEUE_DB)
+    counts = queue.counts()
+    queue.close()
+    return {"elapsed": elapsed, "rows": sum(counts.values()), "outcomes": counts}
+
+
+def run_refresh(args) -> dict:
+    """Refresh the profiles of an earlier process run in the same work directory"""
+    process_founders = use_work_dir(args)
+    started = time.perf_counter()
+    counts = process_founders.refresh_profiles(args.concurrency)
+    elapsed = time.perf_counter() - started
+    return {"elapsed": elapsed, "rows": sum(counts.values()), "outcomes": counts}
+
+
+def run_lookup(args) -> dict:
+    """Call lookup() for every row, without the queue and journal around it"""
+    from process_founders import build_description
+    from wikipedia_lookup_agent import get_engine
+
+    with open(args.input, 'r') as f:
+        people = [
+            (row["Founder Name"], build_description(row),
+             {"title": row["Title"], "company": row["Company Founded"], "description": row["Description"]})
+            for row in csv.DictReader(f)
+        ]
+
+    started = time.perf_counter()
+    results = get_engine().lookup_many(people, max_workers=args.concurrency)
+    elapsed = time.perf_counter() - started
+
+    outcomes = {}
+    for result in results:
+        outcome = classify(result)
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+    return {"elapsed": elapsed, "rows": len(people), "outcomes": outcomes}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark driver, started by run_benchmark.py")
+    parser.add_argument("--mode", choices=["process", "batch", "lookup", "refresh"], default="process")
+    parser.add_argument("--input", required=True, help="Synthetic founders CSV")
+    parser.add_argument("--work-dir", required=True, help="Directory for the run's queue, journal and caches")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--result-file", required=True)
+    parser.add_argument("--local-model", help="Route verify-and-extract through this local model first")
+    parser.add_argument("--audit-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    from response_cache import configure_cache
+    from tracing import configure_tracer
+    from model_router import ModelRouter
+    from wikipedia_lookup_agent import configure_engine
+
+    # A fresh cache per run: repeats within the run hit it, nothing carries over
+    configure_cache(mode="read-write", path=os.path.join(args.work_dir, "responses.sqlite"))
+    router = ModelRouter(args.local_model, audit_rate=args.audit_rate) if args.local_model else None
+    configure_engine(defer_extraction=args.mode == "batch", router=router)
+    tracer = configure_tracer(trace_path=os.path.join(args.work_dir, "lookup_trace.jsonl"),
+                              metrics_path=os.path.join(args.work_dir, "lookup_metrics.prom"))
+
+    runs = {"lookup": run_lookup, "refresh": run_refresh}
+    report = runs.get(args.mode, run_process)(args)
+    tracer.close()
+    report["peak_rss_mb"] = peak_rss_mb()
+    report["client_stages"] = tracer.stage_stats()
+    if router is not None:
+        report["router"] = router.stats
+    with open(args.result_file, 'w') as f:
+        json.dump(report, f, indent=2)
@@ -0,0 +1,178 @@
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from fake_services import FakeServices, SyntheticFounders
+
+DRIVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pipeline_driver.py")
+
+
+def percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def run_size(size: int, args) -> dict:
+    """Generate a dataset, run the pipeline over it against fresh fake services and collect metrics"""
+    # Every run starts from an empty queue, journal and response cache
+    work_dir = os.path.join(args.work_dir, f"{args.mode}-{size}")
+    shutil.rmtree(work_dir, ignore_errors=True)
+    os.makedirs(work_dir)
+
+    founders = SyntheticFounders(size, seed=args.seed, duplicate_rate=args.duplicate_rate)
+    input_csv = os.path.join(work_dir, "founders.csv")
+    founders.write_csv(input_csv)
+
+    latency = {"tavily": args.tavily_latency * args.latency_scale,
+               "wiki": args.wiki_latency * args.latency_scale,
+               "openai": args.openai_latency * args.latency_scale,
+               "batch": args.batch_latency * args.latency_scale,
+               "ollama": args.ollama_latency * args.latency_scale}
+    services = FakeServices(founders, latency_ms=latency, error_rate=args.error_rate,
+                            rate_limit_rate=args.rate_limit_rate, invalid_rate=args.invalid_rate,
+                            seed=args.seed).start()
+    result_file = os.path.join(work_dir, "driver_result.json")
+
+    def drive(mode: str, log_name: str):
+        command = [sys.executable, DRIVER, "--mode", mode, "--input", input_csv,
+                   "--work-dir", work_dir, "--concurrency", str(args.concurrency),
+                   "--result-file", result_file]
+        if args.local_model:
+            command += ["--local-model", args.local_model, "--audit-rate", str(args.audit_rate)]
+        print(f"Running {mode} over {size} founders (log: {work_dir}/{log_name})")
+        with open(os.path.join(work_dir, log_name), 'w') as log:
+            returncode = subprocess.call(command, env={**os.environ, **services.env()},
+                                         stdout=log, stderr=subprocess.STDOUT)
+        if returncode != 0:
+            raise RuntimeError(f"Pipeline exited with code {returncode}, see {work_dir}/{log_name}")
+
+    try:
+        if args.mode == "refresh":
+            # A full run to refresh, then edits to some of its articles; only the refresh is measured
+            drive("process", "initial.log")
+            founders.edit(args.edit_rate)
+            services.stats.reset()
+        drive(args.mode, "pipeline.log")
+        stats = services.stats.snapshot()
+    finally:
+        services.stop()
+
+    with open(result_file, 'r') as f:
+        driver = json.load(f)
+    rows = driver["rows"] or 1
+    stages = {
+        stage: {
+            "calls": len(values),
+            "calls_per_founder": len(values) / rows,
+            "p50_ms": percentile(values, 50) * 1000,
+            "p95_ms": percentile(values, 95) * 1000,
+        }
+        for stage, values in sorted(stats["latencies"].items())
+    }
+    return {
+        "size": size,
+        "mode": args.mode,
+        "rows": driver["rows"],
+        "elapsed_s": driver["elapsed"],
+        "founders_per_min": driver["rows"] / driver["elapsed"] * 60 if driver["elapsed"] else 0.0,
+        "peak_rss_mb": driver["peak_rss_mb"],
+        "calls_per_founder": sum(stage["calls"] for stage in stages.values()) / rows,
+        "tokens_per_founder": {kind: count / rows for kind, count in stats["tokens"].items()},
+        "stages": stages,
+        "injected_failures": stats["failures"],
+        "outcomes": driver["outcomes"],
+        "client_stages": driver.get("client_stages", {}),
+        "router": driver.get("router"),
+    }
+
+
+def format_report(report: dict) -> str:
+    lines = [
+        f"{report['mode']} x {report['size']}: {report['founders_per_min']:.0f} founders/min "
+        f"({report['elapsed_s']:.1f}s), peak RSS {report['peak_rss_mb']:.0f} MB, "
+        f"{report['calls_per_founder']:.2f} calls/founder, "
+        f"{report['tokens_per_founder']['prompt']:.0f}+{report['tokens_per_founder']['completion']:.0f} "
+        f"tokens/founder",
+        f"  {'service stage':<16}{'calls':>9}{'/founder':>10}{'p50 ms':>10}{'p95 ms':>10}",
+    ]
+    for stage, values in report["stages"].items():
+        lines.append(f"  {stage:<16}{values['calls']:>9}{values['calls_per_founder']:>10.2f}"
+                     f"{values['p50_ms']:>10.0f}{values['p95_ms']:>10.0f}")
+    if report["client_stages"]:
+        lines.append(f"  {'pipeline stage':<16}{'calls':>9}{'/founder':>10}{'p50 ms':>10}{'p95 ms':>10}"
+                     f"{'tokens/founder':>16}")
+        for stage, values in report["client_stages"].items():
+            tokens = (values["prompt_tokens"] + values["completion_tokens"]) / (report["rows"] or 1)
+            lines.append(f"  {stage:<16}{values['calls']:>9}{values['calls'] / (report['rows'] or 1):>10.2f}"
+                         f"{values['p50_ms']:>10.0f}{values['p95_ms']:>10.0f}{tokens:>16.0f}")
+    if report["injected_failures"]:
+        failures = ", ".join(f"{key}: {count}" for key, count in sorted(report["injected_failures"].items()))
+        lines.append(f"  injected failures: {failures}")
+    if report.get("router"):
+        router = report["router"]
+        routed = router["local"] + router["remote_only"]
+        lines.append(f"  router: {router['kept']} of {routed} kept local, "
+                     f"{router['local_error'] + router['invalid'] + router['low_confidence']} escalated "
+                     f"({router['local_error']} errors, {router['invalid']} invalid, "
+                     f"{router['low_confidence']} low confidence), {router['remote_only']} remote only, "
+                     f"{router['audited']} audited, agreed on {router['agreed']} of {router['compared']}")
+    lines.append(f"  outcomes: {', '.join(f'{key}={count}' for key, count in report['outcomes'].items() if count)}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the enrichment pipeline offline against local Tavily, MediaWiki and OpenAI fakes")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="Synthetic dataset sizes to run (default: 1000 10000 100000)")
+    parser.add_argument("--mode", choices=["process", "batch", "lookup", "refresh"], default="process",
+                        help="process runs process_founders end to end, batch does the same with extraction "
+                             "through the Batch API, lookup calls lookup() per row, refresh measures a "
+                             "--refresh run after a process run and some article edits")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--tavily-latency", type=float, default=300, help="Mean Tavily latency in ms")
+    parser.add_argument("--wiki-latency", type=float, default=80, help="Mean MediaWiki latency in ms")
+    parser.add_argument("--openai-latency", type=float, default=800, help="Mean chat completion latency in ms")
+    parser.add_argument("--ollama-latency", type=float, default=400,
+                        help="Mean local model latency in ms")
+    parser.add_argument("--batch-latency", type=float, default=5000,
+                        help="Time from creating a batch until it reports completed, in ms")
+    parser.add_argument("--latency-scale", type=float, default=1.0,
+                        help="Multiply every latency, e.g. 0.05 for quick large runs")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with a 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Share of requests answered with a 429")
+    parser.add_argument("--invalid-rate", type=float, default=0.0,
+                        help="Share of model answers that fail schema validation and need a repair call")
+    parser.add_argument("--local-model",
+                        help="Route verify-and-extract through this model on the fake Ollama server first")
+    parser.add_argument("--audit-rate", type=float, default=0.0,
+                        help="Share of kept local answers also sent to the remote model")
+    parser.add_argument("--edit-rate", type=float, default=0.02,
+                        help="Share of articles edited between the process run and the refresh in refresh mode")
+    parser.add_argument("--duplicate-rate", type=float, default=0.03,
+                        help="Share of rows repeating an earlier founder under another company")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--work-dir", default=os.path.join(tempfile.gettempdir(), "founders_benchmark"),
+                        help="Where datasets, queues and logs of each run go")
+    parser.add_argument("--output", help="Also write the reports as JSON to this file")
+    args = parser.parse_args()
+
+    reports = []
+    for size in args.sizes:
+        started = time.perf_counter()
+        report = run_size(size, args)
+        reports.append(report)
+        print(format_report(report))
+        print(f"  (wall time including dataset generation: {time.perf_counter() - started:.1f}s)\n")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({"settings": vars(args), "reports": reports}, f, indent=2)
+        print(f"Wrote {args.output}")
@@ -0,0 +1,267 @@
+import json
+import os
+import sqlite3
+from typing import Dict, Iterable, List, Tuple
+
+# Normalized schema shared by every backend: table -> (column, type) pairs.
+# achievements holds both achievements and responsibilities, told apart by
+# "kind"; a NULL role_id means the founder's current role.
+SCHEMA = {
+    "founders": [
+        ("founder_id", "INTEGER"),
+        ("founder_name", "TEXT"),
+        ("short_description", "TEXT"),
+        ("current_role_title", "TEXT"),
+        ("current_role_company", "TEXT"),
+        ("current_role_description", "TEXT"),
+        ("current_role_duration", "TEXT"),
+        ("total_years_experience", "TEXT"),
+        ("source_url", "TEXT"),
+    ],
+    "education": [
+        ("founder_id", "INTEGER"),
+        ("degree", "TEXT"),
+        ("institution", "TEXT"),
+        ("field", "TEXT"),
+    ],
+    "experiences": [
+        ("experience_id", "INTEGER"),
+        ("founder_id", "INTEGER"),
+        ("position", "INTEGER"),
+        ("company", "TEXT"),
+    ],
+    "roles": [
+        ("role_id", "INTEGER"),
+        ("experience_id", "INTEGER"),
+        ("founder_id", "INTEGER"),
+        ("position", "INTEGER"),
+        ("title", "TEXT"),
+        ("duration", "TEXT"),
+        ("description", "TEXT"),
+    ],
+    "achievements": [
+        ("founder_id", "INTEGER"),
+        ("role_id", "INTEGER"),
+        ("kind", "TEXT"),
+        ("text", "TEXT"),
+    ],
+}
+
+# Low-cardinality columns stored dictionary-encoded in Parquet
+DICTIONARY_COLUMNS = {"company", "current_role_company", "institution", "degree", "field", "title", "kind"}
+
+SQLITE_INDEXES = [
+    "CREATE INDEX experiences_company ON experiences (company)",
+    "CREATE INDEX experiences_founder ON experiences (founder_id)",
+    "CREATE INDEX education_institution ON education (institution)",
+    "CREATE INDEX education_founder ON education (founder_id)",
+    "CREATE INDEX roles_experience ON roles (experience_id)",
+    "CREATE INDEX roles_title ON roles (title)",
+    "CREATE INDEX achievements_role ON achievements (role_id)",
+    "CREATE UNIQUE INDEX founders_name ON founders (founder_name)",
+]
+
+
+class Normalizer:
+    """
+    Split founder profiles into rows of the normalized tables, keeping
+    every role of every experience. Ids are assigned in input order.
+    """
+
+    def __init__(self):
+        self.founder_id = 0
+        self.experience_id = 0
+        self.role_id = 0
+
+    @staticmethod
+    def text(value) -> str:
+        """
+        A TEXT column value: models write years and counts as numbers, and
+        some fields as lists, which are pipe-joined like the CSV export
+        """
+        if value is None:
+            return ""
+        if isinstance(value, list):
+            return "|".join(Normalizer.text(item) for item in value)
+        if isinstance(value, dict):
+            return json.dumps(value, ensure_ascii=False, sort_keys=True)
+        return str(value)
+
+    def normalize(self, founder_name: str, founder_data: Dict) -> Dict[str, List[Tuple]]:
+        text = self.text
+        self.founder_id += 1
+        founder_id = self.founder_id
+        career = founder_data.get('career', {}) or {}
+        current_role = career.get('current_role', {}) or {}
+
+        tables = {table: [] for table in SCHEMA}
+        tables["founders"].append((
+            founder_id,
+            text(founder_name),
+            text(founder_data.get('short_description', '')),
+            text(current_role.get('title', '')),
+            text(current_role.get('company', '')),
+            text(current_role.get('description', '')),
+            text(current_role.get('duration', '')),
+            text(career.get('total_years_experience', '')),
+            text(founder_data.get('source_url', '')),
+        ))
+
+        education = founder_data.get('education') or []
+        if isinstance(education, dict):
+            education = [education]
+        for entry in education:
+            tables["education"].append((
+                founder_id, text(entry.get('degree', '')), text(entry.get('institution', '')),
+                text(entry.get('field', ''))
+            ))
+
+        for item in current_role.get('achievements', []) or []:
+            tables["achievements"].append((founder_id, None, "achievement", text(item)))
+
+        for exp_position, experience in enumerate(career.get('experience', []) or [], 1):
+            self.experience_id += 1
+            tables["experiences"].append((self.experience_id, founder_id, exp_position,
+                                          text(experience.get('company', ''))))
+            for role_position, role in enumerate(experience.get('roles', []) or [], 1):
+                self.role_id += 1
+                tables["roles"].append((
+                    self.role_id, self.experience_id, founder_id, role_position,
+                    text(role.get('title', '')), text(role.get('duration', '')), text(role.get('description', ''))
+                ))
+                for item in role.get('responsibilities', []) or []:
+                    tables["achievements"].append((founder_id, self.role_id, "responsibility", text(item)))
+                for item in role.get('achievements', []) or []:
+                    tables["achievements"].append((founder_id, self.role_id, "achievement", text(item)))
+        return tables
+
+
+class SQLiteExporter:
+    """Write the normalized tables to a SQLite database with lookup indexes"""
+
+    def __init__(self, path: str, batch_size: int = 1000):
+        self.path = path
+        self.batch_size = batch_size
+
+    def export(self, founders: Iterable[Tuple[str, Dict]]) -> int:
+        tmp_path = self.path + ".tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        conn = sqlite3.connect(tmp_path)
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        for table, columns in SCHEMA.items():
+            conn.execute(f"CREATE TABLE {table} ({', '.join(f'{name} {kind}' for name, kind in columns)})")
+
+        normalizer = Normalizer()
+        pending = {table: [] for table in SCHEMA}
+        count = 0
+        for founder_name, founder_data in founders:
+            for table, rows in normalizer.normalize(founder_name, founder_data).items():
+                pending[table].extend(rows)
+            count += 1
+            if count % self.batch_size == 0:
+                self._flush(conn, pending)
+        self._flush(conn, pending)
+
+        # Building indexes after the bulk load is much cheaper than before it
+        for statement in SQLITE_INDEXES:
+            conn.execute(statement)
+        conn.commit()
+        conn.close()
+        os.replace(tmp_path, self.path)
+        return count
+
+    @staticmethod
+    def _flush(conn, pending: Dict[str, List[Tuple]]):
+        for table, rows in pending.items():
+            if rows:
+                placeholders = ", ".join("?" for _ in SCHEMA[table])
+                conn.executemany(f"INSERT INTO {table} VALUES ({placeholders})", rows)
+                rows.clear()
+        conn.commit()
+
+
+class ParquetExporter:
+    """
+    Write one Parquet file per normalized table into a directory.
+
+    Low-cardinality string columns are dictionary-encoded Arrow columns and
+    rows are written in row groups, so memory stays bounded and readers can
+    prune columns and skip row groups.
+    """
+
+    def __init__(self, directory: str, batch_size: int = 10000):
+        self.directory = directory
+        self.batch_size = batch_size
+
+    @staticmethod
+    def _arrow():
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet export needs pyarrow: pipenv install pyarrow") from None
+        return pa, pq
+
+    def _schemas(self, pa):
+        types = {"INTEGER": pa.int64(), "TEXT": pa.string()}
+        schemas = {}
+        for table, columns in SCHEMA.items():
+            fields = []
+            for name, kind in columns:
+                arrow_type = types[kind]
+                if name in DICTIONARY_COLUMNS:
+                    arrow_type = pa.dictionary(pa.int32(), pa.string())
+                fields.append(pa.field(name, arrow_type))
+            schemas[table] = pa.schema(fields)
+        return schemas
+
+    def export(self, founders: Iterable[Tuple[str, Dict]]) -> int:
+        pa, pq = self._arrow()
+        os.makedirs(self.directory, exist_ok=True)
+        schemas = self._schemas(pa)
+        writers = {
+            table: pq.ParquetWriter(os.path.join(self.directory, f"{table}.parquet.tmp"), schema,
+                                    compression="zstd", use_dictionary=True)
+            for table, schema in schemas.items()
+        }
+
+        def flush(pending):
+            for table, rows in pending.items():
+                if not rows:
+                    continue
+                columns = list(zip(*rows))
+                arrays = [
+                    pa.array(values, type=field.type.value_type).dictionary_encode()
+                    if pa.types.is_dictionary(field.type) else pa.array(values, type=field.type)
+                    for values, field in zip(columns, schemas[table])
+                ]
+                writers[table].write_table(pa.Table.from_arrays(arrays, schema=schemas[table]))
+                rows.clear()
+
+        normalizer = Normalizer()
+        pending = {table: [] for table in SCHEMA}
+        count = 0
+        try:
+            for founder_name, founder_data in founders:
+                for table, rows in normalizer.normalize(founder_name, founder_data).items():
+                    pending[table].extend(rows)
+                count += 1
+                if count % self.batch_size == 0:
+                    flush(pending)
+            flush(pending)
+        finally:
+            for writer in writers.values():
+                writer.close()
+
+        for table in SCHEMA:
+            path = os.path.join(self.directory, f"{table}.parquet")
+            os.replace(path + ".tmp", path)
+        return count
+
+
+EXPORTERS = {
+    "sqlite": SQLiteExporter,
+    "parquet": ParquetExporter,
+}
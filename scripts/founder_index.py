@@ -0,0 +1,480 @@
+import bisect
+import heapq
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from array import array
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from json_to_csv_converter import iter_json_object
+
+# Profile fields with an inverted index
+FIELDS = ("company", "institution", "field", "title")
+SORTS = ("years", "name")
+# Stored for a founder whose total_years_experience could not be read as a number
+UNKNOWN_YEARS = -1.0
+# Anything longer is a calendar year ("since 2008"), not a duration
+MAX_YEARS = 80
+
+NUMBER_RE = re.compile(r"\d+(?:\.\d+)?")
+WORD_NUMBERS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10, "twenty": 20,
+}
+WORD_NUMBER_RE = re.compile(r"\b(" + "|".join(WORD_NUMBERS) + r")\b(?=\s+(?:years?|months?|decades?)\b)")
+MONTHS_RE = re.compile(r"\s*(?:(?:\+|-|–|to)\s*(?:\d+(?:\.\d+)?)?\s*)?months?\b")
+DECADES_RE = re.compile(r"\s*(?:(?:\+|-|–|to)\s*(?:\d+(?:\.\d+)?)?\s*)?decades?\b")
+
+
+def normalize(text: str) -> str:
+    """Lowercase without accents or punctuation, words separated by single spaces"""
+    text = unicodedata.normalize("NFKD", str(text or ""))
+    text = "".join(c for c in text if not unicodedata.combining(c)).casefold()
+    return " ".join(re.sub(r"[\W_]+", " ", text).split())
+
+
+def parse_years(value) -> float:
+    """
+    total_years_experience as a number of years
+
+    Takes the lower bound of a range or an "N+" ("15-20 years" -> 15,
+    "10+ years" -> 10) and converts months and decades ("two decades" -> 20).
+
+    Returns:
+        float: Years, or UNKNOWN_YEARS if the value holds no duration
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        years = float(value)
+    else:
+        text = WORD_NUMBER_RE.sub(lambda m: str(WORD_NUMBERS[m.group(1)]), str(value or "").lower())
+        match = NUMBER_RE.search(text)
+        if match is None:
+            return UNKNOWN_YEARS
+        years = float(match.group())
+        rest = text[match.end():]
+        if MONTHS_RE.match(rest):
+            years /= 12
+        elif DECADES_RE.match(rest):
+            years *= 10
+    return years if 0 <= years <= MAX_YEARS else UNKNOWN_YEARS
+
+
+def iter_profiles(path: str) -> Iterable[Tuple[str, Dict]]:
+    """
+    (founder_name, profile) pairs from founders_wiki_data.json or the .jsonl
+    results journal, where the newest record of a founder wins
+    """
+    if not path.endswith('.jsonl'):
+        yield from iter_json_object(path)
+        return
+    latest = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A crash can leave a partial last line
+                break
+            latest.pop(record['founder_name'], None)
+            latest[record['founder_name']] = record['result']
+    yield from latest.items()
+
+
+class Founder:
+    """The fields of a profile that queries return"""
+    __slots__ = ("founder_id", "name", "short_description", "current_title", "current_company",
+                 "years", "source_url")
+
+    def __init__(self, founder_id: int, name: str, profile: Dict):
+        career = profile.get('career', {}) or {}
+        current_role = career.get('current_role', {}) or {}
+        self.founder_id = founder_id
+        self.name = name
+        self.short_description = profile.get('short_description', '')
+        self.current_title = current_role.get('title', '')
+        self.current_company = current_role.get('company', '')
+        self.years = parse_years(career.get('total_years_experience'))
+        self.source_url = profile.get('source_url', '')
+
+    def to_dict(self) -> Dict:
+        return {
+            "founder_name": self.name,
+            "short_description": self.short_description,
+            "current_role_title": self.current_title,
+            "current_role_company": self.current_company,
+            "total_years_experience": None if self.years == UNKNOWN_YEARS else self.years,
+            "source_url": self.source_url,
+        }
+
+
+class FieldIndex:
+    """
+    Inverted index of one profile field
+
+    Every distinct normalized value gets an id with a posting list of the
+    founders that have it, and every word maps to the ids of the values
+    containing it. A phrase matches the values containing all its words as
+    a run, so "stanford" finds "Stanford University" and "Stanford GSB".
+    """
+    __slots__ = ("values", "labels", "postings", "words", "_ids")
+
+    def __init__(self):
+        self.values = []
+        # The first spelling seen of each value, for display
+        self.labels = []
+        self.postings = []
+        self.words = {}
+        self._ids = {}
+
+    def add(self, text: str, founder_id: int) -> int:
+        """
+        Index a value of a founder, added in founder id order
+
+        Returns:
+            int: Value id, or -1 for an empty value
+        """
+        value = normalize(text)
+        if not value:
+            return -1
+        value_id = self._ids.get(value)
+        if value_id is None:
+            value_id = self._ids[value] = len(self.values)
+            self.values.append(value)
+            self.labels.append(str(text).strip())
+            self.postings.append(array('I'))
+            for word in set(value.split()):
+                self.words.setdefault(word, array('I')).append(value_id)
+        postings = self.postings[value_id]
+        if not postings or postings[-1] != founder_id:
+            postings.append(founder_id)
+        return value_id
+
+    def value_ids(self, phrase: str) -> List[int]:
+        """Ids of the values containing the phrase"""
+        phrase = normalize(phrase)
+        if not phrase:
+            return []
+        candidates = sorted((self.words.get(word, ()) for word in set(phrase.split())), key=len)
+        if not candidates[0]:
+            return []
+        found = set(candidates[0]).intersection(*candidates[1:])
+        padded = f" {phrase} "
+        return [value_id for value_id in found if padded in f" {self.values[value_id]} "]
+
+    def find(self, phrase: str) -> set:
+        """Ids of the founders with a value containing the phrase"""
+        founders = set()
+        for value_id in self.value_ids(phrase):
+            founders.update(self.postings[value_id])
+        return founders
+
+
+class FounderIndex:
+    """
+    Enriched founder profiles loaded once for repeated queries.
+
+    Founders are compact records numbered in input order, with their years
+    of experience in a parallel array for sorting. Companies and role titles
+    come from both the current role and every past experience.
+    """
+
+    def __init__(self, profiles: Iterable[Tuple[str, Dict]] = ()):
+        self.founders = []
+        self.years = array('d')
+        self.fields = {field: FieldIndex() for field in FIELDS}
+        self._by_name = {}
+        # Company value ids of each founder, for colleagues()
+        self._companies = []
+        # Founder ids by ascending years, ties by descending id, built on first use
+        self._order = None
+        self._sorted_years = None
+        for name, profile in profiles:
+            self.add(name, profile)
+        self._years_span()
+
+    @classmethod
+    def load(cls, path: str) -> "FounderIndex":
+        return cls(iter_profiles(path))
+
+    def __len__(self) -> int:
+        return len(self.founders)
+
+    def add(self, name: str, profile: Dict):
+        """Index one profile; non-profile results are skipped"""
+        if not isinstance(profile, dict) or 'career' not in profile:
+            return
+        founder_id = len(self.founders)
+        founder = Founder(founder_id, name, profile)
+        self._order = None
+        self.founders.append(founder)
+        self.years.append(founder.years)
+        self._by_name.setdefault(normalize(name), founder_id)
+
+        career = profile.get('career', {}) or {}
+        current_role = career.get('current_role', {}) or {}
+        companies, titles = [current_role.get('company', '')], [current_role.get('title', '')]
+        for experience in career.get('experience', []) or []:
+            companies.append(experience.get('company', ''))
+            titles.extend(role.get('title', '') for role in experience.get('roles', []) or [])
+        education = profile.get('education') or []
+        if isinstance(education, dict):
+            education = [education]
+
+        company_ids = {self.fields["company"].add(company, founder_id) for company in companies}
+        self._companies.append(array('I', sorted(company_ids - {-1})))
+        for title in titles:
+            self.fields["title"].add(title, founder_id)
+        for entry in education:
+            self.fields["institution"].add(entry.get('institution', ''), founder_id)
+            self.fields["field"].add(entry.get('field', ''), founder_id)
+
+    def get(self, name: str):
+        """A founder by name, compared like the index compares values"""
+        founder_id = self._by_name.get(normalize(name))
+        return None if founder_id is None else self.founders[founder_id]
+
+    def _years_span(self, min_years: float = None, max_years: float = None) -> Tuple[int, int]:
+        """Slice of the years order holding the founders within the bounds"""
+        if self._order is None:
+            years = self.years
+            self._order = array('I', sorted(range(len(years)), key=lambda i: (years[i], -i)))
+            self._sorted_years = array('d', (years[i] for i in self._order))
+        if min_years is None and max_years is None:
+            return 0, len(self._order)
+        low = max(min_years if min_years is not None else 0, 0)
+        high = max_years if max_years is not None else float("inf")
+        return bisect.bisect_left(self._sorted_years, low), bisect.bisect_right(self._sorted_years, high)
+
+    def _filter_sets(self, filters: Dict) -> List[set]:
+        sets = []
+        for field, phrases in (filters or {}).items():
+            if field not in self.fields:
+                raise ValueError(f"Unknown field {field!r}, expected one of {', '.join(FIELDS)}")
+            for phrase in [phrases] if isinstance(phrases, str) else phrases:
+                sets.append(self.fields[field].find(phrase))
+        return sets
+
+    def match(self, filters: Dict = None, min_years: float = None, max_years: float = None) -> set:
+        """
+        Ids of the founders matching every filter
+
+        Args:
+            filters (dict): field -> phrase, or a list of phrases that must all match
+            min_years (float): Minimum years of experience; unknown years never match
+            max_years (float): Maximum years of experience
+        """
+        sets = self._filter_sets(filters)
+        if not sets:
+            start, end = self._years_span(min_years, max_years)
+            return set(self._order[start:end])
+        sets.sort(key=len)
+        ids = sets[0].intersection(*sets[1:])
+        if min_years is not None or max_years is not None:
+            low = max(min_years if min_years is not None else 0, 0)
+            high = max_years if max_years is not None else float("inf")
+            years = self.years
+            ids = {i for i in ids if low <= years[i] <= high}
+        return ids
+
+    def query(self, filters: Dict = None, min_years: float = None, max_years: float = None,
+              sort: str = None, limit: int = None) -> Tuple[int, List[Founder]]:
+        """
+        Founders matching every filter, as match() takes them
+
+        Args:
+            sort (str): "years" for the most experienced first, with unknown
+                years last, "name" for alphabetical, or None for input order
+            limit (int): Return only the top `limit` founders
+
+        Returns:
+            tuple: (number of matches, the founders returned)
+        """
+        if sort not in SORTS + (None,):
+            raise ValueError(f"Unknown sort {sort!r}, expected one of {', '.join(SORTS)}")
+        # Without filters, read straight off the years order or the records instead of collecting every match
+        if not filters and sort == "years":
+            start, end = self._years_span(min_years, max_years)
+            stop = start if limit is None else max(end - limit, start)
+            return end - start, [self.founders[i] for i in reversed(self._order[stop:end])]
+        if not filters and sort is None and min_years is None and max_years is None:
+            return len(self.founders), self.founders[:limit]
+        ids = self.match(filters, min_years, max_years)
+        if sort == "years":
+            years = self.years
+            key = lambda i: (years[i], -i)
+            ordered = heapq.nlargest(limit, ids, key=key) if limit is not None else sorted(ids, key=key, reverse=True)
+        elif sort == "name":
+            key = lambda i: (self.founders[i].name.casefold(), i)
+            ordered = heapq.nsmallest(limit, ids, key=key) if limit is not None else sorted(ids, key=key)
+        else:
+            ordered = heapq.nsmallest(limit, ids) if limit is not None else sorted(ids)
+        return len(ids), [self.founders[i] for i in ordered]
+
+    def colleagues(self, name: str) -> List[Tuple[Founder, List[str]]]:
+        """
+        Founders who worked at any company the named founder worked at,
+        joined on the company index
+
+        Returns:
+            list: (founder, companies they share) pairs in input order
+        """
+        founder = self.get(name)
+        if founder is None:
+            return []
+        companies = self.fields["company"]
+        shared = {}
+        for value_id in self._companies[founder.founder_id]:
+            for other in companies.postings[value_id]:
+                if other != founder.founder_id:
+                    shared.setdefault(other, []).append(companies.labels[value_id])
+        return [(self.founders[i], shared[i]) for i in sorted(shared)]
+
+    def stats(self) -> Dict:
+        known = sum(1 for years in self.years if years != UNKNOWN_YEARS)
+        return {
+            "founders": len(self.founders),
+            "with_years": known,
+            **{f"{field}_values": len(index.values) for field, index in self.fields.items()},
+        }
+
+
+class IndexServer:
+    """
+    Serve a FounderIndex over HTTP as JSON
+
+        GET /founders?company=google&institution=stanford&min_years=5&sort=years&limit=10
+        GET /colleagues?name=Brian+Chesky
+        GET /stats
+
+    A filter given several times must match every time. The index is
+    rebuilt when the input file changes, on the next request after it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mtime = None
+        self.index = None
+        self.refresh()
+
+    def refresh(self) -> FounderIndex:
+        """The index, reloaded first if the input file changed since it was built"""
+        mtime = os.stat(self.path).st_mtime_ns
+        with self._lock:
+            if mtime != self._mtime:
+                started = time.perf_counter()
+                self.index = FounderIndex.load(self.path)
+                self._mtime = mtime
+                print(f"Indexed {len(self.index)} founders from {self.path} "
+                      f"in {(time.perf_counter() - started) * 1000:.0f} ms")
+            return self.index
+
+    def handle(self, path: str, params: Dict[str, List[str]]) -> Tuple[int, Dict]:
+        index = self.refresh()
+        started = time.perf_counter()
+
+        def single(key, cast=str):
+            return cast(params[key][-1]) if key in params else None
+
+        try:
+            if path == "/founders":
+                filters = {field: params[field] for field in FIELDS if field in params}
+                count, founders = index.query(filters, single("min_years", float), single("max_years", float),
+                                              single("sort"), single("limit", int))
+                payload = {"count": count, "founders": [founder.to_dict() for founder in founders]}
+            elif path == "/colleagues":
+                if "name" not in params:
+                    raise ValueError("name is required")
+                payload = {"founders": [
+                    {**founder.to_dict(), "shared_companies": shared}
+                    for founder, shared in index.colleagues(single("name"))
+                ]}
+            elif path == "/stats":
+                payload = index.stats()
+            else:
+                return 404, {"error": f"Unknown path {path}"}
+        except ValueError as e:
+            return 400, {"error": str(e)}
+        payload["took_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        return 200, payload
+
+    def serve(self, host: str, port: int):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                status, payload = server.handle(url.path, parse_qs(url.query))
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        httpd = ThreadingHTTPServer((host, port), Handler)
+        httpd.daemon_threads = True
+        print(f"Serving founder queries on http://{host}:{port}")
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            httpd.server_close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    input_json = "/Users/aveekgoyal/ice_breaker/agents/founders_wiki_data.json"
+
+    parser = argparse.ArgumentParser(description="Query enriched founder profiles")
+    parser.add_argument("--input", default=input_json, help="founders_wiki_data.json or the .jsonl journal")
+    for field in FIELDS:
+        parser.add_argument(f"--{field}", action="append", default=[],
+                            help=f"Founders with a {field} containing this phrase; repeat to require several")
+    parser.add_argument("--min-years", type=float, help="Minimum total years of experience")
+    parser.add_argument("--max-years", type=float, help="Maximum total years of experience")
+    parser.add_argument("--sort", choices=SORTS, help="Most experienced first, or by name (default: input order)")
+    parser.add_argument("--limit", type=int, default=20, help="Founders to print")
+    parser.add_argument("--colleagues", metavar="NAME", help="Founders who worked at any company NAME worked at")
+    parser.add_argument("--serve", action="store_true", help="Answer queries over HTTP instead")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    if args.serve:
+        IndexServer(args.input).serve(args.host, args.port)
+        raise SystemExit(0)
+
+    started = time.perf_counter()
+    index = FounderIndex.load(args.input)
+    print(f"Indexed {len(index)} founders in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    started = time.perf_counter()
+    if args.colleagues:
+        if index.get(args.colleagues) is None:
+            raise SystemExit(f"No founder named {args.colleagues}")
+        matches = index.colleagues(args.colleagues)
+        took = time.perf_counter() - started
+        for founder, shared in matches[:args.limit]:
+            print(f"{founder.name}: {', '.join(shared)}")
+        print(f"{len(matches)} colleagues in {took * 1000:.3f} ms")
+        raise SystemExit(0)
+
+    filters = {field: getattr(args, field) for field in FIELDS if getattr(args, field)}
+    count, founders = index.query(filters, args.min_years, args.max_years, args.sort, args.limit)
+    took = time.perf_counter() - started
+    for founder in founders:
+        years = "?" if founder.years == UNKNOWN_YEARS else f"{founder.years:g}"
+        role = " at ".join(part for part in (founder.current_title, founder.current_company) if part)
+        print(f"{founder.name} ({years} years): {role}")
+    print(f"{count} founders match, {len(founders)} shown, in {took * 1000:.3f} ms")
@@ -1,55 +1,193 @@
+import hashlib
 import json
 import csv
 import os
+import tempfile
+import time
 from typing import Dict, Any, List
 
+EXPERIENCE_FIELDS = ['company', 'title', 'duration', 'description', 'responsibilities', 'achievements']
+
+BASE_HEADERS = [
+    'founder_name',
+    'short_description',
+    'education_degree',
+    'education_institution',
+    'education_field',
+    'current_role_title',
+    'current_role_company',
+    'current_role_description',
+    'current_role_duration',
+    'current_role_achievements',
+    'total_years_experience'
+]
+
+
+def iter_json_object(path: str, chunk_size: int = 1 << 16):
+    """
+    Stream the (key, value) pairs of a top-level JSON object
+
+    Only the value being decoded is held in memory, so a large
+    founders_wiki_data.json is read with memory bounded by its biggest
+    founder rather than by the whole file.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = ""
+        pos = 0
+        eof = False
+
+        def fill():
+            nonlocal buffer, pos, eof
+            chunk = f.read(chunk_size)
+            if not chunk:
+                eof = True
+            buffer = buffer[pos:] + chunk
+            pos = 0
+
+        def skip_whitespace():
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and buffer[pos] in " \t\r\n":
+                    pos += 1
+                if pos < len(buffer) or eof:
+                    return
+                fill()
+
+        def decode():
+            # Decode one value, reading more input until it is complete and
+            # followed by at least one more character
+            nonlocal pos
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buffer, pos)
+                    if end < len(buffer) or eof:
+                        pos = end
+                        return value
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                fill()
+
+        def expect(char):
+            nonlocal pos
+            skip_whitespace()
+            if pos >= len(buffer) or buffer[pos] != char:
+                raise ValueError(f"Expected {char!r} in {path}")
+            pos += 1
+
+        expect("{")
+        skip_whitespace()
+        if pos < len(buffer) and buffer[pos] == "}":
+            return
+        while True:
+            skip_whitespace()
+            key = decode()
+            expect(":")
+            skip_whitespace()
+            yield key, decode()
+            skip_whitespace()
+            if pos < len(buffer) and buffer[pos] == ",":
+                pos += 1
+                continue
+            expect("}")
+            return
+
+
 class WikiDataConverter:
-    def __init__(self, input_json_path: str, output_csv_path: str, tracking_file: str):
+    def __init__(self, input_json_path: str, output_csv_path: str, tracking_file: str,
+                 checkpoint_rows: int = 500, checkpoint_seconds: float = 5.0, manifest_file: str = None):
         self.input_json_path = input_json_path
         self.output_csv_path = output_csv_path
         self.tracking_file = tracking_file
+        # Content hashes of the converted founders, next to the tracking file
+        self.manifest_file = manifest_file or os.path.splitext(tracking_file)[0] + "_manifest.json"
+        self.stats = {}
+        self.checkpoint_rows = checkpoint_rows
+        self.checkpoint_seconds = checkpoint_seconds
         self.tracking_data = self.load_tracking()
-        self.max_experiences = self._get_max_experiences()
-        
-    def _get_max_experiences(self) -> int:
-        """Get the maximum number of experiences across all founders"""
-        max_exp = 0
-        with open(self.input_json_path, 'r') as f:
-            data = json.load(f)
-            for founder_data in data.values():
-                exp_count = len(founder_data.get('career', {}).get('experience', []))
-                max_exp = max(max_exp, exp_count)
-        return max_exp
-        
+        # Computed while streaming the input in convert()
+        self.max_experiences = 0
+
+    def iter_founders(self):
+        """
+        Yield (founder_name, founder_data) pairs from the input
+
+        Accepts the compacted JSON file or the append-only .jsonl results
+        journal, both read incrementally. A journal can hold several records
+        for one founder; they are yielded in write order and the newest wins.
+        """
+        if not self.input_json_path.endswith('.jsonl'):
+            yield from iter_json_object(self.input_json_path)
+            return
+
+        with open(self.input_json_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash can leave a partial last line
+                    break
+                yield record['founder_name'], record['result']
+
+    def iter_unique_founders(self):
+        """
+        Like iter_founders(), but yields each founder once with its newest
+        data. A journal input costs one extra pass to find the newest
+        record of each founder.
+        """
+        if not self.input_json_path.endswith('.jsonl'):
+            yield from self.iter_founders()
+            return
+        latest = {}
+        for index, (founder_name, _) in enumerate(self.iter_founders()):
+            latest[founder_name] = index
+        for index, (founder_name, founder_data) in enumerate(self.iter_founders()):
+            if latest[founder_name] == index:
+                yield founder_name, founder_data
+
     def load_tracking(self) -> Dict[str, Any]:
         """Load or create tracking data"""
         if os.path.exists(self.tracking_file):
             with open(self.tracking_file, 'r') as f:
                 return json.load(f)
         return {
-            "last_processed_founder": None,
             "total_founders_processed": 0,
             "conversion_status": "incomplete"
         }
-    
+
     def save_tracking(self):
         """Save tracking data"""
-        with open(self.tracking_file, 'w') as f:
+        tmp_file = self.tracking_file + ".tmp"
+        with open(tmp_file, 'w') as f:
             json.dump(self.tracking_data, f, indent=2)
-    
+        os.replace(tmp_file, self.tracking_file)
+
     def format_list(self, items: list) -> str:
         """Convert list to pipe-separated string"""
         return "|".join(items) if items else ""
-    
-    def flatten_experience(self, experience: List[Dict]) -> Dict[str, str]:
+
+    def education_value(self, founder_data: Dict, field: str) -> str:
+        """
+        One education field for the CSV. Profiles hold either a single
+        education dict or a list of them; several degrees are pipe-joined in
+        order so the degree, institution and field columns line up
+        """
+        education = founder_data.get('education') or {}
+        if isinstance(education, dict):
+            return education.get(field, '')
+        values = [entry.get(field) or '' for entry in education]
+        return "|".join(values) if any(values) else ""
+
+    def flatten_experience(self, experience: List[Dict], pad: bool = True) -> Dict[str, str]:
         """Flatten experience data into a dictionary with company-prefixed keys"""
         flattened = {}
-        
+
         for idx, exp in enumerate(experience, 1):
             prefix = f"experience_{idx}"
             company = exp.get('company', '')
             roles = exp.get('roles', [])
-            
+
             if roles:
                 # Take the most recent/first role
                 role = roles[0]
@@ -61,9 +199,9 @@ class WikiDataConverter:
                     f"{prefix}_responsibilities": self.format_list(role.get('responsibilities', [])),
                     f"{prefix}_achievements": self.format_list(role.get('achievements', []))
                 })
-        
+
         # Ensure all experiences up to max_experiences are represented
-        for idx in range(1, self.max_experiences + 1):
+        for idx in range(1, self.max_experiences + 1 if pad else 0):
             prefix = f"experience_{idx}"
             if f"{prefix}_company" not in flattened:
                 flattened.update({
@@ -74,111 +212,293 @@ class WikiDataConverter:
                     f"{prefix}_responsibilities": "",
                     f"{prefix}_achievements": ""
                 })
-        
+
         return flattened
-    
-    def convert(self):
-        """Convert JSON data to CSV"""
-        # Read input JSON
-        with open(self.input_json_path, 'r') as f:
-            data = json.load(f)
-            
-        # Define base CSV headers
-        base_headers = [
-            'founder_name',
-            'short_description',
-            'education_degree',
-            'education_institution',
-            'education_field',
-            'current_role_title',
-            'current_role_company',
-            'current_role_description',
-            'current_role_duration',
-            'current_role_achievements',
-            'total_years_experience'
+
+    def build_row(self, founder_name: str, founder_data: Dict, pad_experiences: bool = True) -> Dict[str, str]:
+        """Flatten one founder into a CSV row"""
+        row = {
+            'founder_name': founder_name,
+            'short_description': founder_data.get('short_description', ''),
+            'education_degree': self.education_value(founder_data, 'degree'),
+            'education_institution': self.education_value(founder_data, 'institution'),
+            'education_field': self.education_value(founder_data, 'field'),
+            'current_role_title': founder_data.get('career', {}).get('current_role', {}).get('title', ''),
+            'current_role_company': founder_data.get('career', {}).get('current_role', {}).get('company', ''),
+            'current_role_description': founder_data.get('career', {}).get('current_role', {}).get('description', ''),
+            'current_role_duration': founder_data.get('career', {}).get('current_role', {}).get('duration', ''),
+            'current_role_achievements': self.format_list(
+                founder_data.get('career', {}).get('current_role', {}).get('achievements', [])
+            ),
+            'total_years_experience': founder_data.get('career', {}).get('total_years_experience', ''),
+            'source_url': founder_data.get('source_url', '')
+        }
+
+        # Add flattened experience data
+        row.update(self.flatten_experience(
+            founder_data.get('career', {}).get('experience', []),
+            pad=pad_experiences
+        ))
+        return row
+
+    def headers(self) -> List[str]:
+        """CSV headers for the current experience width"""
+        experience_headers = [
+            f"experience_{i}_{field}"
+            for i in range(1, self.max_experiences + 1)
+            for field in EXPERIENCE_FIELDS
         ]
-        
-        # Add experience headers for all experiences
-        experience_headers = []
-        for i in range(1, self.max_experiences + 1):
-            prefix = f"experience_{i}"
-            experience_headers.extend([
-                f"{prefix}_company",
-                f"{prefix}_title",
-                f"{prefix}_duration",
-                f"{prefix}_description",
-                f"{prefix}_responsibilities",
-                f"{prefix}_achievements"
-            ])
-        
-        headers = base_headers + experience_headers + ['source_url']
-        
-        # Create or append to CSV
-        mode = 'a' if self.tracking_data["last_processed_founder"] else 'w'
-        write_headers = mode == 'w'
-        
-        with open(self.output_csv_path, mode, newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=headers)
-            if write_headers:
-                writer.writeheader()
-            
-            # Process each founder
-            start_processing = not self.tracking_data["last_processed_founder"]
-            for founder_name, founder_data in data.items():
-                # Skip until last processed founder
-                if not start_processing:
-                    if founder_name == self.tracking_data["last_processed_founder"]:
-                        start_processing = True
-                    continue
-                
-                # Extract base data
-                row = {
-                    'founder_name': founder_name,
-                    'short_description': founder_data.get('short_description', ''),
-                    'education_degree': founder_data.get('education', {}).get('degree', ''),
-                    'education_institution': founder_data.get('education', {}).get('institution', ''),
-                    'education_field': founder_data.get('education', {}).get('field', ''),
-                    'current_role_title': founder_data.get('career', {}).get('current_role', {}).get('title', ''),
-                    'current_role_company': founder_data.get('career', {}).get('current_role', {}).get('company', ''),
-                    'current_role_description': founder_data.get('career', {}).get('current_role', {}).get('description', ''),
-                    'current_role_duration': founder_data.get('career', {}).get('current_role', {}).get('duration', ''),
-                    'current_role_achievements': self.format_list(
-                        founder_data.get('career', {}).get('current_role', {}).get('achievements', [])
-                    ),
-                    'total_years_experience': founder_data.get('career', {}).get('total_years_experience', ''),
-                    'source_url': founder_data.get('source_url', '')
-                }
-                
-                # Add flattened experience data
-                experience_data = self.flatten_experience(
-                    founder_data.get('career', {}).get('experience', [])
-                )
-                row.update(experience_data)
-                
-                writer.writerow(row)
-                
-                # Update tracking
-                self.tracking_data["last_processed_founder"] = founder_name
-                self.tracking_data["total_founders_processed"] += 1
+        return BASE_HEADERS + experience_headers + ['source_url']
+
+    def _row_cells(self, founder_name: str, founder_data: Dict) -> List:
+        """
+        Compact spill form of a row: base cells, the founder's own
+        experience cells and the source URL. Padding to the final experience
+        width happens when the CSV is written.
+        """
+        row = self.build_row(founder_name, founder_data, pad_experiences=False)
+        exp_count = len(founder_data.get('career', {}).get('experience', []))
+        experience_cells = [
+            row.get(f"experience_{i}_{field}", "")
+            for i in range(1, exp_count + 1)
+            for field in EXPERIENCE_FIELDS
+        ]
+        return [[row[h] for h in BASE_HEADERS], experience_cells, row['source_url']]
+
+    @staticmethod
+    def content_hash(founder_data: Dict) -> str:
+        """Stable hash of a founder profile, independent of key order"""
+        payload = json.dumps(founder_data, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def load_manifest(self) -> Dict[str, str]:
+        """founder_name -> content hash of the row currently in the CSV"""
+        if os.path.exists(self.manifest_file) and os.path.exists(self.output_csv_path):
+            with open(self.manifest_file, 'r') as f:
+                return json.load(f)
+        return {}
+
+    def save_manifest(self, manifest: Dict[str, str]):
+        tmp_file = self.manifest_file + ".tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_file, self.manifest_file)
+
+    def _spill(self, spill_file, old_manifest: Dict[str, str]):
+        """
+        Single pass over the input: hash every founder, flatten only new or
+        changed ones into the spill file and measure the experience width
+
+        Returns:
+            tuple: (new manifest, founder_name -> spill file offset of its row)
+        """
+        manifest = {}
+        offsets = {}
+        for founder_name, founder_data in self.iter_founders():
+            exp_count = len(founder_data.get('career', {}).get('experience', []))
+            self.max_experiences = max(self.max_experiences, exp_count)
+
+            digest = self.content_hash(founder_data)
+            manifest[founder_name] = digest
+            if old_manifest.get(founder_name) == digest:
+                # Unchanged, or a journal record superseded by an unchanged one
+                offsets.pop(founder_name, None)
+                continue
+
+            offsets[founder_name] = spill_file.tell()
+            spill_file.write(json.dumps(self._row_cells(founder_name, founder_data), ensure_ascii=False) + "\n")
+        return manifest, offsets
+
+    def _read_header_width(self) -> int:
+        """Experience columns in the existing CSV, or -1 if there is none"""
+        if not os.path.exists(self.output_csv_path):
+            return -1
+        with open(self.output_csv_path, 'r', newline='', encoding='utf-8') as f:
+            header = next(csv.reader(f), None)
+        if not header:
+            return -1
+        return (len(header) - len(BASE_HEADERS) - 1) // len(EXPERIENCE_FIELDS)
+
+    def convert(self):
+        """
+        Convert JSON data to CSV incrementally
+
+        Only founders whose content hash differs from the manifest are
+        flattened. New founders are appended in place. Changed or removed
+        founders, or a change in experience width, rebuild the CSV from the
+        existing rows plus the re-flattened ones, so rows are updated where
+        they stand.
+        """
+        # Resume an interrupted append from its last checkpoint: rows after
+        # it are cut off, rows before it count as converted
+        old_manifest = self.load_manifest()
+        csv_offset = self.tracking_data.get("csv_offset")
+        if (self.tracking_data.get("conversion_status") == "incomplete" and csv_offset is not None
+                and os.path.exists(self.output_csv_path)):
+            with open(self.output_csv_path, 'r+b') as f:
+                f.truncate(csv_offset)
+            old_manifest.update(self.tracking_data.get("appended", {}))
+        output_dir = os.path.dirname(os.path.abspath(self.output_csv_path))
+        with tempfile.TemporaryFile('w+', encoding='utf-8', dir=output_dir) as spill_file:
+            manifest, offsets = self._spill(spill_file, old_manifest)
+
+            added = [name for name in offsets if name not in old_manifest]
+            changed = {name for name in offsets if name in old_manifest}
+            removed = {name for name in old_manifest if name not in manifest}
+            self.stats = {
+                "added": len(added),
+                "changed": len(changed),
+                "unchanged": len(manifest) - len(offsets),
+                "removed": len(removed),
+            }
+
+            def spilled_row(name):
+                spill_file.seek(offsets[name])
+                return json.loads(spill_file.readline())
+
+            old_width = self._read_header_width()
+            # A CSV from before the manifest existed has rows we cannot match
+            # to hashes, so it is rebuilt from the input rather than appended to
+            untracked = old_width >= 0 and not os.path.exists(self.manifest_file)
+            if untracked:
+                print("No manifest for the existing CSV, rebuilding it")
+                self._rebuild(added, changed, set(), old_width, spilled_row)
+            elif not offsets and not removed and old_width == self.max_experiences:
+                print("Nothing to convert, output is up to date")
+            elif not changed and not removed and old_width == self.max_experiences:
+                self._append(added, spilled_row, manifest)
+            else:
+                self._rebuild(added, changed, old_manifest.keys() - removed, old_width, spilled_row)
+
+        self.save_manifest(manifest)
+        self.tracking_data.pop("last_processed_founder", None)
+        self.tracking_data.pop("appended", None)
+        self.tracking_data["total_founders_processed"] = len(manifest)
+        self.tracking_data["last_run"] = self.stats
+        self.tracking_data["conversion_status"] = "complete"
+        self.tracking_data["csv_offset"] = os.path.getsize(self.output_csv_path)
+        self.save_tracking()
+
+    def _format_cells(self, base_cells: List, experience_cells: List, source_url: str) -> List:
+        padding = [""] * (self.max_experiences * len(EXPERIENCE_FIELDS) - len(experience_cells))
+        return base_cells + experience_cells + padding + [source_url]
+
+    def _append(self, added: List[str], spilled_row, manifest: Dict[str, str]):
+        """
+        Append new founders to the existing CSV in place
+
+        Each checkpoint records the CSV size and the hashes of the founders
+        written so far in the tracking file, in one atomic write, so an
+        interrupted append resumes after the last checkpoint.
+        """
+        self.tracking_data["conversion_status"] = "incomplete"
+        self.tracking_data["csv_offset"] = os.path.getsize(self.output_csv_path)
+        self.tracking_data["appended"] = {}
+        self.save_tracking()
+
+        with open(self.output_csv_path, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+
+            def checkpoint(written):
+                self.tracking_data["csv_offset"] = os.fstat(f.fileno()).st_size
+                self.tracking_data["appended"] = {name: manifest[name] for name in added[:written]}
                 self.save_tracking()
-                
-                print(f"Processed: {founder_name}")
-            
-            # Mark as complete when done
-            self.tracking_data["conversion_status"] = "complete"
-            self.save_tracking()
+
+            self._write_rows(f, writer, (self._format_cells(*spilled_row(name)) for name in added), checkpoint)
+
+    def _rebuild(self, added: List[str], changed: set, kept: set, old_width: int, spilled_row):
+        """Rewrite the CSV with changed rows replaced where they stand"""
+        old_experience_cells = max(old_width, 0) * len(EXPERIENCE_FIELDS)
+
+        def rows():
+            if old_width >= 0:
+                with open(self.output_csv_path, 'r', newline='', encoding='utf-8') as old:
+                    reader = csv.reader(old)
+                    next(reader, None)
+                    for cells in reader:
+                        founder_name = cells[0]
+                        # Rows not in the manifest are removed or re-added below
+                        if founder_name not in kept:
+                            continue
+                        if founder_name in changed:
+                            yield self._format_cells(*spilled_row(founder_name))
+                            changed.discard(founder_name)
+                            continue
+                        experience_cells = cells[len(BASE_HEADERS):len(BASE_HEADERS) + old_experience_cells]
+                        # Unchanged founders never have more experiences than the new width
+                        experience_cells = experience_cells[:self.max_experiences * len(EXPERIENCE_FIELDS)]
+                        yield self._format_cells(cells[:len(BASE_HEADERS)], experience_cells, cells[-1])
+            # Changed founders missing from the old CSV are written as new
+            for founder_name in list(changed) + added:
+                yield self._format_cells(*spilled_row(founder_name))
+
+        tmp_file = self.output_csv_path + ".tmp"
+        with open(tmp_file, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(self.headers())
+            self._write_rows(f, writer, rows())
+        os.replace(tmp_file, self.output_csv_path)
+
+    def _write_rows(self, csv_file, writer, rows, checkpoint=None):
+        """
+        Write rows, reporting progress every N rows or T seconds
+
+        Args:
+            checkpoint: Called with the number of rows written once they are
+                synced to disk at each of those points, to record progress
+        """
+        written = 0
+        last_report = time.monotonic()
+        for row in rows:
+            writer.writerow(row)
+            written += 1
+            now = time.monotonic()
+            if written % self.checkpoint_rows == 0 or now - last_report >= self.checkpoint_seconds:
+                csv_file.flush()
+                if checkpoint is not None:
+                    os.fsync(csv_file.fileno())
+                    checkpoint(written)
+                print(f"Processed: {written} rows (last: {row[0]})")
+                last_report = now
+        csv_file.flush()
+        os.fsync(csv_file.fileno())
 
 if __name__ == "__main__":
+    import argparse
+    from export_backends import EXPORTERS
+
     # File paths
     input_json = "/Users/aveekgoyal/ice_breaker/agents/founders_wiki_data.json"
     output_csv = "/Users/aveekgoyal/ice_breaker/founders_wiki_data.csv"
     tracking_file = "/Users/aveekgoyal/ice_breaker/conversion_tracking.json"
-    
+    output_paths = {
+        "sqlite": "/Users/aveekgoyal/ice_breaker/founders_wiki_data.sqlite",
+        "parquet": "/Users/aveekgoyal/ice_breaker/founders_wiki_data_parquet",
+    }
+
+    parser = argparse.ArgumentParser(description="Export enriched founder data")
+    parser.add_argument("--input", default=input_json, help="founders_wiki_data.json or the .jsonl journal")
+    parser.add_argument("--format", choices=["csv"] + sorted(EXPORTERS), default="csv",
+                        help="csv writes the wide CSV, sqlite/parquet write the normalized tables")
+    parser.add_argument("--output", help="Output file (csv, sqlite) or directory (parquet)")
+    args = parser.parse_args()
+
+    if args.format != "csv":
+        output = args.output or output_paths[args.format]
+        converter = WikiDataConverter(args.input, output_csv, tracking_file)
+        count = EXPORTERS[args.format](output).export(converter.iter_unique_founders())
+        print(f"Exported {count} founders to {output} ({args.format})")
+        raise SystemExit(0)
+
+    output_csv = args.output or output_csv
+
     # Create and run converter
-    converter = WikiDataConverter(input_json, output_csv, tracking_file)
-    print(f"Found {converter.max_experiences} maximum experiences across all founders")
+    converter = WikiDataConverter(args.input, output_csv, tracking_file)
     converter.convert()
-    
+    print(f"Found {converter.max_experiences} maximum experiences across all founders")
+
     print("\nConversion completed!")
-    print(f"Total founders processed: {converter.tracking_data['total_founders_processed']}")
+    print(f"Added: {converter.stats['added']}, changed: {converter.stats['changed']}, "
+          f"unchanged: {converter.stats['unchanged']}, removed: {converter.stats['removed']}")
+    print(f"Total founders in output: {converter.tracking_data['total_founders_processed']}")
     print(f"Output CSV: {output_csv}")
@@ -0,0 +1,116 @@
+import csv
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+
+from json_to_csv_converter import WikiDataConverter
+
+
+def profile(company: str, experiences: int = 1) -> dict:
+    return {
+        "short_description": f"Founder of {company}",
+        "education": {"degree": "BS", "institution": "State University", "field": "Physics"},
+        "career": {
+            "current_role": {"title": "CEO", "company": company},
+            "experience": [{"company": f"{company} {i}", "roles": [{"title": "Engineer"}]}
+                           for i in range(experiences)],
+            "total_years_experience": "10",
+        },
+        "source_url": f"https://en.wikipedia.org/wiki/{company}",
+    }
+
+
+def csv_names(path: str) -> list:
+    with open(path, newline='', encoding='utf-8') as f:
+        return [row[0] for row in list(csv.reader(f))[1:]]
+
+
+def test_baseline_tracking_file_without_manifest_is_rebuilt_not_appended(tmp_path):
+    founders = {"Ada Lovelace": profile("Analytical"), "Grace Hopper": profile("Cobol")}
+    input_json = tmp_path / "founders_wiki_data.json"
+    input_json.write_text(json.dumps(founders))
+    output_csv = tmp_path / "founders_wiki_data.csv"
+    tracking_file = tmp_path / "conversion_tracking.json"
+
+    # What the converter wrote before it kept a manifest: full CSV, last founder in the tracking file
+    old = WikiDataConverter(str(input_json), str(output_csv), str(tracking_file))
+    old.max_experiences = 1
+    with open(output_csv, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=old.headers())
+        writer.writeheader()
+        for name, data in founders.items():
+            writer.writerow(old.build_row(name, data))
+    tracking_file.write_text(json.dumps({
+        "last_processed_founder": "Grace Hopper",
+        "total_founders_processed": 2,
+        "conversion_status": "complete",
+    }))
+
+    founders["Alan Turing"] = profile("Bombe")
+    input_json.write_text(json.dumps(founders))
+    converter = WikiDataConverter(str(input_json), str(output_csv), str(tracking_file))
+    converter.convert()
+
+    assert csv_names(output_csv) == ["Ada Lovelace", "Grace Hopper", "Alan Turing"]
+    tracking = json.loads(tracking_file.read_text())
+    assert "last_processed_founder" not in tracking
+    assert tracking["total_founders_processed"] == 3
+
+    # The manifest now exists, so a rerun finds nothing to do
+    rerun = WikiDataConverter(str(input_json), str(output_csv), str(tracking_file))
+    rerun.convert()
+    assert rerun.stats["unchanged"] == 3
+    assert csv_names(output_csv) == ["Ada Lovelace", "Grace Hopper", "Alan Turing"]
+
+
+def test_interrupted_append_resumes_after_last_checkpoint(tmp_path):
+    founders = {f"Founder {i}": profile(f"Company{i}") for i in range(3)}
+    input_json = tmp_path / "founders_wiki_data.json"
+    input_json.write_text(json.dumps(founders))
+    output_csv = tmp_path / "founders_wiki_data.csv"
+    tracking_file = tmp_path / "conversion_tracking.json"
+    WikiDataConverter(str(input_json), str(output_csv), str(tracking_file)).convert()
+
+    founders.update({f"Founder {i}": profile(f"Company{i}") for i in range(3, 10)})
+    input_json.write_text(json.dumps(founders))
+    interrupted = WikiDataConverter(str(input_json), str(output_csv), str(tracking_file), checkpoint_rows=2)
+    format_cells = interrupted._format_cells
+    calls = []
+
+    def failing_format_cells(*cells):
+        calls.append(cells)
+        if len(calls) == 6:
+            raise KeyboardInterrupt
+        return format_cells(*cells)
+
+    interrupted._format_cells = failing_format_cells
+    try:
+        interrupted.convert()
+    except KeyboardInterrupt:
+        pass
+
+    # Five rows were written but only the four before the last checkpoint are kept
+    resumed = WikiDataConverter(str(input_json), str(output_csv), str(tracking_file))
+    resumed.convert()
+    assert resumed.stats["added"] == 3
+    assert csv_names(output_csv) == [f"Founder {i}" for i in range(10)]
+
+
+def test_education_list_is_pipe_joined(tmp_path):
+    founder = profile("Analytical")
+    founder["education"] = [
+        {"degree": "BS", "institution": "State University", "field": "Physics"},
+        {"degree": "PhD", "institution": "Tech Institute", "field": "Mathematics"},
+    ]
+    input_json = tmp_path / "founders_wiki_data.json"
+    input_json.write_text(json.dumps({"Ada Lovelace": founder}))
+    output_csv = tmp_path / "founders_wiki_data.csv"
+    WikiDataConverter(str(input_json), str(output_csv), str(tmp_path / "conversion_tracking.json")).convert()
+
+    with open(output_csv, newline='', encoding='utf-8') as f:
+        row = next(csv.DictReader(f))
+    assert row["education_degree"] == "BS|PhD"
+    assert row["education_institution"] == "State University|Tech Institute"
+    assert row["education_field"] == "Physics|Mathematics"